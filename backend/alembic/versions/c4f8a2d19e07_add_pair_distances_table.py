@@ -0,0 +1,36 @@
+"""add_pair_distances_table
+
+Revision ID: c4f8a2d19e07
+Revises: 81f69e3545aa
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f8a2d19e07'
+down_revision: Union[str, Sequence[str], None] = '81f69e3545aa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'pair_distances',
+        sa.Column('origin_key', sa.BigInteger(), nullable=False),
+        sa.Column('destination_key', sa.BigInteger(), nullable=False),
+        sa.Column('distance_meters', sa.Integer(), nullable=False),
+        sa.Column('duration_seconds', sa.Integer(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('origin_key', 'destination_key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('pair_distances')
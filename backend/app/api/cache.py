@@ -0,0 +1,206 @@
+"""
+Cache administration API endpoints.
+"""
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Path, Query, status
+from typing import Annotated, List, Literal, Optional
+import logging
+
+from app.schemas.cache import (
+    CacheCleanupRequest,
+    CacheCleanupResponse,
+    CacheInvalidateResponse,
+    CacheNamespaceReport,
+    CacheWarmupRequest,
+    CacheWarmupProgress,
+)
+from app.services.cache_warmup_service import CacheWarmupService, is_warmup_running
+from app.utils.cache_service import get_cache_service
+from app.dependencies import get_current_user
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/cache", tags=["cache"])
+
+
+@router.post(
+    "/warmup",
+    response_model=CacheWarmupProgress,
+    status_code=202,
+    summary="Warm the distance cache for unassigned recipients",
+    description="""
+    Fill the distance cache (Layer 1) with depot and intra-city distances for
+    all `Unassigned` recipients, optionally per province or city.
+    
+    Runs in the background during the off-peak window, within an element
+    budget. Re-posting the same filter resumes from the saved progress.
+    """
+)
+async def start_cache_warmup(
+    request: CacheWarmupRequest,
+    background_tasks: BackgroundTasks,
+    current_user: Annotated[dict, Depends(get_current_user)]
+) -> CacheWarmupProgress:
+    """
+    Schedule a cache warm-up.
+    
+    Args:
+        request: Region filter, budget and scheduling options
+        background_tasks: FastAPI background task queue
+        current_user: Authenticated user (required)
+    
+    Returns:
+        Progress saved so far, with status "scheduled" or "busy"
+    """
+    service = CacheWarmupService()
+    
+    if request.reset:
+        service.reset(request.province_ids, request.city_ids)
+    
+    progress = service.get_progress(request.province_ids, request.city_ids)
+    
+    if is_warmup_running():
+        progress["status"] = "busy"
+        return CacheWarmupProgress(**progress)
+    
+    logger.info(f"Cache warm-up {progress['job']} scheduled by user {current_user.username}")
+    background_tasks.add_task(
+        service.run,
+        province_ids=request.province_ids,
+        city_ids=request.city_ids,
+        budget_elements=request.budget_elements,
+        ignore_offpeak=request.ignore_offpeak
+    )
+    
+    progress["status"] = "scheduled"
+    return CacheWarmupProgress(**progress)
+
+
+@router.get(
+    "/warmup",
+    response_model=CacheWarmupProgress,
+    summary="Get cache warm-up progress"
+)
+async def get_cache_warmup_progress(
+    current_user: Annotated[dict, Depends(get_current_user)],
+    province_ids: Optional[List[int]] = Query(None),
+    city_ids: Optional[List[int]] = Query(None)
+) -> CacheWarmupProgress:
+    """
+    Get progress and elements spent for a warm-up filter.
+    
+    Args:
+        current_user: Authenticated user (required)
+        province_ids: Province filter used when starting the warm-up
+        city_ids: City filter used when starting the warm-up
+    
+    Returns:
+        Saved progress for the filter
+    """
+    return CacheWarmupProgress(**CacheWarmupService().get_progress(province_ids, city_ids))
+
+
+@router.get(
+    "/namespaces",
+    response_model=CacheNamespaceReport,
+    summary="Get keys and memory per cache namespace",
+    description="""
+    Count `distance`, `duration` and `solution` keys (current and earlier generations) and
+    estimate their memory with an incremental, rate-limited `SCAN`. Large
+    databases are sampled and extrapolated (`estimated: true`).
+    """
+)
+async def get_cache_namespaces(
+    current_user: Annotated[dict, Depends(get_current_user)],
+    max_scan_keys: Optional[int] = Query(None, gt=0, description="Max keys to scan")
+) -> CacheNamespaceReport:
+    """
+    Report cache usage per namespace.
+    
+    Args:
+        current_user: Authenticated user (required)
+        max_scan_keys: Max keys to scan (defaults to config)
+    
+    Returns:
+        Key counts and estimated memory per namespace
+    """
+    return CacheNamespaceReport(**get_cache_service().namespace_stats(max_scan_keys))
+
+
+@router.post(
+    "/namespaces/{namespace}/invalidate",
+    response_model=CacheInvalidateResponse,
+    summary="Invalidate a cache namespace",
+    description="""
+    Logically flush `distance`, `duration` or `solution` by bumping its generation. Old
+    keys stop being read immediately and expire by TTL; every worker
+    switches within `CACHE_GENERATION_REFRESH_SECONDS`.
+    """
+)
+async def invalidate_cache_namespace(
+    current_user: Annotated[dict, Depends(get_current_user)],
+    namespace: Literal["distance", "duration", "solution"] = Path(..., description="Cache namespace")
+) -> CacheInvalidateResponse:
+    """
+    Bump a namespace generation.
+    
+    Args:
+        current_user: Authenticated user (required)
+        namespace: "distance", "duration" or "solution"
+    
+    Returns:
+        Namespace and its new generation
+    
+    Raises:
+        HTTPException: 503 if Redis is not available
+    """
+    generation = get_cache_service().invalidate_namespace(namespace)
+    if generation is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Cache is not available"
+        )
+    
+    logger.info(f"Cache namespace {namespace} invalidated by user {current_user.username} (generation {generation})")
+    return CacheInvalidateResponse(namespace=namespace, generation=generation)
+
+
+@router.post(
+    "/cleanup",
+    response_model=CacheCleanupResponse,
+    status_code=202,
+    summary="Remove old-generation cache keys",
+    description="""
+    Delete keys of earlier generations in the background with a rate-limited
+    `SCAN` + `UNLINK`. Optional: old keys also expire by TTL.
+    """
+)
+async def start_cache_cleanup(
+    request: CacheCleanupRequest,
+    background_tasks: BackgroundTasks,
+    current_user: Annotated[dict, Depends(get_current_user)]
+) -> CacheCleanupResponse:
+    """
+    Schedule an old-generation cleanup.
+    
+    Args:
+        request: Namespace and scan limit
+        background_tasks: FastAPI background task queue
+        current_user: Authenticated user (required)
+    
+    Returns:
+        Status "scheduled", "busy" or "unavailable"
+    """
+    cache = get_cache_service()
+    
+    if not cache.enabled:
+        return CacheCleanupResponse(status="unavailable")
+    if cache.is_cleanup_running():
+        return CacheCleanupResponse(status="busy")
+    
+    logger.info(f"Cache cleanup scheduled by user {current_user.username}")
+    background_tasks.add_task(
+        cache.cleanup_old_generations,
+        namespace=request.namespace,
+        max_keys=request.max_keys
+    )
+    return CacheCleanupResponse(status="scheduled")
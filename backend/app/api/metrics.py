@@ -0,0 +1,15 @@
+"""
+Prometheus metrics endpoint.
+"""
+from fastapi import APIRouter, Response
+
+from app.utils.metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Expose cache, Routes API, solver and database metrics for Prometheus."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
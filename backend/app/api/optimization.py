@@ -2,15 +2,19 @@
 Optimization API endpoints for TSP and CVRP route optimization.
 """
 from fastapi import APIRouter, HTTPException, Depends
-from typing import Annotated
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Any, Dict, Optional, Tuple
 import logging
 
 from app.schemas.optimization import (
     TSPRequest, TSPResponse,
     CVRPRequest, CVRPResponse,
+    OptimizationJobRequest, OptimizationJobResponse,
     ErrorResponse
 )
+from app.services.optimization_jobs import OptimizationJob, optimization_jobs
 from app.services.optimization_service import OptimizationService
+from app.services.solver_pool import SolverBusyError, solver_pool
 from app.dependencies import get_current_user
 from pydantic import BaseModel
 from typing import List
@@ -24,6 +28,40 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/optimize", tags=["optimization"])
 
 
+def _depot_location(request) -> Optional[Tuple[float, float]]:
+    """(lat, lng) of the request's depot, or None for the configured one."""
+    if request.depot_location:
+        return (request.depot_location.lat, request.depot_location.lng)
+    return None
+
+
+def _tsp_arguments(request: TSPRequest) -> Dict[str, Any]:
+    """Arguments of OptimizationService.solve_tsp for a TSP request."""
+    return dict(
+        recipient_ids=request.recipient_ids,
+        depot_location=_depot_location(request),
+        timeout_seconds=request.timeout_seconds,
+        use_traffic=request.use_traffic,
+        initial_sequence=request.initial_sequence,
+        previous_result_id=request.previous_result_id
+    )
+
+
+def _cvrp_arguments(request: CVRPRequest) -> Dict[str, Any]:
+    """Arguments of OptimizationService.solve_cvrp for a CVRP request."""
+    return dict(
+        recipient_ids=request.recipient_ids,
+        num_couriers=request.num_couriers,
+        capacity_per_courier=request.capacity_per_courier,
+        depot_location=_depot_location(request),
+        timeout_seconds=request.timeout_seconds,
+        use_traffic=request.use_traffic,
+        sparse_neighbors=request.sparse_neighbors,
+        initial_routes=request.initial_routes,
+        previous_result_id=request.previous_result_id
+    )
+
+
 class DistanceMatrixLegsRequest(BaseModel):
     """Request for leg-by-leg distance matrix calculation."""
     recipient_ids: List[UUID]
@@ -45,7 +83,8 @@ class DistanceMatrixLegsResponse(BaseModel):
     response_model=TSPResponse,
     responses={
         400: {"model": ErrorResponse, "description": "Bad request"},
-        500: {"model": ErrorResponse, "description": "Optimization failed"}
+        500: {"model": ErrorResponse, "description": "Optimization failed"},
+        503: {"model": ErrorResponse, "description": "Solver pool busy, retry later"}
     },
     summary="Solve TSP (Traveling Salesman Problem)",
     description="""
@@ -57,6 +96,9 @@ class DistanceMatrixLegsResponse(BaseModel):
     **Algorithm**: Google OR-Tools with GUIDED_LOCAL_SEARCH metaheuristic
     
     **Performance**: Target <5 seconds for up to 25 recipients
+    
+    **Re-optimization**: pass `initial_sequence` or `previous_result_id` to
+    start from an earlier order; the search then uses a fraction of the timeout
     """
 )
 async def optimize_tsp(
@@ -74,31 +116,21 @@ async def optimize_tsp(
         TSPResponse with optimized sequence and metrics
     
     Raises:
-        HTTPException: If optimization fails or invalid input
+        HTTPException: If optimization fails, input is invalid or the solver pool is busy (503)
     """
     try:
         logger.info(f"TSP request from user {current_user.username}: {len(request.recipient_ids)} recipients")
         
-        # Extract depot location if provided
-        depot_location = None
-        if request.depot_location:
-            depot_location = (request.depot_location.lat, request.depot_location.lng)
-        
-        # Create optimization service
-        optimizer = OptimizationService()
-        
-        # Solve TSP
-        result = optimizer.solve_tsp(
-            recipient_ids=request.recipient_ids,
-            depot_location=depot_location,
-            timeout_seconds=request.timeout_seconds,
-            use_traffic=request.use_traffic
-        )
+        # Solve TSP in the solver pool so the event loop stays responsive
+        result = await solver_pool.solve("solve_tsp", **_tsp_arguments(request))
         
         logger.info(f"TSP solved successfully: {result['num_stops']} stops, {result['total_distance_meters']}m")
         
         return TSPResponse(**result)
         
+    except SolverBusyError as e:
+        logger.warning(f"TSP rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except ValueError as e:
         logger.error(f"TSP validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -112,7 +144,8 @@ async def optimize_tsp(
     response_model=CVRPResponse,
     responses={
         400: {"model": ErrorResponse, "description": "Bad request"},
-        500: {"model": ErrorResponse, "description": "Optimization failed"}
+        500: {"model": ErrorResponse, "description": "Optimization failed"},
+        503: {"model": ErrorResponse, "description": "Solver pool busy, retry later"}
     },
     summary="Solve CVRP (Capacitated Vehicle Routing Problem)",
     description="""
@@ -129,6 +162,9 @@ async def optimize_tsp(
     - Each courier has maximum capacity (packages)
     - All couriers start from depot
     - No return to depot required (Open VRP)
+    
+    **Re-optimization**: pass `initial_routes` or `previous_result_id` to
+    start from earlier routes; the search then uses a fraction of the timeout
     """
 )
 async def optimize_cvrp(
@@ -146,7 +182,7 @@ async def optimize_cvrp(
         CVRPResponse with optimized routes per courier and metrics
     
     Raises:
-        HTTPException: If optimization fails or invalid input
+        HTTPException: If optimization fails, input is invalid or the solver pool is busy (503)
     """
     try:
         logger.info(
@@ -156,23 +192,8 @@ async def optimize_cvrp(
             f"capacity {request.capacity_per_courier}"
         )
         
-        # Extract depot location if provided
-        depot_location = None
-        if request.depot_location:
-            depot_location = (request.depot_location.lat, request.depot_location.lng)
-        
-        # Create optimization service
-        optimizer = OptimizationService()
-        
-        # Solve CVRP
-        result = optimizer.solve_cvrp(
-            recipient_ids=request.recipient_ids,
-            num_couriers=request.num_couriers,
-            capacity_per_courier=request.capacity_per_courier,
-            depot_location=depot_location,
-            timeout_seconds=request.timeout_seconds,
-            use_traffic=request.use_traffic
-        )
+        # Solve CVRP in the solver pool so the event loop stays responsive
+        result = await solver_pool.solve("solve_cvrp", **_cvrp_arguments(request))
         
         logger.info(
             f"CVRP solved successfully: {result['num_routes']} routes, "
@@ -182,6 +203,9 @@ async def optimize_cvrp(
         
         return CVRPResponse(**result)
         
+    except SolverBusyError as e:
+        logger.warning(f"CVRP rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except ValueError as e:
         logger.error(f"CVRP validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -190,6 +214,141 @@ async def optimize_cvrp(
         raise HTTPException(status_code=500, detail=f"Optimization failed: {str(e)}")
 
 
+def _get_job(job_id: str, current_user) -> OptimizationJob:
+    """Job of the current user, or 404."""
+    job = optimization_jobs.get(job_id, current_user.username)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Optimization job {job_id} not found")
+    return job
+
+
+@router.post(
+    "/jobs",
+    response_model=OptimizationJobResponse,
+    status_code=202,
+    responses={
+        503: {"model": ErrorResponse, "description": "Solver pool busy, retry later"}
+    },
+    summary="Start an asynchronous TSP/CVRP optimization",
+    description="""
+    Queue an optimization in the solver pool and return its job id at once.
+    
+    Follow the job with `GET /jobs/{job_id}` or the Server-Sent Events stream
+    `GET /jobs/{job_id}/events`, which pushes the best solution found so far.
+    Finished jobs are kept for `OPTIMIZATION_JOB_TTL_SECONDS`.
+    """
+)
+async def create_optimization_job(
+    request: OptimizationJobRequest,
+    current_user: Annotated[dict, Depends(get_current_user)]
+) -> OptimizationJobResponse:
+    """
+    Start an optimization job.
+    
+    Args:
+        request: Problem type with its TSP or CVRP parameters
+        current_user: Authenticated user (required)
+    
+    Returns:
+        OptimizationJobResponse of the queued job
+    
+    Raises:
+        HTTPException: 503 if the solver pool is busy
+    """
+    if request.problem == "tsp":
+        arguments = _tsp_arguments(request.tsp)
+    else:
+        arguments = _cvrp_arguments(request.cvrp)
+    
+    try:
+        job = optimization_jobs.submit(request.problem, current_user.username, **arguments)
+    except SolverBusyError as e:
+        logger.warning(f"Optimization job rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    
+    return OptimizationJobResponse(**job.snapshot())
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=OptimizationJobResponse,
+    responses={404: {"model": ErrorResponse, "description": "Unknown or expired job"}},
+    summary="Get optimization job status and result"
+)
+async def get_optimization_job(
+    job_id: str,
+    current_user: Annotated[dict, Depends(get_current_user)]
+) -> OptimizationJobResponse:
+    """
+    Get an optimization job.
+    
+    Args:
+        job_id: Job id
+        current_user: Authenticated user (required)
+    
+    Returns:
+        OptimizationJobResponse with progress, or the result once completed
+    """
+    return OptimizationJobResponse(**_get_job(job_id, current_user).snapshot())
+
+
+@router.get(
+    "/jobs/{job_id}/events",
+    responses={404: {"model": ErrorResponse, "description": "Unknown or expired job"}},
+    summary="Stream optimization job progress (Server-Sent Events)",
+    description="""
+    `progress` events carry the job with the best solution so far; a final
+    `completed`, `failed` or `cancelled` event carries the full job and ends
+    the stream.
+    """
+)
+async def stream_optimization_job(
+    job_id: str,
+    current_user: Annotated[dict, Depends(get_current_user)]
+) -> StreamingResponse:
+    """
+    Stream job updates.
+    
+    Args:
+        job_id: Job id
+        current_user: Authenticated user (required)
+    
+    Returns:
+        text/event-stream response
+    """
+    job = _get_job(job_id, current_user)
+    return StreamingResponse(
+        optimization_jobs.events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post(
+    "/jobs/{job_id}/cancel",
+    response_model=OptimizationJobResponse,
+    responses={404: {"model": ErrorResponse, "description": "Unknown or expired job"}},
+    summary="Cancel an optimization job"
+)
+async def cancel_optimization_job(
+    job_id: str,
+    current_user: Annotated[dict, Depends(get_current_user)]
+) -> OptimizationJobResponse:
+    """
+    Cancel a queued or running job (finished jobs are returned unchanged).
+    
+    Args:
+        job_id: Job id
+        current_user: Authenticated user (required)
+    
+    Returns:
+        OptimizationJobResponse of the job
+    """
+    job = _get_job(job_id, current_user)
+    optimization_jobs.cancel(job)
+    return OptimizationJobResponse(**job.snapshot())
+
+
 @router.post(
     "/distance-matrix-legs",
     response_model=DistanceMatrixLegsResponse,
@@ -226,10 +385,11 @@ async def calculate_distance_matrix_legs(
         all_locations = [depot_location] + recipient_locations
         
         # Get distance matrix
-        matrix_data = service.routes_api_service.compute_route_matrix(
+        matrix_data = await service.routes_api_service.compute_route_matrix_async(
             origins=all_locations,
             destinations=all_locations,
-            use_traffic=False  # distance-matrix-legs endpoint always uses Essentials mode
+            use_traffic=False,  # distance-matrix-legs endpoint always uses Essentials mode
+            symmetric=settings.ROUTES_API_SYMMETRIC_MATRIX
         )
         
         # Extract sequential legs
@@ -241,8 +401,8 @@ async def calculate_distance_matrix_legs(
             to_idx = i + 1
             
             legs.append(DistanceMatrixLeg(
-                distance_meters=matrix_data["distance_matrix"][from_idx][to_idx],
-                duration_seconds=matrix_data["duration_matrix"][from_idx][to_idx]
+                distance_meters=int(matrix_data["distance_matrix"][from_idx][to_idx]),
+                duration_seconds=int(matrix_data["duration_matrix"][from_idx][to_idx])
             ))
         
         return DistanceMatrixLegsResponse(legs=legs)
@@ -11,6 +11,8 @@ from app.dependencies import get_current_user
 from app.models.user import User
 from app.models.recipient import RecipientStatus
 from app.repositories.recipient_repository import RecipientRepository
+from app.services.precompute_service import precompute_queue
+from app.utils.geo import pack_coordinate
 from app.schemas.recipient import (
     RecipientCreate,
     RecipientUpdate,
@@ -174,6 +176,9 @@ async def create_recipient(
         # Create recipient
         recipient = repo.create(data_dict)
         
+        # Precompute depot/neighbor distances in the background
+        precompute_queue.enqueue(recipient.id)
+        
         # Serialize response
         return serialize_recipient_with_location(recipient)
         
@@ -204,6 +209,10 @@ async def update_recipient(
         # Convert Pydantic model to dict
         data_dict = recipient_data.model_dump()
         
+        # Remember the current location to detect relocation
+        existing = repo.get_by_id(recipient_id)
+        previous_location = RecipientRepository.extract_location(existing) if existing else None
+        
         # Update recipient
         recipient = repo.update(recipient_id, data_dict)
         
@@ -213,6 +222,13 @@ async def update_recipient(
                 detail="Recipient not found"
             )
         
+        # Precompute distances again if the recipient moved
+        new_location = recipient_data.location
+        if previous_location is None or pack_coordinate(
+            previous_location["lat"], previous_location["lng"]
+        ) != pack_coordinate(new_location.lat, new_location.lng):
+            precompute_queue.enqueue(recipient.id)
+        
         # Serialize response
         return serialize_recipient_with_location(recipient)
         
@@ -34,9 +34,18 @@ class Settings(BaseSettings):
     OPTIMIZATION_TIMEOUT_SECONDS: int = 60
     TSP_TIMEOUT_SECONDS: int = 5
     CVRP_TIMEOUT_SECONDS: int = 60
+    CVRP_SPARSE_ESTIMATE_PENALTY: float = 1.5  # Cost multiplier for estimated arcs in sparse mode
+    WARM_START_TIME_FRACTION: float = 0.25  # Share of the solver timeout used when seeded with previous routes
+    SOLVER_POOL_SIZE: int = 2  # Concurrent OR-Tools solves per API process
+    SOLVER_POOL_MAX_QUEUED: int = 8  # Solves waiting for a worker before requests get 503
+    SOLVER_POOL_USE_PROCESSES: bool = True  # False runs solves in threads (debugging only, blocks the event loop)
+    OPTIMIZATION_JOB_TTL_SECONDS: int = 3600  # How long finished optimization jobs stay queryable
+    OPTIMIZATION_PROGRESS_INTERVAL_SECONDS: float = 1.0  # Min interval between progress reports of a job
+    OPTIMIZATION_JOB_HEARTBEAT_SECONDS: float = 15.0  # SSE keep-alive interval
     
     # Performance Profiling
     ENABLE_PROFILING: bool = False  # Set to True for debugging/benchmarking
+    METRICS_ENABLED: bool = True  # Expose Prometheus metrics at /metrics and time DB queries
     
     # Redis Configuration
     REDIS_HOST: str = "localhost"
@@ -45,9 +54,47 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: str = ""
     REDIS_DB: int = 0
     REDIS_SSL: bool = False
+    REDIS_MAX_CONNECTIONS: int = 50  # Shared connection pool size per process
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 5.0
+    CACHE_CIRCUIT_FAILURE_THRESHOLD: int = 3  # Consecutive Redis failures before skipping Redis
+    CACHE_CIRCUIT_COOLDOWN_SECONDS: float = 30.0  # How long Redis is skipped once the circuit opens
+    CACHE_LOCAL_ENABLED: bool = True  # In-process LRU (Layer 0) in front of Redis
+    CACHE_LOCAL_MAX_ENTRIES: int = 100000  # Memory cap (~200 bytes per entry)
+    CACHE_LOCAL_TTL_SECONDS: int = 3600  # Max Layer 0 lifetime (traffic entries also capped by dynamic TTL)
+    CACHE_KEY_PRECISION: int = 5  # Decimal places coordinates are snapped to in cache keys (5 ≈ 1.1 m grid)
+    CACHE_KEY_LEGACY_FALLBACK: bool = True  # Read (and migrate) pre-quantization Layer 1 keys
+    CACHE_LAYOUT: str = "pair"  # "pair" (one key per pair) or "row" (one hash per origin)
+    CACHE_TRAFFIC_HARD_TTL_FACTOR: int = 4  # Layer 2 entries stay servable (stale) for dynamic TTL × factor
+    CACHE_NEGATIVE_TTL_SECONDS: int = 3600  # Pairs the Routes API could not route are served from the fallback this long
+    CACHE_NEGATIVE_FAILURE_TTL_SECONDS: int = 60  # Pairs of a failed Routes API request skip the API this long
+    SOLUTION_CACHE_ENABLED: bool = True  # Reuse TSP/CVRP results of identical problems
+    SOLUTION_CACHE_TTL_SECONDS: int = 86400  # Solution lifetime (traffic-aware ones also capped by the dynamic TTL)
+    SOLUTION_CACHE_LOCAL_MAX_ENTRIES: int = 256  # In-process solution LRU (fallback while Redis is down)
+    CACHE_GENERATION_REFRESH_SECONDS: float = 5.0  # How often workers re-read namespace generations
+    CACHE_SCAN_COUNT: int = 500  # SCAN COUNT hint per batch for cleanup and namespace stats
+    CACHE_CLEANUP_KEYS_PER_SECOND: int = 5000  # Max keys visited per second by SCAN-based maintenance
+    CACHE_STATS_MAX_SCAN_KEYS: int = 100000  # Namespace stats extrapolate beyond this many scanned keys
+    CACHE_STATS_MEMORY_SAMPLE: int = 200  # Keys per namespace sampled with MEMORY USAGE
     
     # Routes API Configuration
     ROUTES_API_TIMEOUT: int = 30  # seconds
+    ROUTES_API_QPS: float = 10.0  # Max requests per second (shared per process)
+    ROUTES_API_MAX_WORKERS: int = 8  # Concurrent batch requests
+    ROUTES_API_MAX_RETRIES: int = 3  # Retries on 429 (rate limited)
+    ROUTES_API_RETRY_BACKOFF_SECONDS: float = 0.5  # Base delay for exponential backoff
+    ROUTES_API_SYMMETRIC_MATRIX: bool = False  # Mirror upper triangle for Essentials planning
+    ROUTES_API_SYMMETRY_SAMPLE_SIZE: int = 10  # Lower-triangle cells checked per matrix
+    ROUTES_API_SYMMETRY_TOLERANCE: float = 0.15  # Max mean relative asymmetry to mirror
+    PAIR_DISTANCE_STORE_ENABLED: bool = True  # Durable Postgres layer behind Redis
+    
+    # Neighbor Distance Precompute (background)
+    PRECOMPUTE_ENABLED: bool = True
+    PRECOMPUTE_NEIGHBORS: int = 10  # k nearest recipients per new/moved recipient
+    PRECOMPUTE_BATCH_SIZE: int = 50  # Recipients drained per batch
+    PRECOMPUTE_OFFPEAK_START_HOUR: int = 22  # Local hour the window opens
+    PRECOMPUTE_OFFPEAK_END_HOUR: int = 6  # Local hour the window closes
+    PRECOMPUTE_POLL_SECONDS: float = 300.0  # Idle re-check interval
+    CACHE_WARMUP_BUDGET_ELEMENTS: int = 50000  # Max billable elements per warm-up run
     
     @property
     def cors_origins_list(self) -> List[str]:
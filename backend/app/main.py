@@ -2,10 +2,34 @@
 FastAPI main application.
 RizQ - Sembako Delivery Assignment Dashboard
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.api import auth, recipients, regions, couriers, optimization, assignments, statistics
+from app.api import auth, recipients, regions, couriers, optimization, assignments, statistics, cache, metrics
+from app.utils.http_client import close_http_session
+from app.utils.cache_service import get_cache_service, close_cache_service
+from app.utils.metrics import MetricsMiddleware
+from app.services.precompute_service import precompute_queue
+from app.services.solver_pool import solver_pool
+from app.services.optimization_jobs import optimization_jobs
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown."""
+    # One cache client (and Redis pool) for every request in this process
+    app.state.cache_service = get_cache_service()
+    precompute_queue.start()
+    solver_pool.start()
+    yield
+    optimization_jobs.cancel_all()
+    solver_pool.stop()
+    precompute_queue.stop()
+    # Release pooled outbound connections
+    close_http_session()
+    close_cache_service()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -13,7 +37,8 @@ app = FastAPI(
     description="Sembako Delivery Assignment Dashboard API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -25,6 +50,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    # Lets database timers attribute queries to the endpoint being served
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers with /api/v1 prefix for consistency
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(recipients.router, prefix="/api/v1")
@@ -33,6 +62,9 @@ app.include_router(couriers.router, prefix="/api/v1")
 app.include_router(statistics.router, prefix="/api/v1/stats", tags=["statistics"])
 app.include_router(optimization.router)
 app.include_router(assignments.router)
+app.include_router(cache.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 
 @app.get("/health")
@@ -41,7 +73,8 @@ async def health_check():
     return {
         "status": "healthy",
         "environment": settings.ENVIRONMENT,
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "solver_pool": solver_pool.snapshot()
     }
 
 
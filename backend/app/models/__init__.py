@@ -7,6 +7,7 @@ from app.models.region import Province, City
 from app.models.courier import Courier
 from app.models.recipient import Recipient, RecipientStatus
 from app.models.assignment import Assignment, AssignmentRecipient, StatusHistory
+from app.models.pair_distance import PairDistance
 
 __all__ = [
     "BaseModel",
@@ -19,4 +20,5 @@ __all__ = [
     "Assignment",
     "AssignmentRecipient",
     "StatusHistory",
+    "PairDistance",
 ]
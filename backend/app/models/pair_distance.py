@@ -0,0 +1,27 @@
+"""
+Pair distance model for durable storage of fetched Routes API distances.
+"""
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, Integer, DateTime
+from app.database import Base
+
+
+class PairDistance(Base):
+    """
+    Static distance between two quantized coordinates.
+    
+    Keys are packed coordinates (see app.utils.geo.pack_coordinate), so a
+    row is two bigints plus the measurements. Acts as the durable layer
+    behind the Redis distance cache.
+    """
+    
+    __tablename__ = "pair_distances"
+    
+    origin_key = Column(BigInteger, primary_key=True)
+    destination_key = Column(BigInteger, primary_key=True)
+    distance_meters = Column(Integer, nullable=False)
+    duration_seconds = Column(Integer, nullable=True)  # Static (no traffic) duration
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<PairDistance {self.origin_key}->{self.destination_key}: {self.distance_meters}m>"
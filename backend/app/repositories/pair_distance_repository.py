@@ -0,0 +1,95 @@
+"""
+Repository pattern for PairDistance data access.
+Bulk reads and upserts of stored origin/destination distances.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.pair_distance import PairDistance
+
+# (origin_key, destination_key)
+PairKey = Tuple[int, int]
+
+# Keys per IN (...) query / rows per INSERT statement
+BULK_CHUNK_SIZE = 1000
+
+
+class PairDistanceRepository:
+    """Repository for pair distance data access operations."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def bulk_get(self, keys: List[PairKey]) -> List[Optional[Tuple[int, Optional[int]]]]:
+        """
+        Get stored distances for many pairs.
+        
+        Args:
+            keys: List of (origin_key, destination_key)
+            
+        Returns:
+            List aligned with keys: (distance_meters, duration_seconds) or None if not stored
+        """
+        found: Dict[PairKey, Tuple[int, Optional[int]]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        
+        for start in range(0, len(unique_keys), BULK_CHUNK_SIZE):
+            chunk = unique_keys[start:start + BULK_CHUNK_SIZE]
+            rows = self.db.query(
+                PairDistance.origin_key,
+                PairDistance.destination_key,
+                PairDistance.distance_meters,
+                PairDistance.duration_seconds
+            ).filter(
+                tuple_(PairDistance.origin_key, PairDistance.destination_key).in_(chunk)
+            ).all()
+            
+            for origin_key, destination_key, distance, duration in rows:
+                found[(origin_key, destination_key)] = (distance, duration)
+        
+        return [found.get(key) for key in keys]
+    
+    def bulk_upsert(self, entries: List[Tuple[int, int, int, Optional[int]]]) -> int:
+        """
+        Insert or update many pair distances.
+        
+        A missing duration (e.g. from a traffic-aware request) keeps the
+        stored static duration.
+        
+        Args:
+            entries: List of (origin_key, destination_key, distance_meters, duration_seconds)
+            
+        Returns:
+            Number of rows written
+        """
+        # Last value wins for duplicate keys within one batch
+        rows_by_key = {
+            (origin_key, destination_key): {
+                "origin_key": origin_key,
+                "destination_key": destination_key,
+                "distance_meters": distance,
+                "duration_seconds": duration,
+                "fetched_at": datetime.utcnow()
+            }
+            for origin_key, destination_key, distance, duration in entries
+        }
+        rows = list(rows_by_key.values())
+        
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            stmt = insert(PairDistance).values(rows[start:start + BULK_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PairDistance.origin_key, PairDistance.destination_key],
+                set_={
+                    "distance_meters": stmt.excluded.distance_meters,
+                    "duration_seconds": func.coalesce(
+                        stmt.excluded.duration_seconds, PairDistance.duration_seconds
+                    ),
+                    "fetched_at": stmt.excluded.fetched_at
+                }
+            )
+            self.db.execute(stmt)
+        
+        self.db.commit()
+        return len(rows)
@@ -253,6 +253,57 @@ class RecipientRepository:
         
         return history
     
+    def get_by_status(
+        self,
+        status: RecipientStatus,
+        province_id: Optional[list[int]] = None,
+        city_id: Optional[list[int]] = None
+    ) -> list[Recipient]:
+        """
+        Get all active recipients with a status, optionally per region.
+        
+        Args:
+            status: Recipient status
+            province_id: Filter by province (can be multiple)
+            city_id: Filter by city (can be multiple)
+            
+        Returns:
+            Recipients ordered by city
+        """
+        query = self.db.query(Recipient).filter(
+            Recipient.is_deleted == False,
+            Recipient.status == status.value
+        )
+        
+        if province_id:
+            query = query.filter(Recipient.province_id.in_(province_id))
+        
+        if city_id:
+            query = query.filter(Recipient.city_id.in_(city_id))
+        
+        return query.order_by(Recipient.city_id, Recipient.id).all()
+    
+    def get_nearest_neighbors(self, recipient: Recipient, k: int) -> list[Recipient]:
+        """
+        Get the k nearest active recipients using a PostGIS KNN query.
+        
+        Uses the `<->` distance operator so the spatial index on location
+        drives the ordering.
+        
+        Args:
+            recipient: Recipient to search around
+            k: Number of neighbors
+            
+        Returns:
+            Up to k recipients ordered by distance (excluding the recipient itself)
+        """
+        return self.db.query(Recipient).filter(
+            Recipient.id != recipient.id,
+            Recipient.is_deleted == False
+        ).order_by(
+            Recipient.location.op('<->')(recipient.location)
+        ).limit(k).all()
+    
     @staticmethod
     def extract_location(recipient: Recipient) -> Optional[dict]:
         """
@@ -0,0 +1,71 @@
+"""
+Schemas for cache administration endpoints.
+"""
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+
+
+class CacheWarmupRequest(BaseModel):
+    """Request model for warming the distance cache."""
+    province_ids: Optional[List[int]] = Field(None, description="Only recipients in these provinces")
+    city_ids: Optional[List[int]] = Field(None, description="Only recipients in these cities")
+    budget_elements: Optional[int] = Field(
+        None, description="Max billable Routes API elements for this run (defaults to config)", ge=0
+    )
+    ignore_offpeak: bool = Field(False, description="Run immediately instead of only in the off-peak window")
+    reset: bool = Field(False, description="Discard saved progress and re-check every tile")
+
+
+class CacheWarmupProgress(BaseModel):
+    """Progress of a cache warm-up job."""
+    job: str = Field(..., description="Job key derived from the region filter")
+    status: str = Field(
+        ...,
+        description="not_started, scheduled, running, busy, completed, incomplete, "
+                    "budget_exhausted, outside_offpeak or failed"
+    )
+    recipients: int = Field(..., description="Unassigned recipients covered")
+    cities: int = Field(..., description="Cities covered")
+    tiles_total: int = Field(..., description="Matrix tiles planned")
+    tiles_done: int = Field(..., description="Matrix tiles fully cached")
+    elements_spent: int = Field(..., description="Billable elements spent in the last run")
+    total_elements_spent: int = Field(..., description="Billable elements spent across all runs")
+    budget_elements: int = Field(..., description="Element budget of the last run")
+    updated_at: Optional[str] = Field(None, description="Last progress update (ISO 8601)")
+
+
+class CacheNamespaceStats(BaseModel):
+    """Key counts and memory of one cache namespace."""
+    generation: Optional[int] = Field(None, description="Current generation (None for keys outside cache namespaces)")
+    keys: int = Field(..., description="Keys in the namespace")
+    current_generation_keys: int = Field(..., description="Keys of the current generation")
+    old_generation_keys: int = Field(..., description="Keys of earlier generations, awaiting TTL or cleanup")
+    memory_bytes: int = Field(..., description="Estimated memory (MEMORY USAGE sample × keys)")
+
+
+class CacheNamespaceReport(BaseModel):
+    """Per-namespace cache usage."""
+    enabled: bool = Field(..., description="Whether Redis is available")
+    total_keys: Optional[int] = Field(None, description="Keys in the Redis database (DBSIZE)")
+    scanned_keys: Optional[int] = Field(None, description="Keys visited by the scan")
+    estimated: bool = Field(False, description="Counts extrapolated from a partial scan")
+    namespaces: Dict[str, CacheNamespaceStats] = Field(
+        default_factory=dict, description="Stats for distance, duration, solution and other keys"
+    )
+
+
+class CacheInvalidateResponse(BaseModel):
+    """Result of invalidating a cache namespace."""
+    namespace: str = Field(..., description="Invalidated namespace")
+    generation: int = Field(..., description="New generation")
+
+
+class CacheCleanupRequest(BaseModel):
+    """Request model for removing old-generation keys."""
+    namespace: Optional[Literal["distance", "duration", "solution"]] = Field(None, description="Namespace (all if omitted)")
+    max_keys: Optional[int] = Field(None, description="Max keys to visit per namespace", gt=0)
+
+
+class CacheCleanupResponse(BaseModel):
+    """Status of an old-generation cleanup."""
+    status: str = Field(..., description="scheduled, busy or unavailable")
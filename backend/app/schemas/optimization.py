@@ -2,8 +2,9 @@
 Schemas for optimization API endpoints.
 Request and response models for TSP and CVRP optimization.
 """
+from datetime import datetime
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from uuid import UUID
 
 
@@ -27,6 +28,12 @@ class TSPRequest(BaseModel):
     depot_location: Optional[Location] = Field(None, description="Depot location (optional, defaults to config)")
     timeout_seconds: Optional[int] = Field(None, description="Solver timeout in seconds", ge=1, le=300)
     use_traffic: bool = Field(False, description="Enable traffic-aware optimization (Routes API Pro mode, higher cost)")
+    initial_sequence: Optional[List[UUID]] = Field(
+        None, description="Previous visiting order to start from (removed recipients are skipped, new ones inserted)"
+    )
+    previous_result_id: Optional[str] = Field(
+        None, description="result_id of an earlier response to start from (ignored if initial_sequence is set)"
+    )
     
     @validator('recipient_ids')
     def validate_recipient_ids(cls, v):
@@ -71,6 +78,11 @@ class TSPResponse(BaseModel):
     total_distance_meters: int = Field(..., description="Total distance in meters")
     total_duration_seconds: int = Field(..., description="Total duration in seconds")
     num_stops: int = Field(..., description="Number of stops")
+    matrix_stale_cells: Optional[int] = Field(None, description="Traffic durations served stale while refreshing")
+    matrix_fallback_cells: Optional[int] = Field(None, description="Matrix cells estimated after a Routes API failure (incl. negative cache hits)")
+    result_id: Optional[str] = Field(None, description="Pass as previous_result_id to warm-start a re-optimization")
+    warm_start: Optional[bool] = Field(None, description="Search started from previous routes")
+    solution_cached: Optional[bool] = Field(None, description="Served from the solution cache (identical earlier request)")
     
     class Config:
         json_schema_extra = {
@@ -95,6 +107,18 @@ class CVRPRequest(BaseModel):
     depot_location: Optional[Location] = Field(None, description="Depot location (optional, defaults to config)")
     timeout_seconds: Optional[int] = Field(None, description="Solver timeout in seconds", ge=1, le=300)
     use_traffic: bool = Field(False, description="Enable traffic-aware optimization (Routes API Pro mode, higher cost)")
+    sparse_neighbors: Optional[int] = Field(
+        None,
+        description="Sparse matrix mode: fetch road distances only for depot arcs and each recipient's k nearest neighbors",
+        ge=1,
+        le=50
+    )
+    initial_routes: Optional[List[List[UUID]]] = Field(
+        None, description="Previous routes (one sequence per courier) to start from"
+    )
+    previous_result_id: Optional[str] = Field(
+        None, description="result_id of an earlier response to start from (ignored if initial_routes is set)"
+    )
     
     @validator('recipient_ids')
     def validate_recipient_ids(cls, v):
@@ -179,6 +203,16 @@ class CVRPResponse(BaseModel):
     max_load: int = Field(..., description="Maximum load in any route")
     min_load: int = Field(..., description="Minimum load in any route")
     
+    # Matrix composition
+    matrix_real_elements: Optional[int] = Field(None, description="Matrix elements with real road values")
+    matrix_estimated_elements: Optional[int] = Field(None, description="Matrix elements estimated from haversine (sparse mode)")
+    matrix_billed_elements: Optional[int] = Field(None, description="Routes API elements billed for this matrix (0 when fully cached)")
+    matrix_stale_cells: Optional[int] = Field(None, description="Traffic durations served stale while refreshing")
+    matrix_fallback_cells: Optional[int] = Field(None, description="Matrix cells estimated after a Routes API failure (incl. negative cache hits)")
+    result_id: Optional[str] = Field(None, description="Pass as previous_result_id to warm-start a re-optimization")
+    warm_start: Optional[bool] = Field(None, description="Search started from previous routes")
+    solution_cached: Optional[bool] = Field(None, description="Served from the solution cache (identical earlier request)")
+    
     class Config:
         json_schema_extra = {
             "example": {
@@ -215,6 +249,71 @@ class CVRPResponse(BaseModel):
         }
 
 
+class OptimizationJobRequest(BaseModel):
+    """Request model for an asynchronous optimization job."""
+    problem: Literal["tsp", "cvrp"] = Field(..., description="Problem to solve")
+    tsp: Optional[TSPRequest] = Field(None, description="TSP parameters (problem=tsp)")
+    cvrp: Optional[CVRPRequest] = Field(None, description="CVRP parameters (problem=cvrp)")
+    
+    @validator('cvrp', always=True)
+    def validate_parameters(cls, v, values):
+        """Validate that the parameters of the selected problem are given.
+        
+        Args:
+            v: CVRP parameters
+            values: Previously validated fields
+            
+        Returns:
+            The CVRP parameters
+            
+        Raises:
+            ValueError: If the parameters of the selected problem are missing
+        """
+        problem = values.get('problem')
+        if problem == 'cvrp' and v is None:
+            raise ValueError('cvrp parameters are required for problem=cvrp')
+        if problem == 'tsp' and values.get('tsp') is None:
+            raise ValueError('tsp parameters are required for problem=tsp')
+        return v
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "problem": "cvrp",
+                "cvrp": {
+                    "recipient_ids": [
+                        "123e4567-e89b-12d3-a456-426614174000",
+                        "123e4567-e89b-12d3-a456-426614174001"
+                    ],
+                    "num_couriers": 2,
+                    "capacity_per_courier": 20,
+                    "timeout_seconds": 120
+                }
+            }
+        }
+
+
+class OptimizationJobProgress(BaseModel):
+    """Best solution found so far by a running job."""
+    objective: int = Field(..., description="Solver objective (combined distance/duration cost, lower is better)")
+    solutions: int = Field(..., description="Solutions found so far")
+    elapsed_seconds: float = Field(..., description="Search time so far")
+    routes: List[List[str]] = Field(..., description="Recipient sequence per courier (one for TSP)")
+
+
+class OptimizationJobResponse(BaseModel):
+    """Response model for an optimization job."""
+    job_id: str = Field(..., description="Job id")
+    problem: Literal["tsp", "cvrp"] = Field(..., description="Problem solved")
+    status: Literal["queued", "running", "completed", "failed", "cancelled"] = Field(..., description="Job status")
+    created_at: datetime = Field(..., description="Submission time (UTC)")
+    started_at: Optional[datetime] = Field(None, description="Solve start time (UTC)")
+    finished_at: Optional[datetime] = Field(None, description="Completion time (UTC)")
+    progress: Optional[OptimizationJobProgress] = Field(None, description="Best solution so far")
+    result: Optional[Union[CVRPResponse, TSPResponse]] = Field(None, description="Result once completed")
+    error: Optional[str] = Field(None, description="Error message if failed")
+
+
 class ErrorResponse(BaseModel):
     """Error response model."""
     detail: str = Field(..., description="Error message")
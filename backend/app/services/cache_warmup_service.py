@@ -0,0 +1,338 @@
+"""
+Cache warm-up for unassigned recipients.
+Fills Layer 1 with depot and intra-city distances ahead of a distribution
+day, tile by tile, within an element budget and the off-peak window.
+Progress is kept in Redis so an interrupted warm-up resumes where it stopped.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.recipient import RecipientStatus
+from app.repositories.recipient_repository import RecipientRepository
+from app.services.matrix_planner import plan_tiles
+from app.services.precompute_service import is_off_peak
+from app.services.routes_api_service import RoutesAPIService
+
+logger = logging.getLogger(__name__)
+
+# (tile id, origins, destinations)
+WarmupTile = Tuple[str, List[Tuple[float, float]], List[Tuple[float, float]]]
+
+# Only one warm-up runs per process at a time
+_run_lock = threading.Lock()
+
+
+def is_warmup_running() -> bool:
+    """Whether a warm-up is currently running in this process."""
+    return _run_lock.locked()
+
+
+class CacheWarmupService:
+    """
+    Plans and runs Layer 1 warm-up for unassigned recipients.
+    
+    Each city becomes one square matrix over the depot and its recipients,
+    cut into tiles within the Essentials element limit. Tiles already fully
+    cached cost nothing; others are fetched only while the next tile still
+    fits the remaining budget.
+    """
+    
+    # Keep progress for a week so a warm-up can resume across days
+    PROGRESS_TTL = 7 * 24 * 60 * 60
+    
+    def __init__(
+        self,
+        routes_api_service: Optional[RoutesAPIService] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        clock: Callable[[], datetime] = datetime.now
+    ):
+        """
+        Initialize cache warm-up service.
+        
+        Args:
+            routes_api_service: Routes API service (creates new if None)
+            session_factory: Factory for database sessions
+            clock: Returns the current local time (injectable for tests)
+        """
+        self.routes_api_service = routes_api_service or RoutesAPIService()
+        self.cache_service = self.routes_api_service.cache_service
+        self.session_factory = session_factory
+        self.clock = clock
+        # Used when Redis is unavailable (progress then lasts for this process only)
+        self._memory_progress: Dict[str, Dict] = {}
+        self._memory_done: Dict[str, set] = {}
+    
+    @staticmethod
+    def job_key(
+        province_ids: Optional[List[int]] = None,
+        city_ids: Optional[List[int]] = None
+    ) -> str:
+        """
+        Identify a warm-up by its region filter.
+        
+        Args:
+            province_ids: Province filter
+            city_ids: City filter
+        
+        Returns:
+            Stable job key (e.g. "p1,2:c-" or "all")
+        """
+        if not province_ids and not city_ids:
+            return "all"
+        provinces = ",".join(str(i) for i in sorted(province_ids or [])) or "-"
+        cities = ",".join(str(i) for i in sorted(city_ids or [])) or "-"
+        return f"p{provinces}:c{cities}"
+    
+    def plan(
+        self,
+        province_ids: Optional[List[int]] = None,
+        city_ids: Optional[List[int]] = None
+    ) -> Tuple[int, int, List[WarmupTile]]:
+        """
+        Plan the tiles covering depot and intra-city pairs.
+        
+        Args:
+            province_ids: Province filter
+            city_ids: City filter
+        
+        Returns:
+            (number of recipients, number of cities, tiles)
+        """
+        depot = (settings.DEPOT_LAT, settings.DEPOT_LNG)
+        cities: "OrderedDict[Optional[int], Dict[Tuple[float, float], None]]" = OrderedDict()
+        
+        db = self.session_factory()
+        try:
+            recipients = RecipientRepository(db).get_by_status(
+                RecipientStatus.UNASSIGNED, province_ids, city_ids
+            )
+            for recipient in recipients:
+                location = RecipientRepository.extract_location(recipient)
+                if location:
+                    cities.setdefault(recipient.city_id, {})[(location["lat"], location["lng"])] = None
+        finally:
+            db.close()
+        
+        tiles: List[WarmupTile] = []
+        for city_id, city_points in cities.items():
+            # Depot first: its row and column hold the depot pairs
+            points = [depot] + [point for point in city_points if point != depot]
+            n = len(points)
+            for rows, cols in plan_tiles(n, n, RoutesAPIService.ESSENTIALS_MAX_ELEMENTS):
+                tile_id = f"{city_id}:{n}:{rows.start}-{rows.stop}:{cols.start}-{cols.stop}"
+                tiles.append((tile_id, points[rows], points[cols]))
+        
+        return len(recipients), len(cities), tiles
+    
+    def _uncached_cells(self, origins: List[Tuple[float, float]], destinations: List[Tuple[float, float]]) -> int:
+        """Count off-diagonal cells of a tile missing from Layer 1 (or cached without a static duration)."""
+        pairs = [(o, d) for o in origins for d in destinations if o != d]
+        return sum(
+            1 for route in self.cache_service.get_base_routes_bulk(pairs)
+            if route is None or route[1] is None
+        )
+    
+    def _progress_key(self, job: str) -> str:
+        return f"warmup:progress:{job}"
+    
+    def _done_key(self, job: str) -> str:
+        return f"warmup:done:{job}"
+    
+    def get_progress(
+        self,
+        province_ids: Optional[List[int]] = None,
+        city_ids: Optional[List[int]] = None
+    ) -> Dict:
+        """
+        Get the stored progress of a warm-up.
+        
+        Args:
+            province_ids: Province filter
+            city_ids: City filter
+        
+        Returns:
+            Progress dict (status "not_started" if none recorded)
+        """
+        job = self.job_key(province_ids, city_ids)
+        
+        if self.cache_service.enabled:
+            try:
+                raw = self.cache_service.redis_client.get(self._progress_key(job))
+                if raw:
+                    return json.loads(raw)
+            except Exception as e:
+                logger.warning(f"Could not read warm-up progress: {e}")
+        
+        return self._memory_progress.get(job) or {
+            "job": job,
+            "status": "not_started",
+            "recipients": 0,
+            "cities": 0,
+            "tiles_total": 0,
+            "tiles_done": 0,
+            "elements_spent": 0,
+            "total_elements_spent": 0,
+            "budget_elements": 0,
+            "updated_at": None
+        }
+    
+    def _load_done(self, job: str) -> set:
+        if self.cache_service.enabled:
+            try:
+                return set(self.cache_service.redis_client.smembers(self._done_key(job)))
+            except Exception as e:
+                logger.warning(f"Could not read warm-up checkpoints: {e}")
+        return set(self._memory_done.get(job, set()))
+    
+    def _save(self, progress: Dict, done_tile: Optional[str] = None):
+        """Persist progress (and a completed tile) for resuming."""
+        job = progress["job"]
+        progress["updated_at"] = self.clock().isoformat()
+        self._memory_progress[job] = dict(progress)
+        if done_tile:
+            self._memory_done.setdefault(job, set()).add(done_tile)
+        
+        if not self.cache_service.enabled:
+            return
+        
+        try:
+            pipe = self.cache_service.redis_client.pipeline(transaction=False)
+            pipe.setex(self._progress_key(job), self.PROGRESS_TTL, json.dumps(progress))
+            if done_tile:
+                pipe.sadd(self._done_key(job), done_tile)
+                pipe.expire(self._done_key(job), self.PROGRESS_TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not save warm-up progress: {e}")
+    
+    def reset(
+        self,
+        province_ids: Optional[List[int]] = None,
+        city_ids: Optional[List[int]] = None
+    ):
+        """Forget progress so the next run re-checks every tile."""
+        job = self.job_key(province_ids, city_ids)
+        self._memory_progress.pop(job, None)
+        self._memory_done.pop(job, None)
+        
+        if self.cache_service.enabled:
+            try:
+                self.cache_service.redis_client.delete(self._progress_key(job), self._done_key(job))
+            except Exception as e:
+                logger.warning(f"Could not reset warm-up progress: {e}")
+    
+    def run(
+        self,
+        province_ids: Optional[List[int]] = None,
+        city_ids: Optional[List[int]] = None,
+        budget_elements: Optional[int] = None,
+        ignore_offpeak: bool = False
+    ) -> Dict:
+        """
+        Warm Layer 1 for unassigned recipients, resuming earlier progress.
+        
+        Stops with status "budget_exhausted" before a tile that could exceed
+        the budget, and "outside_offpeak" when the off-peak window closes.
+        Tiles that fell back to estimates leave the run "incomplete".
+        
+        Args:
+            province_ids: Province filter
+            city_ids: City filter
+            budget_elements: Max billable elements this run
+                             (defaults to settings.CACHE_WARMUP_BUDGET_ELEMENTS)
+            ignore_offpeak: Run even outside the off-peak window
+        
+        Returns:
+            Final progress dict
+        """
+        if not _run_lock.acquire(blocking=False):
+            progress = self.get_progress(province_ids, city_ids)
+            progress["status"] = "busy"
+            return progress
+        
+        try:
+            return self._run(province_ids, city_ids, budget_elements, ignore_offpeak)
+        finally:
+            _run_lock.release()
+    
+    def _run(
+        self,
+        province_ids: Optional[List[int]],
+        city_ids: Optional[List[int]],
+        budget_elements: Optional[int],
+        ignore_offpeak: bool
+    ) -> Dict:
+        budget = settings.CACHE_WARMUP_BUDGET_ELEMENTS if budget_elements is None else budget_elements
+        job = self.job_key(province_ids, city_ids)
+        previous = self.get_progress(province_ids, city_ids)
+        done = self._load_done(job)
+        
+        n_recipients, n_cities, tiles = self.plan(province_ids, city_ids)
+        progress = {
+            "job": job,
+            "status": "running",
+            "recipients": n_recipients,
+            "cities": n_cities,
+            "tiles_total": len(tiles),
+            "tiles_done": sum(1 for tile_id, _, _ in tiles if tile_id in done),
+            "elements_spent": 0,
+            "total_elements_spent": previous.get("total_elements_spent", 0),
+            "budget_elements": budget,
+            "updated_at": None
+        }
+        self._save(progress)
+        
+        routes = self.routes_api_service
+        for tile_id, origins, destinations in tiles:
+            if tile_id in done:
+                continue
+            
+            now = self.clock()
+            if not ignore_offpeak and not is_off_peak(
+                now, settings.PRECOMPUTE_OFFPEAK_START_HOUR, settings.PRECOMPUTE_OFFPEAK_END_HOUR
+            ):
+                progress["status"] = "outside_offpeak"
+                break
+            
+            if self._uncached_cells(origins, destinations):
+                # Worst case: every element of the tile is billed
+                if progress["elements_spent"] + len(origins) * len(destinations) > budget:
+                    progress["status"] = "budget_exhausted"
+                    break
+                
+                before = routes.elements_requested
+                try:
+                    result = routes.compute_route_matrix(origins, destinations, use_traffic=False)
+                except Exception as e:
+                    logger.error(f"Warm-up tile {tile_id} failed: {e}", exc_info=True)
+                    progress["status"] = "failed"
+                    break
+                spent = routes.elements_requested - before
+                progress["elements_spent"] += spent
+                progress["total_elements_spent"] += spent
+                
+                if result["status"] != "OK":
+                    # Some cells fell back to estimates; retry this tile next run
+                    logger.warning(f"Warm-up tile {tile_id} incomplete ({result['status']})")
+                    self._save(progress)
+                    continue
+            
+            progress["tiles_done"] += 1
+            self._save(progress, done_tile=tile_id)
+        else:
+            progress["status"] = "completed" if progress["tiles_done"] == len(tiles) else "incomplete"
+        
+        self._save(progress)
+        logger.info(
+            f"Cache warm-up {job}: {progress['status']}, {progress['tiles_done']}/{progress['tiles_total']} "
+            f"tiles, {progress['elements_spent']} elements"
+        )
+        return progress
@@ -0,0 +1,234 @@
+"""
+Request planning for Routes API matrix computations.
+Groups missing matrix cells into origin/destination sub-rectangles
+that fit the element limit of each Routes API mode.
+"""
+from math import ceil
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# (origin indices, destination indices) of one Routes API request
+MatrixRequest = Tuple[List[int], List[int]]
+
+# (row slice, column slice) of one tile in a full matrix
+MatrixTile = Tuple[slice, slice]
+
+# Planning cost of one extra request, expressed in elements. Elements are
+# billed individually; each request adds a round trip and a quota hit.
+REQUEST_OVERHEAD_ELEMENTS = 50
+
+# Fixed cost of one tile request, expressed in waypoints (headers, TLS
+# record, quota hit). Used to trade tile count against payload size.
+REQUEST_OVERHEAD_WAYPOINTS = 25
+
+
+def choose_tile_shape(
+    n_rows: int,
+    n_cols: int,
+    max_elements: int
+) -> Tuple[int, int]:
+    """
+    Choose how many tiles to cut along each axis of a matrix.
+    
+    Minimizes the total payload sent, counting every tile as its waypoints
+    (rows + cols) plus REQUEST_OVERHEAD_WAYPOINTS. This keeps both the tile
+    count and the per-request payload low, favouring near-square tiles:
+    a 201 × 201 Essentials matrix becomes 7 × 10 tiles of at most 29 × 21
+    instead of 67 slices of 201 × 3.
+    
+    Args:
+        n_rows: Number of origins
+        n_cols: Number of destinations
+        max_elements: Maximum elements per tile
+    
+    Returns:
+        (tiles along rows, tiles along columns)
+    """
+    best = None
+    for row_tiles in range(1, n_rows + 1):
+        rows_per_tile = ceil(n_rows / row_tiles)
+        cols_per_tile = min(n_cols, max_elements // rows_per_tile)
+        if cols_per_tile == 0:
+            continue
+        
+        col_tiles = ceil(n_cols / cols_per_tile)
+        payload = rows_per_tile + ceil(n_cols / col_tiles)
+        n_tiles = row_tiles * col_tiles
+        key = (n_tiles * (payload + REQUEST_OVERHEAD_WAYPOINTS), n_tiles)
+        
+        if best is None or key < best[0]:
+            best = (key, (row_tiles, col_tiles))
+        
+        if rows_per_tile == 1:
+            break
+    
+    return best[1]
+
+
+def _balanced_slices(n: int, parts: int) -> List[slice]:
+    """Split range(n) into `parts` contiguous slices whose sizes differ by at most 1."""
+    base, extra = divmod(n, parts)
+    slices = []
+    start = 0
+    for part in range(parts):
+        end = start + base + (1 if part < extra else 0)
+        slices.append(slice(start, end))
+        start = end
+    return slices
+
+
+def plan_tiles(
+    n_rows: int,
+    n_cols: int,
+    max_elements: int
+) -> List[MatrixTile]:
+    """
+    Tile an n_rows × n_cols matrix along both axes within the element limit.
+    
+    Args:
+        n_rows: Number of origins
+        n_cols: Number of destinations
+        max_elements: Maximum elements per tile
+    
+    Returns:
+        List of (row slice, column slice) tiles covering the matrix
+    """
+    if max_elements < 1:
+        raise ValueError("max_elements must be at least 1")
+    
+    row_tiles, col_tiles = choose_tile_shape(n_rows, n_cols, max_elements)
+    return [
+        (row_slice, col_slice)
+        for row_slice in _balanced_slices(n_rows, row_tiles)
+        for col_slice in _balanced_slices(n_cols, col_tiles)
+    ]
+
+
+def split_request(
+    rows: List[int],
+    cols: List[int],
+    max_elements: int
+) -> List[MatrixRequest]:
+    """
+    Split a rows × cols rectangle into requests within the element limit.
+    
+    Args:
+        rows: Origin indices
+        cols: Destination indices
+        max_elements: Maximum elements (origins × destinations) per request
+    
+    Returns:
+        List of (rows, cols) requests covering the rectangle
+    """
+    return [
+        (rows[row_slice], cols[col_slice])
+        for row_slice, col_slice in plan_tiles(len(rows), len(cols), max_elements)
+    ]
+
+
+def count_elements(requests: List[MatrixRequest]) -> int:
+    """Total number of billed elements across requests."""
+    return sum(len(rows) * len(cols) for rows, cols in requests)
+
+
+def plan_cost(requests: List[MatrixRequest]) -> int:
+    """Planning cost of a request plan (elements plus per-request overhead)."""
+    return count_elements(requests) + len(requests) * REQUEST_OVERHEAD_ELEMENTS
+
+
+def _bisect_plan(
+    rows: List[int],
+    cols: List[int],
+    missing: set,
+    max_elements: int
+) -> List[MatrixRequest]:
+    """
+    Plan a rectangle by recursive halving of its longer axis.
+    
+    Each level keeps whichever is cheaper: one dense request over the
+    rows and columns that still have misses, or the two halves planned
+    recursively. Handles staircase shapes such as a triangle.
+    """
+    rows = [i for i in rows if any((i, j) in missing for j in cols)]
+    cols = [j for j in cols if any((i, j) in missing for i in rows)]
+    if not rows:
+        return []
+    
+    dense = split_request(rows, cols, max_elements)
+    n_missing = sum(1 for i in rows for j in cols if (i, j) in missing)
+    if n_missing == len(rows) * len(cols):
+        return dense
+    
+    if len(rows) >= len(cols):
+        half = len(rows) // 2
+        split = (
+            _bisect_plan(rows[:half], cols, missing, max_elements)
+            + _bisect_plan(rows[half:], cols, missing, max_elements)
+        )
+    else:
+        half = len(cols) // 2
+        split = (
+            _bisect_plan(rows, cols[:half], missing, max_elements)
+            + _bisect_plan(rows, cols[half:], missing, max_elements)
+        )
+    
+    return min((dense, split), key=plan_cost)
+
+
+def plan_missing_requests(
+    missing_cells: Iterable[Tuple[int, int]],
+    max_elements: int,
+    exact: bool = False
+) -> List[MatrixRequest]:
+    """
+    Plan the Routes API requests needed to fill missing matrix cells.
+    
+    Three candidate plans are built and the cheapest one is returned:
+    - Exact plan: rows with identical sets of missing columns are grouped
+      into one rectangle, so no already-known cell is requested again.
+    - Dense plan: one rectangle over every row and column that has a miss.
+    - Bisected plan: the dense rectangle halved recursively where that is
+      cheaper, e.g. the upper triangle of a symmetric matrix.
+    
+    The plan with the lower ``plan_cost`` wins, trading billed elements
+    against request count. Adding a few recipients to a cached matrix
+    yields two rectangles: new rows × all columns and old rows × new columns.
+    With ``exact`` only the exact plan is used, for sparse cell sets where
+    covering rectangles would bill mostly unwanted cells.
+    
+    Args:
+        missing_cells: (origin_index, destination_index) pairs to fetch
+        max_elements: Maximum elements per request for the current mode
+        exact: Never request cells outside missing_cells
+    
+    Returns:
+        List of (origin indices, destination indices) requests
+    """
+    missing_by_row: Dict[int, set] = {}
+    for i, j in missing_cells:
+        missing_by_row.setdefault(i, set()).add(j)
+    
+    if not missing_by_row:
+        return []
+    
+    # Exact plan: group rows by their missing-column signature
+    rows_by_signature: Dict[FrozenSet[int], List[int]] = {}
+    for i in sorted(missing_by_row):
+        rows_by_signature.setdefault(frozenset(missing_by_row[i]), []).append(i)
+    
+    exact_plan: List[MatrixRequest] = []
+    for signature, rows in rows_by_signature.items():
+        exact_plan.extend(split_request(rows, sorted(signature), max_elements))
+    
+    if exact:
+        return exact_plan
+    
+    # Dense plan: bounding rectangle of all misses
+    all_rows = sorted(missing_by_row)
+    all_cols = sorted(set().union(*missing_by_row.values()))
+    dense_plan = split_request(all_rows, all_cols, max_elements)
+    
+    # Bisected plan: recursive halving of the bounding rectangle
+    missing = {(i, j) for i, cols in missing_by_row.items() for j in cols}
+    bisected_plan = _bisect_plan(all_rows, all_cols, missing, max_elements)
+    
+    return min((exact_plan, dense_plan, bisected_plan), key=plan_cost)
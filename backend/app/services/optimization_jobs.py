@@ -0,0 +1,298 @@
+"""
+Asynchronous optimization jobs.
+A job runs one TSP/CVRP solve in the solver pool while the HTTP request
+returns immediately. Improving solutions found by the search are pushed
+to subscribers (Server-Sent Events); finished jobs are kept for
+OPTIMIZATION_JOB_TTL_SECONDS so their result can still be fetched.
+
+Jobs live in the memory of the API process that accepted them, so with
+several uvicorn workers the job endpoints need sticky sessions.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional
+from uuid import uuid4
+
+from app.config import settings
+from app.services.optimization_service import OptimizationCancelledError
+from app.services.solver_pool import SolverPool, run_solver, solver_pool
+
+logger = logging.getLogger(__name__)
+
+
+class OptimizationJob:
+    """State of one optimization job."""
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    FINISHED = (COMPLETED, FAILED, CANCELLED)
+    
+    def __init__(self, problem: str, owner: str):
+        """
+        Initialize job.
+        
+        Args:
+            problem: "tsp" or "cvrp"
+            owner: Username of the user who submitted the job
+        """
+        self.id = uuid4().hex
+        self.problem = problem
+        self.owner = owner
+        self.status = self.QUEUED
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.progress: Optional[Dict] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.version = 0
+        self._changed = asyncio.Event()
+        self._finished_monotonic: Optional[float] = None
+        self._future = None
+        self._task = None
+        self._cancel_event = None
+    
+    @property
+    def finished(self) -> bool:
+        """Whether the job has reached a final state."""
+        return self.status in self.FINISHED
+    
+    def changed(self) -> asyncio.Event:
+        """Event set on the next state change (take it before reading the state)."""
+        return self._changed
+    
+    def _touch(self):
+        self.version += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    def _start(self):
+        if self.status == self.QUEUED:
+            self.status = self.RUNNING
+            self.started_at = datetime.utcnow()
+            self._touch()
+    
+    def _report(self, progress: Dict):
+        if not self.finished:
+            self._start()
+            self.progress = progress
+            self._touch()
+    
+    def _finish(self, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        if self.finished:
+            return
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = datetime.utcnow()
+        self._finished_monotonic = time.monotonic()
+        self._touch()
+    
+    def snapshot(self, include_result: bool = True) -> Dict:
+        """
+        Describe the job.
+        
+        Args:
+            include_result: Include the (possibly large) result
+        
+        Returns:
+            Dict matching OptimizationJobResponse
+        """
+        return {
+            "job_id": self.id,
+            "problem": self.problem,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress,
+            "result": self.result if include_result else None,
+            "error": self.error
+        }
+
+
+class OptimizationJobManager:
+    """In-process registry of optimization jobs running in the solver pool."""
+    
+    def __init__(self, pool: Optional[SolverPool] = None):
+        """
+        Initialize job manager.
+        
+        Args:
+            pool: Solver pool (uses the process-wide one if None)
+        """
+        self.pool = pool or solver_pool
+        self._jobs: Dict[str, OptimizationJob] = {}
+    
+    def _purge(self):
+        """Drop finished jobs older than OPTIMIZATION_JOB_TTL_SECONDS."""
+        expired_before = time.monotonic() - settings.OPTIMIZATION_JOB_TTL_SECONDS
+        for job_id in [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job._finished_monotonic < expired_before
+        ]:
+            del self._jobs[job_id]
+    
+    def submit(self, problem: str, owner: str, **kwargs) -> OptimizationJob:
+        """
+        Start a TSP or CVRP job (must be called from the event loop).
+        
+        Args:
+            problem: "tsp" or "cvrp"
+            owner: Username of the submitting user
+            **kwargs: Arguments of OptimizationService.solve_tsp / solve_cvrp
+        
+        Returns:
+            The queued job
+        
+        Raises:
+            SolverBusyError: If the solver pool and its queue are full
+        """
+        self._purge()
+        job = OptimizationJob(problem, owner)
+        channel, cancel_event = self.pool.create_channel()
+        job._cancel_event = cancel_event
+        job._future = self.pool.submit(run_solver, f"solve_{problem}", kwargs, channel, cancel_event)
+        self._jobs[job.id] = job
+        
+        job._task = asyncio.ensure_future(self._run(job, channel))
+        logger.info(f"Optimization job {job.id} ({problem}) submitted by {owner}")
+        return job
+    
+    async def _run(self, job: OptimizationJob, channel):
+        """Relay progress messages and record the outcome of a job."""
+        self._start_reader(job, channel, asyncio.get_running_loop())
+        try:
+            result = await asyncio.wrap_future(job._future)
+            job._finish(OptimizationJob.COMPLETED, result=result)
+        except (asyncio.CancelledError, OptimizationCancelledError):
+            job._finish(OptimizationJob.CANCELLED)
+        except ValueError as e:
+            job._finish(OptimizationJob.FAILED, error=str(e))
+        except Exception as e:
+            logger.error(f"Optimization job {job.id} failed: {e}", exc_info=True)
+            job._finish(OptimizationJob.FAILED, error=f"Optimization failed: {str(e)}")
+        finally:
+            # Wake the reader up so it exits
+            try:
+                channel.put(None)
+            except Exception as e:
+                logger.debug(f"Could not stop progress reader of job {job.id}: {e}")
+        logger.info(f"Optimization job {job.id} {job.status}")
+    
+    def _start_reader(self, job: OptimizationJob, channel, loop: asyncio.AbstractEventLoop):
+        """
+        Forward the worker's messages to the job from a dedicated thread.
+        
+        The thread blocks on the channel (no polling, and no thread taken
+        from the event loop's default executor) and hands each message to
+        the loop. It ends on the None put by _run.
+        
+        Args:
+            job: Job receiving the messages
+            channel: Queue the worker writes to
+            loop: Event loop owning the job
+        """
+        def read():
+            while True:
+                try:
+                    message = channel.get()
+                except Exception as e:
+                    # Manager shut down with the pool
+                    logger.debug(f"Progress reader of job {job.id} stopped: {e}")
+                    return
+                if message is None:
+                    return
+                try:
+                    loop.call_soon_threadsafe(self._deliver, job, message)
+                except RuntimeError:
+                    return  # Event loop closed
+        
+        threading.Thread(target=read, name=f"job-progress-{job.id[:8]}", daemon=True).start()
+    
+    @staticmethod
+    def _deliver(job: OptimizationJob, message: Dict):
+        """Apply one worker message to the job state (on the event loop)."""
+        if message.pop("type") == "started":
+            job._start()
+        else:
+            job._report(message)
+    
+    def get(self, job_id: str, owner: str) -> Optional[OptimizationJob]:
+        """
+        Look up a job of a user.
+        
+        Args:
+            job_id: Job id
+            owner: Username of the requesting user
+        
+        Returns:
+            Job, or None if unknown, expired or owned by someone else
+        """
+        self._purge()
+        job = self._jobs.get(job_id)
+        if job is None or job.owner != owner:
+            return None
+        return job
+    
+    def cancel(self, job: OptimizationJob):
+        """
+        Cancel a job.
+        
+        A queued solve is dropped; a running search stops at its next
+        solution and its result is discarded.
+        
+        Args:
+            job: Job to cancel
+        """
+        if job.finished:
+            return
+        job._cancel_event.set()
+        job._future.cancel()
+        job._finish(OptimizationJob.CANCELLED)
+        logger.info(f"Optimization job {job.id} cancelled")
+    
+    def cancel_all(self):
+        """Cancel every unfinished job (on shutdown)."""
+        for job in list(self._jobs.values()):
+            self.cancel(job)
+    
+    async def events(self, job: OptimizationJob) -> AsyncIterator[str]:
+        """
+        Stream job updates as Server-Sent Events.
+        
+        Sends a "progress" event per state change while the job runs and
+        one final "completed", "failed" or "cancelled" event with the
+        full job, then ends. Comments keep idle connections alive.
+        
+        Args:
+            job: Job to follow
+        
+        Yields:
+            SSE frames
+        """
+        sent_version = -1
+        while True:
+            changed = job.changed()
+            if job.version != sent_version:
+                sent_version = job.version
+                event = job.status if job.finished else "progress"
+                data = json.dumps(job.snapshot(include_result=job.finished), default=str)
+                yield f"event: {event}\ndata: {data}\n\n"
+                if job.finished:
+                    return
+            try:
+                await asyncio.wait_for(changed.wait(), settings.OPTIMIZATION_JOB_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+
+# Process-wide job registry used by the optimization endpoints
+optimization_jobs = OptimizationJobManager()
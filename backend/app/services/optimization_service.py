@@ -4,8 +4,13 @@ Implements TSP (Traveling Salesman Problem) and CVRP (Capacitated Vehicle Routin
 """
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
-from typing import List, Dict, Tuple, Optional
+from typing import Any, Callable, List, Dict, Tuple, Optional
+import hashlib
+import json
 import logging
+import math
+import time
+import numpy as np
 from uuid import UUID
 
 from app.config import settings
@@ -13,11 +18,144 @@ from app.services.routes_api_service import RoutesAPIService
 from app.database import SessionLocal
 from app.models.recipient import Recipient
 from app.utils.profiler import PerformanceProfiler
+from app.utils.metrics import SOLVER_OBJECTIVE, SOLVER_SECONDS
 from geoalchemy2.shape import to_shape
 
 logger = logging.getLogger(__name__)
 
 
+class OptimizationCancelledError(Exception):
+    """Raised when an optimization is cancelled before it finishes."""
+
+
+# Bump when the solver or result format changes so older cached solutions are not reused
+SOLUTION_CACHE_VERSION = 1
+
+
+def solution_fingerprint(
+    problem: str,
+    recipients: List[Recipient],
+    depot_location: Tuple[float, float],
+    matrix_version: str,
+    **params: Any
+) -> str:
+    """
+    Canonical fingerprint of an optimization problem.
+    
+    Recipients are sorted by id, so the request order does not matter.
+    Their coordinates, demand and last update are included, so editing
+    any involved recipient yields a new fingerprint.
+    
+    Args:
+        problem: "tsp" or "cvrp"
+        recipients: Recipient rows of the problem
+        depot_location: (lat, lng) of depot
+        matrix_version: CacheService.matrix_version() of the matrices used
+        **params: Solver parameters (courier count, capacity, traffic mode, timeout, ...)
+    
+    Returns:
+        SHA-256 hex digest
+    """
+    rows = []
+    for recipient in recipients:
+        point = to_shape(recipient.location)
+        rows.append([
+            str(recipient.id), round(point.y, 7), round(point.x, 7),
+            recipient.num_packages or 1,
+            recipient.updated_at.isoformat() if recipient.updated_at else None
+        ])
+    
+    canonical = json.dumps({
+        "version": SOLUTION_CACHE_VERSION,
+        "problem": problem,
+        "recipients": sorted(rows),
+        "depot": [round(depot_location[0], 7), round(depot_location[1], 7)],
+        "matrix": matrix_version,
+        "params": params
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def warm_start_routes(
+    previous_routes: List[List[str]],
+    node_ids: List[str],
+    cost_table: List[List[int]],
+    num_vehicles: int,
+    demands: Optional[List[int]] = None,
+    capacity: Optional[int] = None
+) -> Optional[List[List[int]]]:
+    """
+    Turn a previous solution into initial routes for the current problem.
+    
+    Recipients no longer in the problem are dropped; routes beyond the
+    vehicle count and stops over capacity are released. Released and new
+    recipients are then inserted greedily at their cheapest feasible
+    position.
+    
+    Args:
+        previous_routes: Recipient id sequences of the previous solution
+        node_ids: Recipient id of each node (index 0 is the depot)
+        cost_table: Arc costs between nodes
+        num_vehicles: Number of vehicles in the model
+        demands: Demand per node (None for no capacity)
+        capacity: Capacity per vehicle
+    
+    Returns:
+        One node list per vehicle (depot excluded), or None if nothing of
+        the previous solution is reusable or a recipient cannot be inserted
+    """
+    node_of = {node_id: node for node, node_id in enumerate(node_ids) if node > 0}
+    assigned = set()
+    routes: List[List[int]] = []
+    
+    for previous in previous_routes[:num_vehicles]:
+        route = []
+        for recipient_id in previous:
+            node = node_of.get(str(recipient_id))
+            if node is not None and node not in assigned:
+                assigned.add(node)
+                route.append(node)
+        routes.append(route)
+    
+    if not assigned:
+        return None
+    
+    routes += [[] for _ in range(num_vehicles - len(routes))]
+    loads = [0] * num_vehicles
+    if demands is not None:
+        for vehicle, route in enumerate(routes):
+            loads[vehicle] = sum(demands[node] for node in route)
+            while loads[vehicle] > capacity:
+                node = route.pop()
+                loads[vehicle] -= demands[node]
+                assigned.discard(node)
+    
+    for node in range(1, len(node_ids)):
+        if node in assigned:
+            continue
+        
+        best = None
+        for vehicle, route in enumerate(routes):
+            if demands is not None and loads[vehicle] + demands[node] > capacity:
+                continue
+            stops = [0] + route + [0]
+            for position in range(len(route) + 1):
+                before, after = stops[position], stops[position + 1]
+                added = cost_table[before][node] + cost_table[node][after] - cost_table[before][after]
+                if best is None or added < best[0]:
+                    best = (added, vehicle, position)
+        
+        if best is None:
+            return None
+        
+        _, vehicle, position = best
+        routes[vehicle].insert(position, node)
+        if demands is not None:
+            loads[vehicle] += demands[node]
+    
+    return routes
+
+
 class OptimizationService:
     """Service for route optimization using OR-Tools."""
     
@@ -30,20 +168,20 @@ class OptimizationService:
         """
         self.routes_api_service = routes_api_service or RoutesAPIService()
     
-    def get_recipient_locations(
+    def get_recipients(
         self,
         recipient_ids: List[UUID],
         db_session=None
-    ) -> List[Tuple[float, float]]:
+    ) -> List[Recipient]:
         """
-        Get recipient locations from database.
+        Get recipients from database, in the order of recipient_ids.
         
         Args:
             recipient_ids: List of recipient UUIDs
             db_session: Database session (creates new if None)
         
         Returns:
-            List of (lat, lng) tuples
+            List of Recipient rows aligned with recipient_ids
         """
         close_session = False
         if db_session is None:
@@ -59,24 +197,261 @@ class OptimizationService:
             if len(recipients) != len(recipient_ids):
                 raise ValueError(f"Some recipients not found. Expected {len(recipient_ids)}, got {len(recipients)}")
             
-            locations = []
-            for recipient in recipients:
-                # Convert PostGIS GEOGRAPHY to shapely Point
-                point = to_shape(recipient.location)
-                locations.append((point.y, point.x))  # (lat, lng)
-            
-            return locations
+            by_id = {str(recipient.id): recipient for recipient in recipients}
+            return [by_id[str(recipient_id)] for recipient_id in recipient_ids]
             
         finally:
             if close_session:
                 db_session.close()
     
+    def get_recipient_locations(
+        self,
+        recipient_ids: List[UUID],
+        db_session=None
+    ) -> List[Tuple[float, float]]:
+        """
+        Get recipient locations from database.
+        
+        Args:
+            recipient_ids: List of recipient UUIDs
+            db_session: Database session (creates new if None)
+        
+        Returns:
+            List of (lat, lng) tuples aligned with recipient_ids
+        """
+        locations = []
+        for recipient in self.get_recipients(recipient_ids, db_session):
+            # Convert PostGIS GEOGRAPHY to shapely Point
+            point = to_shape(recipient.location)
+            locations.append((point.y, point.x))  # (lat, lng)
+        return locations
+    
+    def _cached_solution(self, fingerprint: Optional[str]) -> Optional[Dict]:
+        """
+        Look up a solved problem.
+        
+        Args:
+            fingerprint: Problem fingerprint (None when the cache is disabled)
+        
+        Returns:
+            Cached result flagged with solution_cached, or None
+        """
+        if fingerprint is None:
+            return None
+        
+        result = self.routes_api_service.cache_service.get_solution(fingerprint)
+        if result is not None:
+            logger.info(f"Solution cache hit ({fingerprint[:12]})")
+            result["solution_cached"] = True
+        return result
+    
+    def _store_solution(self, fingerprint: Optional[str], result: Dict, use_traffic: bool):
+        """
+        Cache a solved problem.
+        
+        Traffic-aware solutions live at most one dynamic traffic TTL.
+        
+        Args:
+            fingerprint: Problem fingerprint (None when the cache is disabled)
+            result: Solver result (profiling data is not cached)
+            use_traffic: Whether the matrix used traffic durations
+        """
+        if fingerprint is None:
+            return
+        
+        cache = self.routes_api_service.cache_service
+        ttl = settings.SOLUTION_CACHE_TTL_SECONDS
+        if use_traffic:
+            ttl = min(ttl, cache.dynamic_ttl())
+        cache.set_solution(
+            fingerprint, {key: value for key, value in result.items() if key != "_profiling"}, ttl
+        )
+    
+    def _fingerprint(
+        self,
+        problem: str,
+        recipients: List[Recipient],
+        depot_location: Tuple[float, float],
+        use_traffic: bool,
+        **params: Any
+    ) -> Optional[str]:
+        """Problem fingerprint for the solution cache (None when disabled)."""
+        if not settings.SOLUTION_CACHE_ENABLED:
+            return None
+        
+        matrix_version = self.routes_api_service.cache_service.matrix_version(use_traffic)
+        if not use_traffic and settings.ROUTES_API_SYMMETRIC_MATRIX:
+            matrix_version += ".sym"
+        return solution_fingerprint(
+            problem, recipients, depot_location, matrix_version, use_traffic=use_traffic, **params
+        )
+    
+    def _previous_routes(self, previous_result_id: Optional[str]) -> Optional[List[List[str]]]:
+        """
+        Recipient sequences of an earlier result.
+        
+        Args:
+            previous_result_id: result_id of an earlier TSP/CVRP response
+        
+        Returns:
+            One sequence per route, or None if unknown or expired
+        """
+        if not previous_result_id:
+            return None
+        
+        previous = self.routes_api_service.cache_service.get_solution(previous_result_id, count=False)
+        if previous is None:
+            logger.warning(f"Previous result {previous_result_id[:12]} not cached, solving from scratch")
+            return None
+        
+        if "routes" in previous:
+            return [route["recipient_sequence"] for route in previous["routes"]]
+        return [previous["optimized_sequence"]]
+    
+    @staticmethod
+    def _check_cancelled(cancel_event):
+        """Raise OptimizationCancelledError if cancel_event is set."""
+        if cancel_event is not None and cancel_event.is_set():
+            raise OptimizationCancelledError("Optimization cancelled")
+    
+    def _solution_monitor(
+        self,
+        routing: pywrapcp.RoutingModel,
+        manager: pywrapcp.RoutingIndexManager,
+        node_ids: List[str],
+        on_progress: Optional[Callable[[Dict], None]],
+        cancel_event
+    ) -> Callable[[], None]:
+        """
+        Build an at-solution callback for progress reports and cancellation.
+        
+        Improving solutions are reported at most every
+        OPTIMIZATION_PROGRESS_INTERVAL_SECONDS; the final result is
+        returned by the solve itself.
+        
+        Args:
+            routing: Routing model
+            manager: Index manager of the model
+            node_ids: Recipient id of each node (index 0 is the depot)
+            on_progress: Receives objective, solutions, elapsed_seconds and routes
+            cancel_event: Event whose is_set() stops the search
+        
+        Returns:
+            Callback for RoutingModel.AddAtSolutionCallback
+        """
+        started = time.perf_counter()
+        state = {"best": None, "solutions": 0, "reported_at": None}
+        
+        def monitor():
+            if cancel_event is not None and cancel_event.is_set():
+                routing.solver().FinishCurrentSearch()
+                return
+            
+            state["solutions"] += 1
+            objective = routing.CostVar().Value()
+            if on_progress is None or (state["best"] is not None and objective >= state["best"]):
+                return
+            state["best"] = objective
+            
+            now = time.perf_counter()
+            if state["reported_at"] is not None and now - state["reported_at"] < settings.OPTIMIZATION_PROGRESS_INTERVAL_SECONDS:
+                return
+            state["reported_at"] = now
+            
+            routes = []
+            for vehicle_id in range(manager.GetNumberOfVehicles()):
+                sequence = []
+                index = routing.NextVar(routing.Start(vehicle_id)).Value()
+                while not routing.IsEnd(index):
+                    sequence.append(node_ids[manager.IndexToNode(index)])
+                    index = routing.NextVar(index).Value()
+                routes.append(sequence)
+            
+            on_progress({
+                "objective": objective,
+                "solutions": state["solutions"],
+                "elapsed_seconds": round(now - started, 2),
+                "routes": routes
+            })
+        
+        return monitor
+    
+    def _solve_routing(
+        self,
+        routing: pywrapcp.RoutingModel,
+        manager: pywrapcp.RoutingIndexManager,
+        search_parameters,
+        timeout: int,
+        initial_routes: Optional[List[List[int]]] = None,
+        node_ids: Optional[List[str]] = None,
+        on_progress: Optional[Callable[[Dict], None]] = None,
+        cancel_event=None
+    ) -> Tuple[Any, bool]:
+        """
+        Solve a routing model, seeded with initial routes when given.
+        
+        A warm start only has to repair a nearly optimal solution, so it
+        gets WARM_START_TIME_FRACTION of the timeout.
+        
+        Args:
+            routing: Routing model
+            manager: Index manager of the model
+            search_parameters: Search parameters (time limit is set here)
+            timeout: Solver timeout in seconds
+            initial_routes: Node lists per vehicle (depot excluded)
+            node_ids: Recipient id of each node (for progress reports)
+            on_progress: Receives improving solutions while searching
+            cancel_event: Event whose is_set() stops the search
+        
+        Returns:
+            (assignment or None, whether the search was warm-started)
+        
+        Raises:
+            OptimizationCancelledError: If cancelled before or during the search
+        """
+        self._check_cancelled(cancel_event)
+        if on_progress is not None or cancel_event is not None:
+            routing.AddAtSolutionCallback(
+                self._solution_monitor(routing, manager, node_ids, on_progress, cancel_event)
+            )
+        
+        solution, warm_start = self._search(routing, manager, search_parameters, timeout, initial_routes)
+        self._check_cancelled(cancel_event)
+        return solution, warm_start
+    
+    def _search(
+        self,
+        routing: pywrapcp.RoutingModel,
+        manager: pywrapcp.RoutingIndexManager,
+        search_parameters,
+        timeout: int,
+        initial_routes: Optional[List[List[int]]]
+    ) -> Tuple[Any, bool]:
+        """Run the search (see _solve_routing)."""
+        if initial_routes:
+            search_parameters.time_limit.seconds = max(1, math.ceil(timeout * settings.WARM_START_TIME_FRACTION))
+            routing.CloseModelWithParameters(search_parameters)
+            initial_assignment = routing.ReadAssignmentFromRoutes(
+                [[manager.NodeToIndex(node) for node in route] for route in initial_routes],
+                True
+            )
+            if initial_assignment is not None:
+                return routing.SolveFromAssignmentWithParameters(initial_assignment, search_parameters), True
+            logger.warning("Initial routes rejected by the routing model, solving from scratch")
+        
+        search_parameters.time_limit.seconds = timeout
+        return routing.SolveWithParameters(search_parameters), False
+    
     def solve_tsp(
         self,
         recipient_ids: List[UUID],
         depot_location: Optional[Tuple[float, float]] = None,
         timeout_seconds: Optional[int] = None,
-        use_traffic: bool = False
+        use_traffic: bool = False,
+        initial_sequence: Optional[List[UUID]] = None,
+        previous_result_id: Optional[str] = None,
+        on_progress: Optional[Callable[[Dict], None]] = None,
+        cancel_event=None
     ) -> Dict:
         """
         Solve Traveling Salesman Problem (TSP) for single courier.
@@ -86,9 +461,19 @@ class OptimizationService:
             depot_location: (lat, lng) of depot (defaults to config)
             timeout_seconds: Solver timeout (defaults to TSP_TIMEOUT_SECONDS)
             use_traffic: Enable traffic-aware optimization (Routes API Pro mode)
+            initial_sequence: Previous visiting order to start the search from
+            previous_result_id: result_id of an earlier response to start from
+                                (used when initial_sequence is not given)
+            on_progress: Receives improving solutions while searching
+            cancel_event: Event (threading or multiprocessing) that cancels the solve
         
         Returns:
-            Dict with optimized_sequence, total_distance, total_duration
+            Dict with optimized_sequence, total_distance, total_duration,
+            result_id, warm_start and solution_cached (True when served
+            from the solution cache)
+        
+        Raises:
+            OptimizationCancelledError: If cancel_event is set before the solve finishes
         """
         profiler = PerformanceProfiler(enabled=settings.ENABLE_PROFILING)
         
@@ -103,9 +488,21 @@ class OptimizationService:
         
         logger.info(f"Solving TSP for {len(recipient_ids)} recipients with {timeout}s timeout")
         
-        # Get recipient locations
+        # Get recipients (in request order)
         with profiler.profile("1. Fetch Recipients from Database"):
-            recipient_locations = self.get_recipient_locations(recipient_ids)
+            recipients = self.get_recipients(recipient_ids)
+        
+        # Identical problems are served from the solution cache
+        fingerprint = self._fingerprint("tsp", recipients, depot_location, use_traffic, timeout=timeout)
+        cached = self._cached_solution(fingerprint)
+        if cached is not None:
+            return cached
+        self._check_cancelled(cancel_event)
+        
+        recipient_locations = []
+        for recipient in recipients:
+            point = to_shape(recipient.location)
+            recipient_locations.append((point.y, point.x))  # (lat, lng)
         
         # Build locations list: [depot, recipient1, recipient2, ...]
         all_locations = [depot_location] + recipient_locations
@@ -115,16 +512,22 @@ class OptimizationService:
             matrix_data = self.routes_api_service.compute_route_matrix(
                 origins=all_locations,
                 destinations=all_locations,
-                use_traffic=use_traffic
+                use_traffic=use_traffic,
+                symmetric=settings.ROUTES_API_SYMMETRIC_MATRIX and not use_traffic
             )
         
+        distance_matrix = np.asarray(matrix_data["distance_matrix"], dtype=np.int32)
+        duration_matrix = np.asarray(matrix_data["duration_matrix"], dtype=np.int32)
+        
         # Combine distance and duration with equal weights (0.5 each)
         cost_matrix = self._calculate_combined_cost_matrix(
-            matrix_data["distance_matrix"],
-            matrix_data["duration_matrix"],
+            distance_matrix,
+            duration_matrix,
             distance_weight=0.5,
             duration_weight=0.5
         )
+        # Nested Python ints, as RegisterTransitMatrix expects
+        cost_table = cost_matrix.tolist()
         
         # Create routing model and solve
         with profiler.profile("3. OR-Tools TSP Solver"):
@@ -136,14 +539,8 @@ class OptimizationService:
             
             routing = pywrapcp.RoutingModel(manager)
             
-            # Create distance callback
-            def distance_callback(from_index, to_index):
-                """Returns the cost between the two nodes."""
-                from_node = manager.IndexToNode(from_index)
-                to_node = manager.IndexToNode(to_index)
-                return cost_matrix[from_node][to_node]
-            
-            transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+            # Arc costs are evaluated in C++, without calling back into Python
+            transit_callback_index = routing.RegisterTransitMatrix(cost_table)
             routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
             
             # Set search parameters
@@ -154,13 +551,25 @@ class OptimizationService:
             search_parameters.local_search_metaheuristic = (
                 routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
             )
-            search_parameters.time_limit.seconds = timeout
+            
+            # Seed the search with the previous sequence, if any
+            node_ids = [""] + [str(r.id) for r in recipients]
+            previous_routes = [initial_sequence] if initial_sequence else self._previous_routes(previous_result_id)
+            initial_routes = None
+            if previous_routes:
+                initial_routes = warm_start_routes(previous_routes, node_ids, cost_table, 1)
             
             # Solve
-            solution = routing.SolveWithParameters(search_parameters)
+            solve_started = time.perf_counter()
+            solution, warm_start = self._solve_routing(
+                routing, manager, search_parameters, timeout, initial_routes,
+                node_ids, on_progress, cancel_event
+            )
+            SOLVER_SECONDS.labels("tsp").observe(time.perf_counter() - solve_started)
         
         if not solution:
             raise ValueError("No solution found for TSP. Try reducing the number of recipients.")
+        SOLVER_OBJECTIVE.labels("tsp").observe(solution.ObjectiveValue())
         
         # Extract solution
         index = routing.Start(0)
@@ -183,13 +592,10 @@ class OptimizationService:
             optimized_sequence.append(recipient_ids[idx - 1])  # -1 because depot is at index 0
         
         # Calculate actual distance and duration from original matrices
-        total_distance = 0
-        total_duration = 0
-        for i in range(len(route_indices) - 1):
-            from_node = route_indices[i]
-            to_node = route_indices[i + 1]
-            total_distance += matrix_data["distance_matrix"][from_node][to_node]
-            total_duration += matrix_data["duration_matrix"][from_node][to_node]
+        from_nodes = route_indices[:-1]
+        to_nodes = route_indices[1:]
+        total_distance = int(distance_matrix[from_nodes, to_nodes].sum(dtype=np.int64))
+        total_duration = int(duration_matrix[from_nodes, to_nodes].sum(dtype=np.int64))
         
         logger.info(f"TSP solved: {len(optimized_sequence)} stops, {total_distance}m, {total_duration}s")
         
@@ -197,8 +603,14 @@ class OptimizationService:
             "optimized_sequence": [str(uid) for uid in optimized_sequence],
             "total_distance_meters": total_distance,
             "total_duration_seconds": total_duration,
-            "num_stops": len(optimized_sequence)
+            "num_stops": len(optimized_sequence),
+            "matrix_stale_cells": matrix_data.get("stale_cells", 0),
+            "matrix_fallback_cells": matrix_data.get("fallback_cells", 0),
+            "result_id": fingerprint,
+            "warm_start": warm_start,
+            "solution_cached": False
         }
+        self._store_solution(fingerprint, result, use_traffic)
         
         # Add profiling data if enabled
         profiling_summary = profiler.summary()
@@ -215,7 +627,12 @@ class OptimizationService:
         capacity_per_courier: int,
         depot_location: Optional[Tuple[float, float]] = None,
         timeout_seconds: Optional[int] = None,
-        use_traffic: bool = False
+        use_traffic: bool = False,
+        sparse_neighbors: Optional[int] = None,
+        initial_routes: Optional[List[List[UUID]]] = None,
+        previous_result_id: Optional[str] = None,
+        on_progress: Optional[Callable[[Dict], None]] = None,
+        cancel_event=None
     ) -> Dict:
         """
         Solve Capacitated Vehicle Routing Problem (CVRP) for multiple couriers.
@@ -227,9 +644,22 @@ class OptimizationService:
             depot_location: (lat, lng) of depot (defaults to config)
             timeout_seconds: Solver timeout (defaults to CVRP_TIMEOUT_SECONDS)
             use_traffic: Enable traffic-aware optimization (Routes API Pro mode)
+            sparse_neighbors: Fetch real distances only for depot arcs and each
+                              recipient's k nearest neighbors (None for full matrix)
+            initial_routes: Previous recipient sequences (one per courier) to
+                            start the search from
+            previous_result_id: result_id of an earlier response to start from
+                                (used when initial_routes is not given)
+            on_progress: Receives improving solutions while searching
+            cancel_event: Event (threading or multiprocessing) that cancels the solve
         
         Returns:
-            Dict with routes (per courier), total_distance, total_duration
+            Dict with routes (per courier), total_distance, total_duration,
+            result_id, warm_start and solution_cached (True when served
+            from the solution cache)
+        
+        Raises:
+            OptimizationCancelledError: If cancel_event is set before the solve finishes
         """
         if not recipient_ids:
             raise ValueError("recipient_ids cannot be empty")
@@ -249,55 +679,90 @@ class OptimizationService:
         logger.info(f"Solving CVRP for {len(recipient_ids)} recipients, {num_couriers} couriers, capacity {capacity_per_courier}")
         
         # Get recipient locations and demands
-        db_session = SessionLocal()
-        try:
-            recipients = db_session.query(Recipient).filter(
-                Recipient.id.in_(recipient_ids),
-                Recipient.is_deleted == False
-            ).all()
-            
-            if len(recipients) != len(recipient_ids):
-                raise ValueError(f"Some recipients not found")
-            
-            # Build locations and demands
-            recipient_locations = []
-            demands = [0]  # Depot has 0 demand
-            recipient_map = {}  # Map index to recipient_id
-            
-            for idx, recipient in enumerate(recipients):
-                point = to_shape(recipient.location)
-                recipient_locations.append((point.y, point.x))
-                demands.append(recipient.num_packages or 1)  # Default to 1 package if not set
-                recipient_map[idx + 1] = recipient.id  # +1 because depot is at index 0
-            
-            all_locations = [depot_location] + recipient_locations
-            
-            # Check feasibility
-            total_demand = sum(demands)
-            total_capacity = num_couriers * capacity_per_courier
-            if total_demand > total_capacity:
-                raise ValueError(
-                    f"Infeasible: total demand ({total_demand}) exceeds total capacity ({total_capacity})"
-                )
-            
-        finally:
-            db_session.close()
+        recipients = self.get_recipients(recipient_ids)
         
-        # Get distance matrix from Routes API
-        matrix_data = self.routes_api_service.compute_route_matrix(
-            origins=all_locations,
-            destinations=all_locations,
-            use_traffic=use_traffic
+        # Build locations and demands
+        recipient_locations = []
+        demands = [0]  # Depot has 0 demand
+        recipient_map = {}  # Map index to recipient_id
+        
+        for idx, recipient in enumerate(recipients):
+            point = to_shape(recipient.location)
+            recipient_locations.append((point.y, point.x))
+            demands.append(recipient.num_packages or 1)  # Default to 1 package if not set
+            recipient_map[idx + 1] = recipient.id  # +1 because depot is at index 0
+        
+        all_locations = [depot_location] + recipient_locations
+        
+        # Check feasibility
+        total_demand = sum(demands)
+        total_capacity = num_couriers * capacity_per_courier
+        if total_demand > total_capacity:
+            raise ValueError(
+                f"Infeasible: total demand ({total_demand}) exceeds total capacity ({total_capacity})"
+            )
+        
+        # Identical problems are served from the solution cache
+        fingerprint = self._fingerprint(
+            "cvrp", recipients, depot_location, use_traffic,
+            num_couriers=num_couriers,
+            capacity_per_courier=capacity_per_courier,
+            timeout=timeout,
+            sparse_neighbors=sparse_neighbors
         )
+        cached = self._cached_solution(fingerprint)
+        if cached is not None:
+            return cached
+        self._check_cancelled(cancel_event)
+        
+        n_locations = len(all_locations)
+        
+        # Get distance matrix from Routes API
+        if sparse_neighbors:
+            # Real values only for depot and k-nearest-neighbor arcs
+            matrix_data = self.routes_api_service.compute_sparse_route_matrix(
+                all_locations,
+                k=sparse_neighbors,
+                use_traffic=use_traffic
+            )
+            real_elements = matrix_data["real_elements"]
+            estimated_elements = matrix_data["estimated_elements"]
+            billed_elements = matrix_data["billed_elements"]
+        else:
+            matrix_data = self.routes_api_service.compute_route_matrix(
+                origins=all_locations,
+                destinations=all_locations,
+                use_traffic=use_traffic,
+                symmetric=settings.ROUTES_API_SYMMETRIC_MATRIX and not use_traffic
+            )
+            # Cells served from the Euclidean fallback are estimates, not road
+            # values; a fully failed matrix also counts its diagonal
+            arcs = n_locations * (n_locations - 1)
+            estimated_elements = min(matrix_data.get("fallback_cells", 0), arcs)
+            real_elements = arcs - estimated_elements
+            billed_elements = matrix_data.get("billed_elements", 0)
+        
+        distance_matrix = np.asarray(matrix_data["distance_matrix"], dtype=np.int32)
+        duration_matrix = np.asarray(matrix_data["duration_matrix"], dtype=np.int32)
         
         # Combine distance and duration
         cost_matrix = self._calculate_combined_cost_matrix(
-            matrix_data["distance_matrix"],
-            matrix_data["duration_matrix"],
+            distance_matrix,
+            duration_matrix,
             distance_weight=0.5,
             duration_weight=0.5
         )
         
+        if sparse_neighbors:
+            # Bias the solver toward arcs with real road distances
+            cost_matrix = np.where(
+                matrix_data["real_mask"],
+                cost_matrix,
+                (cost_matrix * settings.CVRP_SPARSE_ESTIMATE_PENALTY).astype(np.int32)
+            )
+        # Nested Python ints, as RegisterTransitMatrix expects
+        cost_table = cost_matrix.tolist()
+        
         # Create routing model
         manager = pywrapcp.RoutingIndexManager(
             len(all_locations),
@@ -307,21 +772,12 @@ class OptimizationService:
         
         routing = pywrapcp.RoutingModel(manager)
         
-        # Create distance callback
-        def distance_callback(from_index, to_index):
-            from_node = manager.IndexToNode(from_index)
-            to_node = manager.IndexToNode(to_index)
-            return cost_matrix[from_node][to_node]
-        
-        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+        # Arc costs are evaluated in C++, without calling back into Python
+        transit_callback_index = routing.RegisterTransitMatrix(cost_table)
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
         
-        # Add capacity constraint
-        def demand_callback(from_index):
-            from_node = manager.IndexToNode(from_index)
-            return demands[from_node]
-        
-        demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+        # Add capacity constraint (demand per node, also evaluated in C++)
+        demand_callback_index = routing.RegisterUnaryTransitVector(demands)
         routing.AddDimensionWithVehicleCapacity(
             demand_callback_index,
             0,  # null capacity slack
@@ -338,13 +794,27 @@ class OptimizationService:
         search_parameters.local_search_metaheuristic = (
             routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
         )
-        search_parameters.time_limit.seconds = timeout
+        
+        # Seed the search with the previous routes, if any
+        node_ids = [""] + [str(r.id) for r in recipients]
+        previous_routes = initial_routes or self._previous_routes(previous_result_id)
+        seed_routes = None
+        if previous_routes:
+            seed_routes = warm_start_routes(
+                previous_routes, node_ids, cost_table, num_couriers, demands, capacity_per_courier
+            )
         
         # Solve
-        solution = routing.SolveWithParameters(search_parameters)
+        solve_started = time.perf_counter()
+        solution, warm_start = self._solve_routing(
+            routing, manager, search_parameters, timeout, seed_routes,
+            node_ids, on_progress, cancel_event
+        )
+        SOLVER_SECONDS.labels("cvrp").observe(time.perf_counter() - solve_started)
         
         if not solution:
             raise ValueError("No solution found for CVRP. Try increasing capacity or number of couriers.")
+        SOLVER_OBJECTIVE.labels("cvrp").observe(solution.ObjectiveValue())
         
         # Extract routes
         routes = []
@@ -372,8 +842,8 @@ class OptimizationService:
                 # Calculate actual distance and duration
                 from_node = manager.IndexToNode(previous_index)
                 to_node = manager.IndexToNode(index)
-                route_distance += matrix_data["distance_matrix"][from_node][to_node]
-                route_duration += matrix_data["duration_matrix"][from_node][to_node]
+                route_distance += int(distance_matrix[from_node, to_node])
+                route_duration += int(duration_matrix[from_node, to_node])
             
             # Add final node
             route_indices.append(manager.IndexToNode(index))
@@ -412,14 +882,24 @@ class OptimizationService:
         
         logger.info(f"CVRP solved: {len(routes)} routes, {total_distance}m, {total_duration}s, balance={balance_metrics['route_balance_status']}")
         
-        return {
+        result = {
             "routes": routes,
             "num_routes": len(routes),
             "total_distance_meters": total_distance,
             "total_duration_seconds": total_duration,
             "total_recipients": len(recipient_ids),
+            "matrix_real_elements": real_elements,
+            "matrix_estimated_elements": estimated_elements,
+            "matrix_billed_elements": billed_elements,
+            "matrix_stale_cells": matrix_data.get("stale_cells", 0),
+            "matrix_fallback_cells": matrix_data.get("fallback_cells", 0),
+            "result_id": fingerprint,
+            "warm_start": warm_start,
+            "solution_cached": False,
             **balance_metrics
         }
+        self._store_solution(fingerprint, result, use_traffic)
+        return result
     
     def _calculate_route_balance(self, routes: List[Dict]) -> Dict:
         """
@@ -475,11 +955,11 @@ class OptimizationService:
     
     def _calculate_combined_cost_matrix(
         self,
-        distance_matrix: List[List[int]],
-        duration_matrix: List[List[int]],
+        distance_matrix: np.ndarray,
+        duration_matrix: np.ndarray,
         distance_weight: float = 0.5,
         duration_weight: float = 0.5
-    ) -> List[List[int]]:
+    ) -> np.ndarray:
         """
         Combine distance and duration matrices into single cost matrix.
         
@@ -490,29 +970,19 @@ class OptimizationService:
             duration_weight: Weight for duration (0.0 to 1.0)
         
         Returns:
-            Combined cost matrix (weighted sum, normalized)
+            Combined cost matrix (weighted sum, normalized) as int32 array
         """
         if abs(distance_weight + duration_weight - 1.0) > 0.01:
             raise ValueError("Weights must sum to 1.0")
         
-        n = len(distance_matrix)
-        cost_matrix = []
+        # Normalize and combine (distance in km, duration in minutes)
+        distance_km = np.asarray(distance_matrix) / 1000.0
+        duration_min = np.asarray(duration_matrix) / 60.0
         
-        for i in range(n):
-            cost_row = []
-            for j in range(n):
-                # Normalize and combine (distance in km, duration in minutes)
-                distance_km = distance_matrix[i][j] / 1000.0
-                duration_min = duration_matrix[i][j] / 60.0
-                
-                # Combined cost (scaled to integer for OR-Tools)
-                combined_cost = int(
-                    (distance_weight * distance_km * 100) +
-                    (duration_weight * duration_min * 100)
-                )
-                
-                cost_row.append(combined_cost)
-            
-            cost_matrix.append(cost_row)
+        # Combined cost (scaled to integer for OR-Tools)
+        combined_cost = (
+            (distance_weight * distance_km * 100) +
+            (duration_weight * duration_min * 100)
+        )
         
-        return cost_matrix
+        return combined_cost.astype(np.int32)
@@ -0,0 +1,116 @@
+"""
+Durable pair-distance store (Layer 3 behind the Redis cache).
+Reads in bulk after Redis misses and backfills asynchronously after API calls.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.repositories.pair_distance_repository import PairDistanceRepository
+from app.utils.geo import pack_coordinate
+
+logger = logging.getLogger(__name__)
+
+# Single writer so backfills never contend with each other
+_backfill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pair-distance-backfill")
+
+
+class PairDistanceStore:
+    """
+    PostgreSQL-backed store of static distances between coordinate pairs.
+    
+    Errors never propagate: a failing database behaves like an empty store.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        enabled: Optional[bool] = None
+    ):
+        """
+        Initialize pair distance store.
+        
+        Args:
+            session_factory: Factory for database sessions
+            enabled: Whether the store is used (defaults to settings.PAIR_DISTANCE_STORE_ENABLED)
+        """
+        self.session_factory = session_factory
+        self.enabled = settings.PAIR_DISTANCE_STORE_ENABLED if enabled is None else enabled
+    
+    def get_many(
+        self,
+        pairs: List[Tuple[Tuple[float, float], Tuple[float, float]]]
+    ) -> List[Optional[Tuple[int, Optional[int]]]]:
+        """
+        Get stored distances for many coordinate pairs.
+        
+        Args:
+            pairs: List of (origin, destination) coordinate pairs
+        
+        Returns:
+            List aligned with pairs: (distance_meters, duration_seconds) or None
+        """
+        if not self.enabled or not pairs:
+            return [None] * len(pairs)
+        
+        keys = [(pack_coordinate(*origin), pack_coordinate(*destination)) for origin, destination in pairs]
+        
+        db = self.session_factory()
+        try:
+            return PairDistanceRepository(db).bulk_get(keys)
+        except Exception as e:
+            logger.warning(f"Pair distance store read failed: {e}")
+            return [None] * len(pairs)
+        finally:
+            db.close()
+    
+    def put_many(
+        self,
+        entries: List[Tuple[Tuple[float, float], Tuple[float, float], int, Optional[int]]]
+    ) -> int:
+        """
+        Store many pair distances (upsert).
+        
+        Args:
+            entries: List of (origin, destination, distance_meters, duration_seconds)
+        
+        Returns:
+            Number of rows written (0 on error or when disabled)
+        """
+        if not self.enabled or not entries:
+            return 0
+        
+        rows = [
+            (pack_coordinate(*origin), pack_coordinate(*destination), int(distance),
+             None if duration is None else int(duration))
+            for origin, destination, distance, duration in entries
+        ]
+        
+        db = self.session_factory()
+        try:
+            return PairDistanceRepository(db).bulk_upsert(rows)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Pair distance store write failed: {e}")
+            return 0
+        finally:
+            db.close()
+    
+    def put_many_async(
+        self,
+        entries: List[Tuple[Tuple[float, float], Tuple[float, float], int, Optional[int]]]
+    ) -> Optional[Future]:
+        """
+        Backfill pair distances in the background.
+        
+        Args:
+            entries: List of (origin, destination, distance_meters, duration_seconds)
+        
+        Returns:
+            Future of the write, or None if nothing was scheduled
+        """
+        if not self.enabled or not entries:
+            return None
+        return _backfill_executor.submit(self.put_many, list(entries))
@@ -0,0 +1,217 @@
+"""
+Background precomputation of neighbor distances.
+When recipients are created or relocated, depot and k-nearest-neighbor
+road distances are fetched off-peak so later optimizations hit the cache.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.repositories.recipient_repository import RecipientRepository
+from app.services.routes_api_service import RoutesAPIService
+
+logger = logging.getLogger(__name__)
+
+
+def is_off_peak(now: datetime, start_hour: int, end_hour: int) -> bool:
+    """
+    Check whether `now` falls in the off-peak window [start_hour, end_hour).
+    
+    The window may wrap around midnight (e.g. 22 → 6). Equal hours mean
+    the window covers the whole day.
+    
+    Args:
+        now: Current local time
+        start_hour: Window start hour (0-23)
+        end_hour: Window end hour (0-23)
+    
+    Returns:
+        True if inside the window
+    """
+    if start_hour == end_hour:
+        return True
+    if start_hour < end_hour:
+        return start_hour <= now.hour < end_hour
+    return now.hour >= start_hour or now.hour < end_hour
+
+
+class PrecomputeQueue:
+    """
+    In-process, deduplicating queue of recipients awaiting precomputation.
+    
+    A single worker thread drains the queue in batches during the off-peak
+    window. All pairs of a batch are prefetched together so they fill
+    complete Routes API requests.
+    """
+    
+    def __init__(
+        self,
+        routes_api_service: Optional[RoutesAPIService] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        clock: Callable[[], datetime] = datetime.now
+    ):
+        """
+        Initialize precompute queue.
+        
+        Args:
+            routes_api_service: Routes API service (creates new on first use if None)
+            session_factory: Factory for database sessions
+            clock: Returns the current local time (injectable for tests)
+        """
+        self._routes_api_service = routes_api_service
+        self.session_factory = session_factory
+        self.clock = clock
+        self.batch_size = settings.PRECOMPUTE_BATCH_SIZE
+        self.neighbors = settings.PRECOMPUTE_NEIGHBORS
+        self.poll_seconds = settings.PRECOMPUTE_POLL_SECONDS
+        
+        self._pending: "OrderedDict[UUID, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+    
+    @property
+    def routes_api_service(self) -> RoutesAPIService:
+        """Routes API service, created lazily."""
+        if self._routes_api_service is None:
+            self._routes_api_service = RoutesAPIService()
+        return self._routes_api_service
+    
+    def enqueue(self, recipient_id: UUID) -> bool:
+        """
+        Schedule a recipient for precomputation.
+        
+        Args:
+            recipient_id: UUID of the created or relocated recipient
+        
+        Returns:
+            True if queued, False if already pending
+        """
+        with self._lock:
+            if recipient_id in self._pending:
+                return False
+            self._pending[recipient_id] = None
+        
+        self._wakeup.set()
+        return True
+    
+    def pending_count(self) -> int:
+        """Number of recipients waiting to be processed."""
+        with self._lock:
+            return len(self._pending)
+    
+    def _take_batch(self) -> List[UUID]:
+        """Remove and return up to batch_size pending recipient IDs (FIFO)."""
+        with self._lock:
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                recipient_id, _ = self._pending.popitem(last=False)
+                batch.append(recipient_id)
+            return batch
+    
+    def _collect_pairs(
+        self,
+        recipient_ids: List[UUID]
+    ) -> List[Tuple[Tuple[float, float], Tuple[float, float]]]:
+        """
+        Build depot and nearest-neighbor pairs (both directions) for recipients.
+        
+        Args:
+            recipient_ids: Recipients to precompute
+        
+        Returns:
+            Deduplicated list of (origin, destination) pairs
+        """
+        depot = (settings.DEPOT_LAT, settings.DEPOT_LNG)
+        pairs = {}
+        
+        db = self.session_factory()
+        try:
+            repo = RecipientRepository(db)
+            for recipient_id in recipient_ids:
+                recipient = repo.get_by_id(recipient_id)
+                if not recipient:
+                    continue
+                
+                location = RecipientRepository.extract_location(recipient)
+                point = (location["lat"], location["lng"])
+                pairs[(depot, point)] = None
+                pairs[(point, depot)] = None
+                
+                for neighbor in repo.get_nearest_neighbors(recipient, self.neighbors):
+                    neighbor_location = RecipientRepository.extract_location(neighbor)
+                    neighbor_point = (neighbor_location["lat"], neighbor_location["lng"])
+                    pairs[(point, neighbor_point)] = None
+                    pairs[(neighbor_point, point)] = None
+        finally:
+            db.close()
+        
+        return list(pairs)
+    
+    def process_batch(self) -> int:
+        """
+        Precompute one batch of pending recipients.
+        
+        Returns:
+            Number of recipients processed
+        """
+        recipient_ids = self._take_batch()
+        if not recipient_ids:
+            return 0
+        
+        try:
+            pairs = self._collect_pairs(recipient_ids)
+            result = self.routes_api_service.prefetch_pairs(pairs)
+            logger.info(
+                f"Precomputed {result['pairs']} pairs for {len(recipient_ids)} recipients "
+                f"(status: {result['status']})"
+            )
+        except Exception as e:
+            logger.error(f"Precompute batch failed: {e}", exc_info=True)
+        
+        return len(recipient_ids)
+    
+    def _run(self):
+        """Worker loop: drain batches during the off-peak window."""
+        while not self._stopping.is_set():
+            off_peak = is_off_peak(
+                self.clock(), settings.PRECOMPUTE_OFFPEAK_START_HOUR, settings.PRECOMPUTE_OFFPEAK_END_HOUR
+            )
+            
+            if off_peak and self.process_batch():
+                continue
+            
+            # Sleep until new work arrives or the window may have opened
+            self._wakeup.wait(timeout=self.poll_seconds)
+            self._wakeup.clear()
+    
+    def start(self):
+        """Start the background worker thread (no-op if running or disabled)."""
+        if not settings.PRECOMPUTE_ENABLED or (self._worker and self._worker.is_alive()):
+            return
+        
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name="precompute-worker", daemon=True)
+        self._worker.start()
+        logger.info("Precompute worker started")
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the background worker thread."""
+        if not self._worker:
+            return
+        
+        self._stopping.set()
+        self._wakeup.set()
+        self._worker.join(timeout=timeout)
+        self._worker = None
+        logger.info("Precompute worker stopped")
+
+
+# Global precompute queue instance
+precompute_queue = PrecomputeQueue()
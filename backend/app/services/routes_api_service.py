@@ -3,15 +3,46 @@ Google Routes API v2 Service for Route Optimization.
 Implements Compute Route Matrix with 2-layer caching and batching.
 """
 import requests
+import numpy as np
+import asyncio
 import logging
+import random
+import threading
 import time
-from typing import List, Dict, Tuple, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Tuple, Optional
 from datetime import datetime
 from app.config import settings
-from app.utils.cache_service import CacheService
+from app.utils.cache_service import CacheService, get_cache_service
+from app.services.pair_distance_store import PairDistanceStore
+from app.utils.rate_limiter import TokenBucketRateLimiter
+from app.utils.http_client import get_http_session
+from app.utils.geo import haversine_matrix, estimate_durations
+from app.services.matrix_planner import plan_missing_requests, plan_tiles, count_elements
+from app.utils.metrics import (
+    ROUTES_API_ELEMENTS,
+    ROUTES_API_FALLBACK_CELLS,
+    ROUTES_API_REQUEST_SECONDS,
+    routes_api_mode,
+)
 
 logger = logging.getLogger(__name__)
 
+# Process-wide limiter so concurrent batches share the Routes API QPS quota
+routes_api_rate_limiter = TokenBucketRateLimiter(
+    rate=settings.ROUTES_API_QPS,
+    capacity=settings.ROUTES_API_MAX_WORKERS
+)
+
+# Background refreshes of stale Layer 2 cells; one refresh in flight per tile
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="traffic-refresh")
+_refreshing: set = set()
+_refreshing_lock = threading.Lock()
+
+
+# Predicate over (origin_index, destination_index) selecting the cells to compute
+CellFilter = Callable[[int, int], bool]
+
 
 class RoutesAPIService:
     """
@@ -20,42 +51,66 @@ class RoutesAPIService:
     Supports:
     - Essentials mode (no traffic, 625 element limit)
     - Pro mode (with traffic, 100 element limit)
-    - 2-layer caching via CacheService
-    - Automatic batching for large requests
+    - 2-layer caching via CacheService (bulk lookups per matrix)
+    - Durable PostgreSQL pair distance store behind the Redis cache
+    - Automatic batching for large requests (concurrent, rate-limited)
+    - Pooled keep-alive HTTP session shared across the process
+    - Self-pairs (diagonal) filled locally; optional symmetric mode
+    - Stale traffic durations served immediately and refreshed in the background
     """
     
     # API limits
     ESSENTIALS_MAX_ELEMENTS = 625  # No traffic
     PRO_MAX_ELEMENTS = 100         # With traffic
     
+    # Road distance / haversine ratio used when no arcs could be calibrated
+    DEFAULT_DETOUR_FACTOR = 1.3
+    
     # API endpoint
     BASE_URL = "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix"
     
     def __init__(
         self,
         api_key: Optional[str] = None,
-        cache_service: Optional[CacheService] = None
+        cache_service: Optional[CacheService] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        session: Optional[requests.Session] = None,
+        distance_store: Optional[PairDistanceStore] = None
     ):
         """
         Initialize Routes API Service.
         
         Args:
             api_key: Google Maps API key (defaults to settings.GOOGLE_MAPS_API_KEY)
-            cache_service: CacheService instance (creates new if None)
+            cache_service: CacheService instance (defaults to the process-wide one)
+            rate_limiter: Rate limiter for API calls (defaults to the process-wide limiter)
+            session: HTTP session for API calls (defaults to the process-wide pooled session)
+            distance_store: Durable pair distance store (creates new if None)
         """
         self.api_key = api_key or settings.GOOGLE_MAPS_API_KEY
         if not self.api_key:
             logger.warning("Google Maps API key not provided. Routes API calls will fail.")
         
-        self.cache_service = cache_service or CacheService()
+        self.cache_service = cache_service or get_cache_service()
         self.timeout = settings.ROUTES_API_TIMEOUT
+        self.rate_limiter = rate_limiter or routes_api_rate_limiter
+        self.session = session
+        self.distance_store = distance_store or PairDistanceStore()
+        self.max_workers = settings.ROUTES_API_MAX_WORKERS
+        self.max_retries = settings.ROUTES_API_MAX_RETRIES
+        self.retry_backoff = settings.ROUTES_API_RETRY_BACKOFF_SECONDS
+        
+        # Billable elements returned by the Routes API through this instance
+        self.elements_requested = 0
+        self._elements_lock = threading.Lock()
     
     def compute_route_matrix(
         self,
         origins: List[Tuple[float, float]],
         destinations: List[Tuple[float, float]],
         use_traffic: bool = False,
-        departure_time: Optional[datetime] = None
+        departure_time: Optional[datetime] = None,
+        symmetric: bool = False
     ) -> Dict:
         """
         Compute route matrix using Google Routes API v2.
@@ -63,6 +118,7 @@ class RoutesAPIService:
         Automatically handles:
         - Caching (Layer 1 for distance, Layer 2 for traffic duration)
         - Batching (if request exceeds element limits)
+        - Self-pairs (identical origin and destination) filled with 0 locally
         - Fallback to Euclidean distance if API fails
         
         Args:
@@ -70,13 +126,48 @@ class RoutesAPIService:
             destinations: List of (lat, lng) tuples
             use_traffic: Whether to include traffic data (Pro mode)
             departure_time: Departure time for traffic calculation (defaults to now)
+            symmetric: Fetch only the upper triangle of a square self-matrix
+                       (origins == destinations) and mirror it
             
         Returns:
-            Dict with distance_matrix and duration_matrix (in meters and seconds)
+            Dict with distance_matrix and duration_matrix (int32 NumPy arrays,
+            in meters and seconds), status, stale_cells (traffic durations
+            served stale), fallback_cells (Euclidean estimates after an
+            API failure, including pairs skipped by the negative cache)
+            and billed_elements (elements paid for in this call).
+            In symmetric mode also a "symmetry" report.
         """
         if not origins or not destinations:
             raise ValueError("origins and destinations cannot be empty")
         
+        if symmetric:
+            if list(origins) == list(destinations):
+                return self._compute_symmetric_matrix(origins, use_traffic, departure_time)
+            logger.warning("Symmetric mode requires origins == destinations. Computing full matrix.")
+        
+        return self._compute_matrix(origins, destinations, use_traffic, departure_time)
+    
+    def _compute_matrix(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]],
+        use_traffic: bool,
+        departure_time: Optional[datetime],
+        cells: Optional[CellFilter] = None
+    ) -> Dict:
+        """
+        Compute the selected cells of a route matrix, batching if needed.
+        
+        Args:
+            origins: List of (lat, lng) tuples
+            destinations: List of (lat, lng) tuples
+            use_traffic: Whether to include traffic data (Pro mode)
+            departure_time: Departure time for traffic calculation
+            cells: Optional filter of cells to compute (others are left at 0)
+            
+        Returns:
+            Dict with distance_matrix and duration_matrix
+        """
         n_origins = len(origins)
         n_destinations = len(destinations)
         total_elements = n_origins * n_destinations
@@ -94,12 +185,278 @@ class RoutesAPIService:
         if total_elements > max_elements:
             logger.info(f"Total elements ({total_elements}) exceeds limit ({max_elements}). Using batching.")
             return self._compute_with_batching(
-                origins, destinations, use_traffic, departure_time, max_elements
+                origins, destinations, use_traffic, departure_time, max_elements, cells
             )
         
         # Single request (no batching needed)
         return self._compute_single_request(
-            origins, destinations, use_traffic, departure_time
+            origins, destinations, use_traffic, departure_time, cells
+        )
+    
+    def _compute_symmetric_matrix(
+        self,
+        locations: List[Tuple[float, float]],
+        use_traffic: bool,
+        departure_time: Optional[datetime]
+    ) -> Dict:
+        """
+        Compute a square self-matrix from its upper triangle.
+        
+        A random sample of lower-triangle cells is fetched alongside the
+        upper triangle. If their mean relative deviation from the mirrored
+        value exceeds settings.ROUTES_API_SYMMETRY_TOLERANCE, the rest of the
+        lower triangle is fetched as well instead of mirroring.
+        
+        Args:
+            locations: List of (lat, lng) tuples used as origins and destinations
+            use_traffic: Whether to include traffic data (Pro mode)
+            departure_time: Departure time for traffic calculation
+            
+        Returns:
+            Dict with distance_matrix, duration_matrix, status and symmetry report
+        """
+        n = len(locations)
+        sampled = self._sample_lower_triangle(n, settings.ROUTES_API_SYMMETRY_SAMPLE_SIZE)
+        
+        result = self._compute_matrix(
+            locations, locations, use_traffic, departure_time,
+            cells=lambda i, j: i < j or (i, j) in sampled
+        )
+        distance_matrix = np.asarray(result["distance_matrix"], dtype=np.int32)
+        duration_matrix = np.asarray(result["duration_matrix"], dtype=np.int32)
+        result["distance_matrix"] = distance_matrix
+        result["duration_matrix"] = duration_matrix
+        
+        deviation = self._mean_asymmetry(distance_matrix, sampled)
+        mirrored = deviation <= settings.ROUTES_API_SYMMETRY_TOLERANCE
+        
+        # Lower-triangle cells to fill (sampled cells keep their real values)
+        lower_i, lower_j = np.tril_indices(n, -1)
+        if sampled:
+            keep = np.array([(i, j) not in sampled for i, j in zip(lower_i, lower_j)], dtype=bool)
+            lower_i, lower_j = lower_i[keep], lower_j[keep]
+        
+        if mirrored:
+            distance_matrix[lower_i, lower_j] = distance_matrix[lower_j, lower_i]
+            duration_matrix[lower_i, lower_j] = duration_matrix[lower_j, lower_i]
+        else:
+            logger.warning(
+                f"Matrix asymmetry {deviation:.1%} exceeds tolerance "
+                f"{settings.ROUTES_API_SYMMETRY_TOLERANCE:.1%}. Fetching lower triangle."
+            )
+            lower = self._compute_matrix(
+                locations, locations, use_traffic, departure_time,
+                cells=lambda i, j: i > j and (i, j) not in sampled
+            )
+            distance_matrix[lower_i, lower_j] = np.asarray(lower["distance_matrix"])[lower_i, lower_j]
+            duration_matrix[lower_i, lower_j] = np.asarray(lower["duration_matrix"])[lower_i, lower_j]
+            if lower["status"] != "OK":
+                result["status"] = lower["status"]
+            result["stale_cells"] = result.get("stale_cells", 0) + lower.get("stale_cells", 0)
+            result["fallback_cells"] = result.get("fallback_cells", 0) + lower.get("fallback_cells", 0)
+            result["billed_elements"] = result.get("billed_elements", 0) + lower.get("billed_elements", 0)
+        
+        result["symmetry"] = {
+            "mirrored": mirrored,
+            "sampled_pairs": len(sampled),
+            "mean_deviation": round(deviation, 4)
+        }
+        return result
+    
+    def _sample_lower_triangle(self, n: int, sample_size: int) -> set:
+        """
+        Pick random lower-triangle cells (i > j) for the asymmetry check.
+        
+        Args:
+            n: Matrix size
+            sample_size: Number of cells to sample
+            
+        Returns:
+            Set of (i, j) cells
+        """
+        total = n * (n - 1) // 2
+        if sample_size >= total:
+            return {(i, j) for i in range(n) for j in range(i)}
+        
+        sampled = set()
+        while len(sampled) < sample_size:
+            i, j = random.sample(range(n), 2)
+            sampled.add((max(i, j), min(i, j)))
+        return sampled
+    
+    def _mean_asymmetry(self, distance_matrix: np.ndarray, cells: set) -> float:
+        """
+        Mean relative difference between sampled cells and their mirror.
+        
+        Args:
+            distance_matrix: Matrix with both (i, j) and (j, i) filled for sampled cells
+            cells: Sampled (i, j) cells
+            
+        Returns:
+            Mean of |d(i, j) - d(j, i)| / max(d(i, j), d(j, i)), 0.0 without samples
+        """
+        if not cells:
+            return 0.0
+        
+        rows, cols = np.array(sorted(cells)).T
+        forward = distance_matrix[cols, rows].astype(np.float64)
+        backward = distance_matrix[rows, cols].astype(np.float64)
+        deviations = np.abs(forward - backward) / np.maximum(np.maximum(forward, backward), 1)
+        
+        return float(deviations.mean())
+    
+    def compute_sparse_route_matrix(
+        self,
+        locations: List[Tuple[float, float]],
+        k: int,
+        use_traffic: bool = False,
+        departure_time: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Compute a square matrix with real road values only for near arcs.
+        
+        Real values are fetched for arcs from and to the depot (index 0) and
+        between each node and its k nearest neighbors (by haversine, both
+        directions). These cells are planned in one pass with exact
+        requests, so only O(N·k) elements are billed. All other cells,
+        and fetched cells that fell back to an estimate, are estimated from
+        the haversine distance, scaled by the median road/haversine ratio
+        of the real arcs; durations use their median seconds per meter.
+        
+        Args:
+            locations: List of (lat, lng) tuples, depot first
+            k: Number of nearest neighbors per node
+            use_traffic: Whether to include traffic data (Pro mode)
+            departure_time: Departure time for traffic calculation
+            
+        Returns:
+            Dict with distance_matrix, duration_matrix, status, real_mask
+            (bool array of cells with real road values), real_elements,
+            estimated_elements, billed_elements, stale_cells and fallback_cells
+        """
+        n = len(locations)
+        haversine = haversine_matrix(locations, locations)
+        
+        # Depot arcs plus k nearest neighbors per node, in both directions
+        real_mask = np.zeros((n, n), dtype=bool)
+        real_mask[0, :] = True
+        real_mask[:, 0] = True
+        k = min(k, n - 1)
+        if k > 0:
+            ranking = haversine.astype(np.float64)
+            np.fill_diagonal(ranking, np.inf)
+            neighbors = np.argpartition(ranking, k - 1, axis=1)[:, :k]
+            rows = np.repeat(np.arange(n), k)
+            real_mask[rows, neighbors.ravel()] = True
+            real_mask |= real_mask.T
+        np.fill_diagonal(real_mask, False)
+        
+        # One exact plan over all selected cells (per-tile planning over-bills)
+        result = self._compute_single_request(
+            locations, locations, use_traffic, departure_time,
+            cells=lambda i, j: real_mask[i, j],
+            exact=True
+        )
+        distance_matrix = np.asarray(result["distance_matrix"], dtype=np.int32)
+        duration_matrix = np.asarray(result["duration_matrix"], dtype=np.int32)
+        
+        # Fallback and negative-cache cells hold estimates, not road values
+        real_mask &= ~result["fallback_mask"]
+        
+        # Calibrate the estimate on real arcs only
+        fetched = real_mask & (haversine > 0) & (distance_matrix > 0)
+        if fetched.any():
+            detour_factor = float(np.median(distance_matrix[fetched] / haversine[fetched]))
+            seconds_per_meter = float(np.median(duration_matrix[fetched] / distance_matrix[fetched]))
+        else:
+            detour_factor = self.DEFAULT_DETOUR_FACTOR
+            seconds_per_meter = 3600 / 60000  # 60 km/h
+        
+        estimated = ~real_mask
+        np.fill_diagonal(estimated, False)
+        distance_matrix[estimated] = (haversine[estimated] * detour_factor).astype(np.int32)
+        duration_matrix[estimated] = (distance_matrix[estimated] * seconds_per_meter).astype(np.int32)
+        
+        real_elements = int(real_mask.sum())
+        logger.info(
+            f"Sparse matrix: {real_elements} real, {int(estimated.sum())} estimated elements, "
+            f"{result['billed_elements']} billed (k={k}, detour factor {detour_factor:.2f})"
+        )
+        
+        return {
+            "distance_matrix": distance_matrix,
+            "duration_matrix": duration_matrix,
+            "status": result["status"],
+            "real_mask": real_mask,
+            "real_elements": real_elements,
+            "estimated_elements": int(estimated.sum()),
+            "billed_elements": result["billed_elements"],
+            "stale_cells": result.get("stale_cells", 0),
+            "fallback_cells": result.get("fallback_cells", 0)
+        }
+    
+    def prefetch_pairs(
+        self,
+        pairs: List[Tuple[Tuple[float, float], Tuple[float, float]]]
+    ) -> Dict:
+        """
+        Fetch and cache distances for specific (origin, destination) pairs.
+        
+        Pairs are laid out on one matrix over their distinct points and
+        planned in one pass (no tiling), so already-cached pairs are
+        skipped and the rest are grouped into Routes API requests that
+        contain only the given pairs. Essentials mode.
+        
+        Args:
+            pairs: List of (origin, destination) coordinate pairs
+            
+        Returns:
+            Dict with number of requested pairs and matrix status
+        """
+        points = list(dict.fromkeys(point for pair in pairs for point in pair))
+        index = {point: i for i, point in enumerate(points)}
+        needed = {(index[origin], index[destination]) for origin, destination in pairs}
+        
+        if not needed:
+            return {"pairs": 0, "status": "OK"}
+        
+        result = self._compute_single_request(
+            points, points, False, None,
+            cells=lambda i, j: (i, j) in needed,
+            exact=True
+        )
+        
+        return {"pairs": len(needed), "status": result["status"]}
+    
+    async def compute_route_matrix_async(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]],
+        use_traffic: bool = False,
+        departure_time: Optional[datetime] = None,
+        symmetric: bool = False
+    ) -> Dict:
+        """
+        Async variant of compute_route_matrix for use in async endpoints.
+        
+        This is a thread offload, not a native async HTTP client: the
+        blocking requests-based path runs in one default-executor thread,
+        which stays busy for the whole call including its tile fan-out.
+        The event loop is not blocked, but concurrent calls each hold a
+        thread.
+        
+        Args:
+            origins: List of (lat, lng) tuples
+            destinations: List of (lat, lng) tuples
+            use_traffic: Whether to include traffic data (Pro mode)
+            departure_time: Departure time for traffic calculation (defaults to now)
+            symmetric: Fetch only the upper triangle and mirror it
+            
+        Returns:
+            Dict with distance_matrix and duration_matrix (in meters and seconds)
+        """
+        return await asyncio.to_thread(
+            self.compute_route_matrix, origins, destinations, use_traffic, departure_time, symmetric
         )
     
     def _compute_single_request(
@@ -107,64 +464,161 @@ class RoutesAPIService:
         origins: List[Tuple[float, float]],
         destinations: List[Tuple[float, float]],
         use_traffic: bool,
-        departure_time: Optional[datetime]
+        departure_time: Optional[datetime],
+        cells: Optional[CellFilter] = None,
+        refresh: bool = False,
+        exact: bool = False,
+        concurrent: bool = True
     ) -> Dict:
         """
-        Compute route matrix with single API request.
-        Uses cache when available.
+        Compute route matrix for a request within the element limit.
+        Uses cache when available and only requests the missing cells;
+        planned requests are split to the element limit, so larger sparse
+        cell sets can be computed in one pass.
+        Self-pairs (identical coordinates) are 0 and never looked up.
+        
+        In Pro mode, traffic durations past their soft TTL are used as-is
+        and the stale cells are refreshed in the background.
         
         Args:
             origins: List of (lat, lng) tuples
             destinations: List of (lat, lng) tuples
             use_traffic: Whether to include traffic
             departure_time: Departure time for traffic
+            cells: Optional filter of cells to compute (others are left at 0)
+            refresh: Skip the cache and re-fetch every selected cell
+            exact: Request only the missing cells (no covering rectangles)
+            concurrent: Send several sub-requests in parallel (False when
+                        already running on a batching or refresh worker)
             
         Returns:
-            Dict with distance_matrix and duration_matrix
+            Dict with distance_matrix, duration_matrix, status, the
+            number of stale cells served (stale_cells), cells filled from
+            the Euclidean fallback (fallback_cells, marked in fallback_mask)
+            and elements billed by the Routes API (billed_elements)
         """
         n_origins = len(origins)
         n_destinations = len(destinations)
         
         # Initialize result matrices
-        distance_matrix = [[0] * n_destinations for _ in range(n_origins)]
-        duration_matrix = [[0] * n_destinations for _ in range(n_origins)]
+        distance_matrix = np.zeros((n_origins, n_destinations), dtype=np.int32)
+        duration_matrix = np.zeros((n_origins, n_destinations), dtype=np.int32)
+        fallback_mask = np.zeros((n_origins, n_destinations), dtype=bool)
         
         # Track cache hits/misses
         cache_hits = 0
         cache_misses = []  # List of (i, j) indices that need API call
         
-        # Check cache for each origin-destination pair
-        for i, origin in enumerate(origins):
-            for j, destination in enumerate(destinations):
-                # Try Layer 1 cache (base distance)
-                cached_distance = self.cache_service.get_base_distance(origin, destination)
-                
-                if use_traffic and cached_distance is not None:
-                    # Try Layer 2 cache (traffic duration)
-                    cached_duration = self.cache_service.get_traffic_duration(
-                        origin, destination, departure_time
-                    )
-                    
-                    if cached_duration is not None:
-                        # Both distance and duration cached
-                        distance_matrix[i][j] = cached_distance
-                        duration_matrix[i][j] = cached_duration
-                        cache_hits += 1
-                    else:
-                        # Only distance cached, need to fetch duration
-                        cache_misses.append((i, j))
-                elif cached_distance is not None and not use_traffic:
-                    # Distance cached and traffic not needed
-                    distance_matrix[i][j] = cached_distance
-                    # Estimate duration from distance (60 km/h average)
-                    duration_matrix[i][j] = int(cached_distance / 60000 * 3600)
-                    cache_hits += 1
-                else:
-                    # Cache miss
-                    cache_misses.append((i, j))
+        # Cells to resolve: selected cells that are not self-pairs
+        wanted = [
+            (i, j)
+            for i in range(n_origins)
+            for j in range(n_destinations)
+            if origins[i] != destinations[j] and (cells is None or cells(i, j))
+        ]
+        
+        if not wanted:
+            return {
+                "distance_matrix": distance_matrix,
+                "duration_matrix": duration_matrix,
+                "status": "OK",
+                "stale_cells": 0,
+                "fallback_cells": 0,
+                "fallback_mask": fallback_mask,
+                "billed_elements": 0
+            }
+        
+        # Resolve every pair from cache in bulk (a few round trips per matrix)
+        pairs = [(origins[i], destinations[j]) for i, j in wanted]
+        stale = []  # (i, j) indices served from stale Layer 2 entries
+        if refresh:
+            cached_routes = [None] * len(pairs)
+        else:
+            cached_routes = self.cache_service.get_base_routes_bulk(pairs)
+        
+        # Layer 1 holds (distance, static duration); the duration may be unknown
+        cached_distances = [None if route is None else route[0] for route in cached_routes]
+        static_durations = [None if route is None else route[1] for route in cached_routes]
+        
+        traffic_durations = [None] * len(pairs)
+        if use_traffic:
+            # Layer 2 is only consulted for pairs with a Layer 1 hit
+            layer1_hits = [k for k, distance in enumerate(cached_distances) if distance is not None]
+            traffic_values = self.cache_service.get_traffic_durations_swr_bulk(
+                [pairs[k] for k in layer1_hits], departure_time
+            )
+            for k, entry in zip(layer1_hits, traffic_values):
+                if entry is not None:
+                    traffic_durations[k] = entry[0]
+                    if entry[1]:
+                        stale.append(wanted[k])
+        elif not refresh:
+            # Layer 3: durable store for pairs without a cached static duration
+            redis_misses = [k for k, duration in enumerate(static_durations) if duration is None]
+            stored_values = self.distance_store.get_many([pairs[k] for k in redis_misses])
+            
+            warm_entries = []
+            for k, stored in zip(redis_misses, stored_values):
+                if stored is not None:
+                    cached_distances[k], static_durations[k] = stored
+                    warm_entries.append((pairs[k][0], pairs[k][1], stored[0], stored[1]))
+            
+            if warm_entries:
+                # Re-warm Redis so the next lookup stops at Layer 1
+                logger.info(f"Pair distance store hits: {len(warm_entries)}/{len(redis_misses)} Redis misses")
+                self.cache_service.set_base_routes_bulk(warm_entries)
+        
+        # Known static durations, kept when Layer 1 is rewritten from a traffic-aware call
+        known_static = {}
+        
+        for k, cached_distance in enumerate(cached_distances):
+            i, j = wanted[k]
+            
+            if use_traffic and cached_distance is not None and traffic_durations[k] is not None:
+                # Both distance and duration cached
+                distance_matrix[i, j] = cached_distance
+                duration_matrix[i, j] = traffic_durations[k]
+                cache_hits += 1
+            elif not use_traffic and cached_distance is not None and static_durations[k] is not None:
+                # Distance and static duration cached, traffic not needed
+                distance_matrix[i, j] = cached_distance
+                duration_matrix[i, j] = static_durations[k]
+                cache_hits += 1
+            else:
+                # Cache miss (or no duration for this mode cached)
+                cache_misses.append((i, j))
+                if static_durations[k] is not None:
+                    known_static[(i, j)] = static_durations[k]
         
         if cache_hits > 0:
-            logger.info(f"Cache hits: {cache_hits}/{n_origins * n_destinations} pairs")
+            logger.info(f"Cache hits: {cache_hits}/{len(wanted)} pairs")
+        
+        if stale:
+            logger.info(f"Serving {len(stale)} stale traffic durations, refreshing in background")
+            self._schedule_refresh(origins, destinations, departure_time, stale)
+        
+        status = "OK"
+        fallback_cells = 0
+        
+        if cache_misses and not refresh:
+            # Pairs the API recently failed for are served from the fallback, not re-requested
+            negative = self.cache_service.get_negative_bulk(
+                [(origins[i], destinations[j]) for i, j in cache_misses]
+            )
+            remaining = []
+            for (i, j), reason in zip(cache_misses, negative):
+                if reason is None:
+                    remaining.append((i, j))
+                    continue
+                distance_matrix[i, j], duration_matrix[i, j] = self._fallback_cell(origins[i], destinations[j])
+                fallback_mask[i, j] = True
+                fallback_cells += 1
+                if reason == CacheService.NEGATIVE_REQUEST_FAILED:
+                    status = "FALLBACK"
+            
+            if fallback_cells:
+                logger.info(f"Negative cache hits: {fallback_cells} pairs served from the fallback")
+            cache_misses = remaining
         
         # If all pairs cached, return immediately
         if not cache_misses:
@@ -172,74 +626,290 @@ class RoutesAPIService:
             return {
                 "distance_matrix": distance_matrix,
                 "duration_matrix": duration_matrix,
-                "status": "OK"
+                "status": status,
+                "stale_cells": len(stale),
+                "fallback_cells": fallback_cells,
+                "fallback_mask": fallback_mask,
+                "billed_elements": 0
             }
         
-        # Fetch missing pairs from Routes API
-        logger.info(f"Fetching {len(cache_misses)} pairs from Routes API")
+        # Plan sub-requests that cover only the missing cells
+        max_elements = self.PRO_MAX_ELEMENTS if use_traffic else self.ESSENTIALS_MAX_ELEMENTS
+        request_plan = plan_missing_requests(cache_misses, max_elements, exact=exact)
         
-        try:
-            # Call Routes API
-            api_response = self._call_routes_api(
-                origins, destinations, use_traffic, departure_time
-            )
+        logger.info(
+            f"Fetching {len(cache_misses)} pairs from Routes API in {len(request_plan)} "
+            f"request(s), {count_elements(request_plan)} elements"
+        )
+        
+        missing = set(cache_misses)
+        distance_entries = []
+        duration_entries = []
+        store_entries = []
+        covered = []     # (i, j, distance, duration) of known cells billed by dense rectangles
+        unroutable = []  # Pairs with a non-OK element status
+        failed = []      # Pairs of failed requests
+        billed_elements = 0
+        
+        responses = self._fetch_requests(
+            origins, destinations, request_plan, use_traffic, departure_time, concurrent
+        )
+        
+        for (rows, cols), api_response in zip(request_plan, responses):
+            if isinstance(api_response, Exception):
+                logger.error(f"Routes API request failed: {api_response}")
+                # Fallback to Euclidean distance for the missing pairs of this request
+                fallback = haversine_matrix(
+                    [origins[i] for i in rows], [destinations[j] for j in cols]
+                )
+                mask = np.array([[(i, j) in missing for j in cols] for i in rows], dtype=bool)
+                ROUTES_API_FALLBACK_CELLS.labels(routes_api_mode(use_traffic)).inc(int(mask.sum()))
+                fallback_cells += int(mask.sum())
+                failed.extend(
+                    (origins[i], destinations[j]) for i in rows for j in cols if (i, j) in missing
+                )
+                block = np.ix_(rows, cols)
+                fallback_mask[block] |= mask
+                distance_matrix[block] = np.where(mask, fallback, distance_matrix[block])
+                duration_matrix[block] = np.where(
+                    mask, estimate_durations(fallback), duration_matrix[block]
+                )
+                status = "FALLBACK"
+                continue
+            
+            billed_elements += len(rows) * len(cols)
             
-            # Parse response and update matrices
+            # Parse response and merge into the partially filled matrices
             for element in api_response:
-                origin_idx = element.get("originIndex")
-                dest_idx = element.get("destinationIndex")
+                origin_idx = rows[element.get("originIndex", 0)]
+                dest_idx = cols[element.get("destinationIndex", 0)]
+                
+                if (origin_idx, dest_idx) not in missing:
+                    # Known or unselected cell inside a dense rectangle: billed, so cache it
+                    if element.get("status") == "OK" and origins[origin_idx] != destinations[dest_idx]:
+                        covered.append((
+                            origin_idx, dest_idx,
+                            element.get("distanceMeters", 0),
+                            int(element.get("duration", "0s").rstrip('s'))
+                        ))
+                    continue
                 
                 if element.get("status") == "OK":
                     distance = element.get("distanceMeters", 0)
                     duration_str = element.get("duration", "0s")
                     duration = int(duration_str.rstrip('s'))
                     
-                    distance_matrix[origin_idx][dest_idx] = distance
-                    duration_matrix[origin_idx][dest_idx] = duration
+                    distance_matrix[origin_idx, dest_idx] = distance
+                    duration_matrix[origin_idx, dest_idx] = duration
                     
-                    # Cache the results
                     origin = origins[origin_idx]
                     destination = destinations[dest_idx]
                     
-                    # Always cache base distance (Layer 1)
-                    self.cache_service.set_base_distance(origin, destination, distance)
+                    # Always cache base distance (Layer 1), with the static duration if known
+                    static_duration = (
+                        known_static.get((origin_idx, dest_idx)) if use_traffic else duration
+                    )
+                    distance_entries.append((origin, destination, distance, static_duration))
                     
                     # Cache traffic duration if Pro mode (Layer 2)
                     if use_traffic:
-                        self.cache_service.set_traffic_duration(
-                            origin, destination, duration, departure_time
-                        )
+                        duration_entries.append((origin, destination, duration))
+                    
+                    # Durable store keeps static durations only
+                    store_entries.append(
+                        (origin, destination, distance, None if use_traffic else duration)
+                    )
                 else:
                     # API error for this pair, use Euclidean fallback
                     logger.warning(
                         f"Routes API error for pair ({origin_idx}, {dest_idx}): "
                         f"{element.get('status')}"
                     )
-                    distance = self._calculate_euclidean_distance(
-                        origins[origin_idx], destinations[dest_idx]
+                    distance_matrix[origin_idx, dest_idx], duration_matrix[origin_idx, dest_idx] = (
+                        self._fallback_cell(origins[origin_idx], destinations[dest_idx])
                     )
-                    distance_matrix[origin_idx][dest_idx] = distance
-                    duration_matrix[origin_idx][dest_idx] = int(distance / 60000 * 3600)
-            
-            return {
-                "distance_matrix": distance_matrix,
-                "duration_matrix": duration_matrix,
-                "status": "OK"
-            }
+                    fallback_mask[origin_idx, dest_idx] = True
+                    ROUTES_API_FALLBACK_CELLS.labels(routes_api_mode(use_traffic)).inc()
+                    fallback_cells += 1
+                    unroutable.append((origins[origin_idx], destinations[dest_idx]))
+        
+        if covered:
+            self._add_covered_entries(
+                origins, destinations, use_traffic, covered,
+                distance_entries, duration_entries, store_entries
+            )
+        
+        # Cache the results in bulk
+        if not (refresh and use_traffic):
+            # A traffic refresh skipped Layer 1, so it does not know the static durations to keep
+            self.cache_service.set_base_routes_bulk(distance_entries)
+        if use_traffic:
+            self.cache_service.set_traffic_durations_bulk(duration_entries, departure_time)
+        
+        # Remember failing pairs briefly so retries skip the API
+        if unroutable:
+            self.cache_service.set_negative_bulk(unroutable, CacheService.NEGATIVE_UNROUTABLE)
+        if failed:
+            self.cache_service.set_negative_bulk(failed, CacheService.NEGATIVE_REQUEST_FAILED)
+        
+        # Backfill the durable store without blocking the response
+        self.distance_store.put_many_async(store_entries)
+        
+        return {
+            "distance_matrix": distance_matrix,
+            "duration_matrix": duration_matrix,
+            "status": status,
+            "stale_cells": len(stale),
+            "fallback_cells": fallback_cells,
+            "fallback_mask": fallback_mask,
+            "billed_elements": billed_elements
+        }
+    
+    def _fetch_requests(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]],
+        request_plan: List[Tuple[List[int], List[int]]],
+        use_traffic: bool,
+        departure_time: Optional[datetime],
+        concurrent: bool = True
+    ) -> List:
+        """
+        Send the planned sub-requests, concurrently when there are several.
+        
+        Callers that already run on a worker pool pass concurrent=False so
+        pools do not nest (and the thread count stays within max_workers).
+        
+        Args:
+            origins: List of (lat, lng) tuples
+            destinations: List of (lat, lng) tuples
+            request_plan: (origin indices, destination indices) per request
+            use_traffic: Whether to include traffic
+            departure_time: Departure time for traffic
+            concurrent: Use a worker pool for several requests
             
-        except Exception as e:
-            logger.error(f"Routes API request failed: {e}")
-            # Fallback to Euclidean distance for all missing pairs
-            for i, j in cache_misses:
-                distance = self._calculate_euclidean_distance(origins[i], destinations[j])
-                distance_matrix[i][j] = distance
-                duration_matrix[i][j] = int(distance / 60000 * 3600)
+        Returns:
+            List aligned with request_plan: response elements, or the
+            exception of a failed request
+        """
+        def fetch(request):
+            rows, cols = request
+            try:
+                return self._call_routes_api(
+                    [origins[i] for i in rows],
+                    [destinations[j] for j in cols],
+                    use_traffic,
+                    departure_time
+                )
+            except Exception as e:
+                return e
+        
+        if len(request_plan) == 1 or not concurrent:
+            return [fetch(request) for request in request_plan]
+        
+        # The shared rate limiter bounds the QPS
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(request_plan)))) as executor:
+            return list(executor.map(fetch, request_plan))
+    
+    def _add_covered_entries(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]],
+        use_traffic: bool,
+        covered: List[Tuple[int, int, int, int]],
+        distance_entries: List[Tuple],
+        duration_entries: List[Tuple],
+        store_entries: List[Tuple]
+    ):
+        """
+        Add cells billed only because a dense request rectangle covered them.
+        
+        The miss planner may request known cells when one rectangle is
+        cheaper than several exact ones; they are cached like the misses
+        so the elements paid for are not requested again. A traffic-aware
+        response carries no static duration, so the one cached in Layer 1
+        is kept.
+        
+        Args:
+            origins: List of (lat, lng) tuples
+            destinations: List of (lat, lng) tuples
+            use_traffic: Whether the response is traffic-aware
+            covered: (origin_index, destination_index, distance, duration) of the cells
+            distance_entries: Layer 1 entries to extend
+            duration_entries: Layer 2 entries to extend
+            store_entries: Durable store entries to extend
+        """
+        pairs = [(origins[i], destinations[j]) for i, j, _, _ in covered]
+        
+        if use_traffic:
+            cached = self.cache_service.get_base_routes_bulk(pairs)
+            static_durations = [None if route is None else route[1] for route in cached]
+        else:
+            static_durations = [duration for _, _, _, duration in covered]
+        
+        for (origin, destination), (_, _, distance, duration), static_duration in zip(
+            pairs, covered, static_durations
+        ):
+            distance_entries.append((origin, destination, distance, static_duration))
+            if use_traffic:
+                duration_entries.append((origin, destination, duration))
+            store_entries.append((origin, destination, distance, None if use_traffic else duration))
+    
+    def _schedule_refresh(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]],
+        departure_time: Optional[datetime],
+        stale: List[Tuple[int, int]]
+    ) -> Optional[Future]:
+        """
+        Re-fetch stale traffic cells of a tile in the background.
+        
+        A tile already being refreshed (same stale pairs and departure time)
+        is not submitted again.
+        
+        Args:
+            origins: List of (lat, lng) tuples
+            destinations: List of (lat, lng) tuples
+            departure_time: Departure time for traffic
+            stale: (origin_index, destination_index) cells to refresh
             
-            return {
-                "distance_matrix": distance_matrix,
-                "duration_matrix": duration_matrix,
-                "status": "FALLBACK"
-            }
+        Returns:
+            Future of the refresh, or None if one is already in flight
+        """
+        stale_cells = set(stale)
+        tile_key = (
+            frozenset((origins[i], destinations[j]) for i, j in stale_cells),
+            departure_time.isoformat() if departure_time else None
+        )
+        
+        with _refreshing_lock:
+            if tile_key in _refreshing:
+                return None
+            _refreshing.add(tile_key)
+        
+        def refresh():
+            try:
+                self._compute_single_request(
+                    origins, destinations, True, departure_time,
+                    cells=lambda i, j: (i, j) in stale_cells,
+                    refresh=True,
+                    concurrent=False
+                )
+            except Exception as e:
+                logger.error(f"Background traffic refresh failed: {e}", exc_info=True)
+            finally:
+                with _refreshing_lock:
+                    _refreshing.discard(tile_key)
+        
+        try:
+            return _refresh_executor.submit(refresh)
+        except RuntimeError as e:
+            # Executor shut down (interpreter exiting)
+            logger.warning(f"Could not schedule traffic refresh: {e}")
+            with _refreshing_lock:
+                _refreshing.discard(tile_key)
+            return None
     
     def _call_routes_api(
         self,
@@ -311,18 +981,55 @@ class RoutesAPIService:
         # Make API request
         logger.debug(f"Calling Routes API: {len(origins)} origins, {len(destinations)} destinations")
         
-        response = requests.post(
-            self.BASE_URL,
-            json=payload,
-            headers=headers,
-            timeout=self.timeout
-        )
+        mode = routes_api_mode(use_traffic)
+        started = time.perf_counter()
+        
+        for attempt in range(self.max_retries + 1):
+            # Respect the shared QPS quota
+            self.rate_limiter.acquire()
+            
+            response = (self.session or get_http_session()).post(
+                self.BASE_URL,
+                json=payload,
+                headers=headers,
+                timeout=self.timeout
+            )
+            
+            if response.status_code == 429 and attempt < self.max_retries:
+                delay = self._get_retry_delay(response, attempt)
+                logger.warning(f"Routes API rate limited (429). Retrying in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            
+            response.raise_for_status()
+            
+            with self._elements_lock:
+                self.elements_requested += len(origins) * len(destinations)
+            ROUTES_API_ELEMENTS.labels(mode).inc(len(origins) * len(destinations))
+            ROUTES_API_REQUEST_SECONDS.labels(mode).observe(time.perf_counter() - started)
+            
+            # Parse response - Routes API returns array directly
+            data = response.json()
+            return data  # Already a list of route matrix elements
+    
+    def _get_retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """
+        Get delay before retrying a rate-limited request.
         
-        response.raise_for_status()
+        Uses the Retry-After header when present, otherwise exponential backoff.
         
-        # Parse response - Routes API returns array directly
-        data = response.json()
-        return data  # Already a list of route matrix elements
+        Args:
+            response: 429 response
+            attempt: Zero-based attempt number
+            
+        Returns:
+            Delay in seconds
+        """
+        retry_after = response.headers.get("Retry-After")
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return self.retry_backoff * (2 ** attempt)
     
     def _compute_with_batching(
         self,
@@ -330,17 +1037,24 @@ class RoutesAPIService:
         destinations: List[Tuple[float, float]],
         use_traffic: bool,
         departure_time: Optional[datetime],
-        max_elements: int
+        max_elements: int,
+        cells: Optional[CellFilter] = None
     ) -> Dict:
         """
         Compute route matrix with automatic batching.
         
+        The matrix is split into 2D tiles (origins × destinations) sized to the
+        element limit. Tiles are sent concurrently through a bounded worker pool
+        behind the shared rate limiter. A failing tile falls back on its own
+        instead of failing the whole matrix.
+        
         Args:
             origins: List of (lat, lng) tuples
             destinations: List of (lat, lng) tuples
             use_traffic: Whether to use traffic
             departure_time: Departure time for traffic
             max_elements: Maximum elements per batch
+            cells: Optional filter of cells to compute (tiles without any are skipped)
             
         Returns:
             Dict with complete distance_matrix and duration_matrix
@@ -349,45 +1063,134 @@ class RoutesAPIService:
         n_destinations = len(destinations)
         
         # Initialize full result matrices
-        full_distance_matrix = [[0] * n_destinations for _ in range(n_origins)]
-        full_duration_matrix = [[0] * n_destinations for _ in range(n_origins)]
+        full_distance_matrix = np.zeros((n_origins, n_destinations), dtype=np.int32)
+        full_duration_matrix = np.zeros((n_origins, n_destinations), dtype=np.int32)
         
-        # Calculate batch size
-        # Strategy: Keep all origins, batch destinations
-        max_dests_per_batch = max_elements // n_origins
+        # Tile both axes so each batch fits the element limit
+        tiles = plan_tiles(n_origins, n_destinations, max_elements)
         
-        logger.info(f"Batching: {n_destinations} destinations into batches of {max_dests_per_batch}")
+        tile_cells = {}
+        if cells is not None:
+            # Shift the filter into tile-local indices and drop empty tiles
+            tiles = [
+                (row_slice, col_slice) for row_slice, col_slice in tiles
+                if any(
+                    cells(i, j)
+                    for i in range(row_slice.start, row_slice.stop)
+                    for j in range(col_slice.start, col_slice.stop)
+                )
+            ]
+            tile_cells = {
+                (row_slice.start, col_slice.start):
+                    lambda i, j, r=row_slice.start, c=col_slice.start: cells(i + r, j + c)
+                for row_slice, col_slice in tiles
+            }
         
-        # Process in batches
-        for batch_start in range(0, n_destinations, max_dests_per_batch):
-            batch_end = min(batch_start + max_dests_per_batch, n_destinations)
-            dest_batch = destinations[batch_start:batch_end]
-            
-            logger.info(f"Processing batch: destinations [{batch_start}:{batch_end}]")
-            
-            # Compute this batch
-            batch_result = self._compute_single_request(
-                origins, dest_batch, use_traffic, departure_time
-            )
-            
-            # Merge results into full matrices
-            for i in range(n_origins):
-                for j in range(len(dest_batch)):
-                    full_distance_matrix[i][batch_start + j] = batch_result["distance_matrix"][i][j]
-                    full_duration_matrix[i][batch_start + j] = batch_result["duration_matrix"][i][j]
+        logger.info(
+            f"Batching: {n_origins} × {n_destinations} matrix into {len(tiles)} tiles "
+            f"({self.max_workers} workers)"
+        )
+        
+        status = "OK"
+        stale_cells = 0
+        fallback_cells = 0
+        billed_elements = 0
+        
+        # Dispatch tiles concurrently; the rate limiter bounds the QPS
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(tiles)))) as executor:
+            futures = {
+                executor.submit(
+                    self._compute_single_request,
+                    origins[row_slice], destinations[col_slice], use_traffic, departure_time,
+                    tile_cells.get((row_slice.start, col_slice.start)),
+                    concurrent=False
+                ): (row_slice, col_slice)
+                for row_slice, col_slice in tiles
+            }
             
-            # Rate limiting: sleep between batches
-            if batch_end < n_destinations:
-                time.sleep(0.1)  # 100ms delay between batches
+            # Assemble results as tiles complete
+            for future in as_completed(futures):
+                row_slice, col_slice = futures[future]
+                
+                try:
+                    batch_result = future.result()
+                except Exception as e:
+                    # Fall back for this tile only
+                    logger.error(
+                        f"Tile origins [{row_slice.start}:{row_slice.stop}] × "
+                        f"destinations [{col_slice.start}:{col_slice.stop}] failed: {e}"
+                    )
+                    batch_result = self._compute_fallback_matrix(
+                        origins[row_slice], destinations[col_slice]
+                    )
+                    ROUTES_API_FALLBACK_CELLS.labels(routes_api_mode(use_traffic)).inc(
+                        batch_result["distance_matrix"].size
+                    )
+                
+                if batch_result["status"] != "OK":
+                    status = batch_result["status"]
+                stale_cells += batch_result.get("stale_cells", 0)
+                fallback_cells += batch_result.get("fallback_cells", 0)
+                billed_elements += batch_result.get("billed_elements", 0)
+                
+                # Merge tile into full matrices
+                full_distance_matrix[row_slice, col_slice] = batch_result["distance_matrix"]
+                full_duration_matrix[row_slice, col_slice] = batch_result["duration_matrix"]
         
         logger.info("Batching complete!")
         
         return {
             "distance_matrix": full_distance_matrix,
             "duration_matrix": full_duration_matrix,
-            "status": "OK"
+            "status": status,
+            "stale_cells": stale_cells,
+            "fallback_cells": fallback_cells,
+            "billed_elements": billed_elements
+        }
+    
+    def _compute_fallback_matrix(
+        self,
+        origins: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]]
+    ) -> Dict:
+        """
+        Build a matrix entirely from Euclidean distances (fallback).
+        
+        Args:
+            origins: List of (lat, lng) tuples
+            destinations: List of (lat, lng) tuples
+            
+        Returns:
+            Dict with distance_matrix, duration_matrix, FALLBACK status and
+            fallback_cells
+        """
+        distance_matrix = haversine_matrix(origins, destinations)
+        
+        return {
+            "distance_matrix": distance_matrix,
+            "duration_matrix": estimate_durations(distance_matrix),
+            "status": "FALLBACK",
+            "fallback_cells": int(distance_matrix.size)
         }
     
+    def _fallback_cell(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float]
+    ) -> Tuple[int, int]:
+        """
+        Euclidean fallback for one cell.
+        
+        Args:
+            origin: (lat, lng) tuple
+            destination: (lat, lng) tuple
+            
+        Returns:
+            (distance in meters, duration in seconds at 60 km/h)
+        """
+        distance = self._calculate_euclidean_distance(origin, destination)
+        return distance, int(distance / 60000 * 3600)
+    
     def _calculate_euclidean_distance(
         self,
         origin: Tuple[float, float],
@@ -403,21 +1206,4 @@ class RoutesAPIService:
         Returns:
             Distance in meters
         """
-        from math import radians, sin, cos, sqrt, atan2
-        
-        lat1, lng1 = origin
-        lat2, lng2 = destination
-        
-        # Haversine formula
-        R = 6371000  # Earth radius in meters
-        
-        lat1_rad = radians(lat1)
-        lat2_rad = radians(lat2)
-        delta_lat = radians(lat2 - lat1)
-        delta_lng = radians(lng2 - lng1)
-        
-        a = sin(delta_lat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lng / 2) ** 2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        
-        distance = R * c
-        return int(distance)
+        return int(haversine_matrix([origin], [destination])[0, 0])
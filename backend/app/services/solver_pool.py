@@ -0,0 +1,265 @@
+"""
+Process pool for OR-Tools solves.
+The solver is CPU-bound and runs while holding the GIL, so
+running it in a thread still stalls the event loop. Solves run in a small
+pool of worker processes instead; requests beyond the pool and its queue
+are rejected so a burst of optimizations cannot pile up unbounded.
+"""
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.metrics import SOLVER_POOL_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+# OptimizationService of the current worker process (created on first solve)
+_service = None
+
+
+class SolverBusyError(Exception):
+    """Raised when every solver worker is busy and the queue is full."""
+
+
+def _init_worker():
+    """Set up a pool process (the parent handles Ctrl+C and shutdown)."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [solver] %(message)s")
+
+
+def run_solver(
+    method: str,
+    kwargs: Dict[str, Any],
+    progress: Optional[Any] = None,
+    cancel_event: Optional[Any] = None
+) -> Dict:
+    """
+    Call an OptimizationService method inside a pool process.
+    
+    Args:
+        method: "solve_tsp" or "solve_cvrp"
+        kwargs: Keyword arguments of the method
+        progress: Queue receiving {"type": "started"} and {"type": "progress", ...} messages
+        cancel_event: Event that cancels the solve
+    
+    Returns:
+        Solver result dict
+    """
+    global _service
+    
+    if _service is None:
+        from app.services.optimization_service import OptimizationService
+        _service = OptimizationService()
+    
+    if progress is not None:
+        progress.put({"type": "started"})
+        kwargs = dict(kwargs, on_progress=lambda report: progress.put({"type": "progress", **report}))
+    if cancel_event is not None:
+        kwargs = dict(kwargs, cancel_event=cancel_event)
+    return getattr(_service, method)(**kwargs)
+
+
+class SolverPool:
+    """
+    Size-limited executor for solver calls with admission control.
+    
+    At most max_workers solves run at once and max_queued more wait for a
+    worker; further calls raise SolverBusyError. A call keeps its slot
+    until the solve actually finishes, even if the awaiting request was
+    cancelled.
+    """
+    
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        use_processes: Optional[bool] = None
+    ):
+        """
+        Initialize solver pool.
+        
+        Args:
+            max_workers: Concurrent solves (defaults to SOLVER_POOL_SIZE)
+            max_queued: Solves allowed to wait for a worker (defaults to SOLVER_POOL_MAX_QUEUED)
+            use_processes: Worker processes, or threads when False (defaults to SOLVER_POOL_USE_PROCESSES)
+        """
+        self.max_workers = max(1, settings.SOLVER_POOL_SIZE if max_workers is None else max_workers)
+        self.max_queued = max(0, settings.SOLVER_POOL_MAX_QUEUED if max_queued is None else max_queued)
+        self.use_processes = settings.SOLVER_POOL_USE_PROCESSES if use_processes is None else use_processes
+        self._executor: Optional[Executor] = None
+        self._manager = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+    
+    @property
+    def capacity(self) -> int:
+        """Maximum solves running or queued at once."""
+        return self.max_workers + self.max_queued
+    
+    def _create_executor(self) -> Executor:
+        if self.use_processes:
+            # spawn: forked children would inherit the parent's Redis/DB sockets and locks
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="solver")
+    
+    def start(self):
+        """Create the executor (idempotent; worker processes start on first use)."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+                logger.info(
+                    f"Solver pool started: {self.max_workers} "
+                    f"{'processes' if self.use_processes else 'threads'}, {self.max_queued} queued"
+                )
+    
+    def stop(self):
+        """Shut the executor down, cancelling queued solves."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            manager, self._manager = self._manager, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.info("Solver pool stopped")
+        if manager is not None:
+            manager.shutdown()
+    
+    def create_channel(self) -> Tuple[Any, Any]:
+        """
+        Create a progress queue and cancel event usable by pool workers.
+        
+        Process workers get proxies from a shared multiprocessing manager
+        (started on first use); thread workers get plain objects.
+        
+        Returns:
+            (queue, event)
+        """
+        if not self.use_processes:
+            return queue.Queue(), threading.Event()
+        
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            manager = self._manager
+        return manager.Queue(), manager.Event()
+    
+    def _restart(self, broken: Executor):
+        """Replace an executor whose worker process died."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._create_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.error("Solver worker process died, pool restarted")
+    
+    def _admit(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                SOLVER_POOL_REJECTIONS.inc()
+                raise SolverBusyError(
+                    f"All {self.max_workers} solver workers are busy and {self.max_queued} solves are queued"
+                )
+            self._in_flight += 1
+    
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+    
+    def _finished(self, executor: Executor, future: Future):
+        self._release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._restart(executor)
+    
+    def submit(self, fn: Callable, *args) -> Future:
+        """
+        Submit a picklable function to the pool.
+        
+        Admission is decided right away, so callers can reject a request
+        before starting any background work.
+        
+        Args:
+            fn: Module-level function
+            *args: Picklable arguments
+        
+        Returns:
+            Future of the call (cancelling it drops a solve still queued)
+        
+        Raises:
+            SolverBusyError: If the pool and its queue are full
+        """
+        self.start()
+        self._admit()
+        
+        executor = self._executor
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(partial(self._finished, executor))
+        return future
+    
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run a picklable function in the pool and await its result.
+        
+        Args:
+            fn: Module-level function
+            *args: Picklable arguments
+        
+        Returns:
+            Return value of fn
+        
+        Raises:
+            SolverBusyError: If the pool and its queue are full
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args))
+    
+    async def solve(self, method: str, **kwargs) -> Dict:
+        """
+        Run an OptimizationService solve in the pool.
+        
+        Args:
+            method: "solve_tsp" or "solve_cvrp"
+            **kwargs: Keyword arguments of the method
+        
+        Returns:
+            Solver result dict
+        
+        Raises:
+            SolverBusyError: If the pool and its queue are full
+        """
+        return await self.run(run_solver, method, kwargs)
+    
+    def snapshot(self) -> Dict:
+        """
+        Describe the pool for stats endpoints.
+        
+        Returns:
+            Dict with workers, queue size, solves in flight and rejections
+        """
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "mode": "processes" if self.use_processes else "threads",
+                "max_queued": self.max_queued,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected
+            }
+
+
+# Process-wide pool used by the optimization endpoints
+solver_pool = SolverPool()
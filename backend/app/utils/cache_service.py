@@ -6,9 +6,17 @@ import redis
 import json
 import hashlib
 import logging
-from typing import Optional, Dict, Any, Tuple
-from datetime import datetime, time
+import threading
+from typing import Optional, Dict, Any, Tuple, List, Sequence, Callable, Iterator
+from datetime import datetime, time, timedelta
+from time import monotonic
 from app.config import settings
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.geo import pack_coordinate, quantization_error_meters
+from app.utils.local_cache import LocalCache, local_cache as shared_local_cache, solution_local_cache
+from app.utils.metrics import CACHE_STALE_HITS, record_cache_lookups
+from app.utils.rate_limiter import TokenBucketRateLimiter
+from app.utils.redis_client import close_redis_client, get_redis_client, redis_circuit_breaker
 
 logger = logging.getLogger(__name__)
 
@@ -18,80 +26,167 @@ class CacheService:
     2-Layer Redis caching service for route optimization.
     
     Layer 1: Base Distance Cache (static, 30 days TTL)
-    - Caches distance in meters between two points
-    - Key format: distance:static:{hash}
+    - Caches distance in meters and static (no traffic) duration between
+      two points, packed into one value
+    - Key format: distance:static:q{precision}:{origin}:{destination}
+    
+    Negative entries (short TTL) mark pairs the Routes API failed for, so
+    repeated requests serve their fallback without calling the API again:
+    - Key format: distance:unroutable:q{precision}:{origin}:{destination}
+    - Value: reason (NEGATIVE_UNROUTABLE or NEGATIVE_REQUEST_FAILED)
     
     Layer 2: Traffic Duration Cache (dynamic, 15-60 min TTL)
     - Caches duration with traffic consideration
-    - Key format: duration:traffic:{hash}
+    - Key format: duration:traffic:q{precision}:{origin}:{destination}:{bucket}:{day}
+    
+    Coordinates in keys are snapped to a decimal grid and packed into
+    integers, so nearby re-entered points share entries and no hashing
+    is needed. Legacy SHA-256 Layer 1 keys are still read and migrated.
+    
+    With CACHE_LAYOUT="row" each layer stores one Redis hash per origin
+    (fields are destinations), so a matrix row is one HMGET / HSET and the
+    TTL applies to the whole row:
+    - distance:row:q{precision}:{origin}
+    - duration:row:q{precision}:{origin}:{bucket}:{day}
+    
+    Both layers expose bulk variants (``*_bulk``) that resolve many pairs
+    with one Redis round trip per chunk (MGET / pipelined SETEX).
+    
+    Layer 0: In-process LRU (per worker, shared by all instances)
+    - Checked before Redis for both layers, filled on Redis hits and writes
+    - Traffic entries never outlive their hard TTL
+    
+    Redis calls go through a circuit breaker: after
+    CACHE_CIRCUIT_FAILURE_THRESHOLD consecutive errors Redis is skipped
+    for CACHE_CIRCUIT_COOLDOWN_SECONDS instead of waiting on timeouts.
+    The application uses one instance per process (get_cache_service).
+    
+    Layer 2 is stale-while-revalidate: the dynamic TTL is a soft expiry
+    stored inside the value, while Redis keeps the entry for the hard TTL
+    (soft TTL × CACHE_TRAFFIC_HARD_TTL_FACTOR). Entries past the soft TTL
+    are still served, flagged stale, so callers can refresh them.
+    
+    Solved TSP/CVRP results are cached as JSON under
+    solution:result:{fingerprint}, with a small in-process LRU as fallback
+    while Redis is unavailable.
+    
+    Each namespace ("distance", "duration", "solution") has a generation counter in
+    Redis. Keys of generation N > 0 carry a "g{N}:" segment after the
+    layer prefix (e.g. distance:static:g3:q5:...), so invalidating a
+    namespace is one HINCRBY: old keys stop being read and age out by TTL
+    (or are removed by cleanup_old_generations). Generation 0 keeps the
+    unversioned formats above. Workers re-read the counters every
+    CACHE_GENERATION_REFRESH_SECONDS.
     """
     
-    def __init__(self, redis_client: Optional[redis.Redis] = None):
+    # Layer 1 TTL (30 days)
+    BASE_DISTANCE_TTL = 30 * 24 * 60 * 60
+    
+    # Layer 1 values pack the static duration + 1 (0 = unknown) above the distance
+    DISTANCE_BITS = 32
+    DISTANCE_MASK = (1 << DISTANCE_BITS) - 1
+    
+    # Negative entry reasons
+    NEGATIVE_UNROUTABLE = 1      # The API returned a non-OK status for the pair
+    NEGATIVE_REQUEST_FAILED = 2  # The whole API request failed
+    
+    # Layer 2 values pack the soft expiry (epoch seconds) above the duration
+    DURATION_BITS = 20
+    DURATION_MASK = (1 << DURATION_BITS) - 1
+    
+    # Max keys per MGET / pipeline round trip
+    BULK_CHUNK_SIZE = 1000
+    
+    # Versioned key namespaces and the Redis hash holding their generations
+    NAMESPACES = ("distance", "duration", "solution")
+    GENERATIONS_KEY = "cache:generations"
+    
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        local_cache: Optional[LocalCache] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        solution_cache: Optional[LocalCache] = None
+    ):
         """
         Initialize cache service.
         
         Args:
-            redis_client: Optional Redis client instance (creates new if None)
+            redis_client: Optional Redis client instance (uses the process-wide pooled client if None)
+            local_cache: Optional Layer 0 cache (uses the process-wide one if None)
+            circuit_breaker: Optional breaker for Redis calls (the process-wide one
+                             for the shared client, a private one otherwise)
+            solution_cache: Optional in-process solution LRU (uses the process-wide one if None)
         """
-        self.redis_client = redis_client or self._create_redis_client()
-        self.enabled = self._check_redis_connection()
+        if redis_client is None:
+            self.redis_client = get_redis_client()
+            self.circuit_breaker = circuit_breaker or redis_circuit_breaker
+        else:
+            self.redis_client = redis_client
+            self.circuit_breaker = circuit_breaker or CircuitBreaker(
+                failure_threshold=settings.CACHE_CIRCUIT_FAILURE_THRESHOLD,
+                cooldown_seconds=settings.CACHE_CIRCUIT_COOLDOWN_SECONDS
+            )
+        self.local_cache = shared_local_cache if local_cache is None else local_cache
+        self.solution_cache = solution_local_cache if solution_cache is None else solution_cache
+        self.key_precision = settings.CACHE_KEY_PRECISION
+        self.key_scale = 10 ** self.key_precision
+        self.legacy_fallback = settings.CACHE_KEY_LEGACY_FALLBACK
+        self.layout = settings.CACHE_LAYOUT
+        # Wall clock for Layer 2 soft expiry (epoch seconds, injectable for tests)
+        self.clock: Callable[[], float] = lambda: datetime.now().timestamp()
         
         # Cache statistics
-        self.stats = {
-            "layer1_hits": 0,
-            "layer1_misses": 0,
-            "layer2_hits": 0,
-            "layer2_misses": 0
-        }
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        
+        # Namespace generations (refreshed from Redis periodically)
+        self._generations: Dict[str, int] = {namespace: 0 for namespace in self.NAMESPACES}
+        self._generations_loaded_at: Optional[float] = None
+        self._cleanup_lock = threading.Lock()
+        
+        self._connected = self._check_redis_connection()
+        if self._connected:
+            self._load_generations()
     
-    def _create_redis_client(self) -> redis.Redis:
-        """Create Redis client from settings."""
-        try:
-            # For Redis Cloud with SSL/TLS
-            if settings.REDIS_SSL:
-                client = redis.Redis(
-                    host=settings.REDIS_HOST,
-                    port=settings.REDIS_PORT,
-                    username=settings.REDIS_USERNAME if settings.REDIS_USERNAME else None,
-                    password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
-                    db=settings.REDIS_DB,
-                    ssl=True,
-                    ssl_cert_reqs='none',  # String 'none' instead of None
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_timeout=5
-                )
-            else:
-                # For local Redis without SSL
-                client = redis.Redis(
-                    host=settings.REDIS_HOST,
-                    port=settings.REDIS_PORT,
-                    username=settings.REDIS_USERNAME if settings.REDIS_USERNAME else None,
-                    password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
-                    db=settings.REDIS_DB,
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_timeout=5
-                )
-            return client
-        except Exception as e:
-            logger.error(f"Failed to create Redis client: {e}")
-            return None
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether Redis should be used right now.
+        
+        False while the circuit breaker is open. After the cool-down a
+        service that never connected pings Redis again.
+        """
+        if not self.redis_client or not self.circuit_breaker.allow_request():
+            return False
+        if not self._connected:
+            self._connected = self._check_redis_connection()
+        return self._connected
     
     def _check_redis_connection(self) -> bool:
-        """Check if Redis is available."""
+        """Check if Redis is available (a failed ping opens the circuit)."""
         if not self.redis_client:
             logger.warning("Redis client not initialized. Caching disabled.")
             return False
         
         try:
             self.redis_client.ping()
+            self.circuit_breaker.record_success()
             logger.info("Redis connection successful")
             return True
         except Exception as e:
-            logger.warning(f"Redis connection failed: {e}. Caching disabled.")
+            self.circuit_breaker.trip()
+            logger.warning(
+                f"Redis connection failed: {e}. Caching disabled for "
+                f"{self.circuit_breaker.cooldown_seconds:g}s."
+            )
             return False
     
+    def _count(self, key: str, amount: int):
+        """Add to a statistics counter (shared by concurrent batch threads)."""
+        with self._stats_lock:
+            self.stats[key] += amount
+    
     def _generate_hash(self, *args) -> str:
         """
         Generate consistent hash from arguments.
@@ -105,6 +200,374 @@ class CacheService:
         content = ":".join(str(arg) for arg in args)
         return hashlib.sha256(content.encode()).hexdigest()[:16]
     
+    def _load_generations(self):
+        """
+        Re-read namespace generations from Redis.
+        
+        Best effort: on errors the last known generations stay in use and
+        the next refresh interval retries.
+        """
+        self._generations_loaded_at = monotonic()
+        if not self.redis_client or not self.circuit_breaker.allow_request():
+            return
+        
+        try:
+            raw = self.redis_client.hgetall(self.GENERATIONS_KEY)
+            self._generations = {
+                namespace: int(raw.get(namespace, 0)) for namespace in self.NAMESPACES
+            }
+        except Exception as e:
+            logger.warning(f"Could not read cache generations: {e}")
+    
+    def get_generation(self, namespace: str) -> int:
+        """
+        Current generation of a key namespace.
+        
+        Args:
+            namespace: "distance", "duration" or "solution"
+        
+        Returns:
+            Generation number (0 until the namespace is first invalidated)
+        """
+        if (
+            self._generations_loaded_at is None
+            or monotonic() - self._generations_loaded_at >= settings.CACHE_GENERATION_REFRESH_SECONDS
+        ):
+            self._load_generations()
+        return self._generations.get(namespace, 0)
+    
+    def _key_prefix(self, namespace: str, kind: str) -> str:
+        """Key prefix for a namespace and key kind at the current generation."""
+        generation = self.get_generation(namespace)
+        if generation == 0:
+            return f"{namespace}:{kind}:"
+        return f"{namespace}:{kind}:g{generation}:"
+    
+    @staticmethod
+    def _key_generation(key: str) -> int:
+        """Generation encoded in a cache key (0 for unversioned keys)."""
+        parts = key.split(":", 3)
+        if len(parts) > 2 and parts[2][:1] == "g" and parts[2][1:].isdigit():
+            return int(parts[2][1:])
+        return 0
+    
+    def _pair_key(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float]
+    ) -> str:
+        """Quantized, integer-packed key fragment for an origin/destination pair."""
+        scale = self.key_scale
+        return (
+            f"q{self.key_precision}:{pack_coordinate(origin[0], origin[1], scale)}"
+            f":{pack_coordinate(destination[0], destination[1], scale)}"
+        )
+    
+    def _base_distance_key(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float]
+    ) -> str:
+        """Build Layer 1 key for an origin/destination pair."""
+        return f"{self._key_prefix('distance', 'static')}{self._pair_key(origin, destination)}"
+    
+    def _negative_key(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float]
+    ) -> str:
+        """Build the negative entry key for an origin/destination pair."""
+        return f"{self._key_prefix('distance', 'unroutable')}{self._pair_key(origin, destination)}"
+    
+    def _negative_ttl(self, reason: int) -> int:
+        """Redis TTL of a negative entry for a failure reason."""
+        if reason == self.NEGATIVE_REQUEST_FAILED:
+            return settings.CACHE_NEGATIVE_FAILURE_TTL_SECONDS
+        return settings.CACHE_NEGATIVE_TTL_SECONDS
+    
+    def _legacy_base_distance_key(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float]
+    ) -> str:
+        """Build the pre-quantization (SHA-256 of raw floats) Layer 1 key."""
+        return f"distance:static:{self._generate_hash(origin, destination)}"
+    
+    def _traffic_duration_key(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float],
+        departure_time: datetime
+    ) -> str:
+        """Build Layer 2 key for an origin/destination pair and departure time."""
+        time_bucket = self._get_time_bucket(departure_time)
+        day_of_week = departure_time.strftime("%A")  # Monday, Tuesday, etc.
+        return (
+            f"{self._key_prefix('duration', 'traffic')}{self._pair_key(origin, destination)}"
+            f":{time_bucket}:{day_of_week}"
+        )
+    
+    def _base_distance_row(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float]
+    ) -> Tuple[str, str]:
+        """Build Layer 1 (hash key, field) for the row layout."""
+        scale = self.key_scale
+        return (
+            f"{self._key_prefix('distance', 'row')}q{self.key_precision}"
+            f":{pack_coordinate(origin[0], origin[1], scale)}",
+            str(pack_coordinate(destination[0], destination[1], scale))
+        )
+    
+    def _traffic_duration_row(
+        self,
+        origin: Tuple[float, float],
+        destination: Tuple[float, float],
+        departure_time: datetime
+    ) -> Tuple[str, str]:
+        """Build Layer 2 (hash key, field) for the row layout."""
+        scale = self.key_scale
+        time_bucket = self._get_time_bucket(departure_time)
+        day_of_week = departure_time.strftime("%A")
+        return (
+            f"{self._key_prefix('duration', 'row')}q{self.key_precision}"
+            f":{pack_coordinate(origin[0], origin[1], scale)}:{time_bucket}:{day_of_week}",
+            str(pack_coordinate(destination[0], destination[1], scale))
+        )
+    
+    def _mget_ints(self, keys: List[str]) -> List[Optional[int]]:
+        """
+        Fetch integer values for many keys, one MGET per chunk.
+        
+        Args:
+            keys: Redis keys to fetch
+            
+        Returns:
+            List aligned with keys (None for missing values)
+        """
+        values: List[Optional[int]] = []
+        for start in range(0, len(keys), self.BULK_CHUNK_SIZE):
+            chunk = keys[start:start + self.BULK_CHUNK_SIZE]
+            raw_values = self.redis_client.mget(chunk)
+            values.extend(int(value) if value else None for value in raw_values)
+        return values
+    
+    def _setex_many(self, entries: List[Tuple[str, int, int]]):
+        """
+        Write many keys with TTL, one pipeline round trip per chunk.
+        
+        Args:
+            entries: List of (key, ttl_seconds, value) tuples
+        """
+        for start in range(0, len(entries), self.BULK_CHUNK_SIZE):
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, ttl, value in entries[start:start + self.BULK_CHUNK_SIZE]:
+                pipe.setex(key, ttl, value)
+            pipe.execute()
+    
+    def _hmget_ints(self, cells: List[Tuple[str, str]]) -> List[Optional[int]]:
+        """
+        Fetch integer hash fields, one HMGET per row, pipelined per chunk.
+        
+        Args:
+            cells: List of (hash key, field) tuples
+            
+        Returns:
+            List aligned with cells (None for missing values)
+        """
+        rows: Dict[str, List[int]] = {}
+        for index, (row, _) in enumerate(cells):
+            rows.setdefault(row, []).append(index)
+        
+        values: List[Optional[int]] = [None] * len(cells)
+        row_items = list(rows.items())
+        
+        start = 0
+        while start < len(row_items):
+            # Chunk by fields, not rows, so one pipeline stays bounded
+            pipe = self.redis_client.pipeline(transaction=False)
+            batch = []
+            fields = 0
+            while start < len(row_items) and fields < self.BULK_CHUNK_SIZE:
+                row, indices = row_items[start]
+                pipe.hmget(row, [cells[i][1] for i in indices])
+                batch.append(indices)
+                fields += len(indices)
+                start += 1
+            
+            for indices, raw_values in zip(batch, pipe.execute()):
+                for i, value in zip(indices, raw_values):
+                    values[i] = int(value) if value else None
+        
+        return values
+    
+    def _hset_many(self, entries: List[Tuple[str, str, int]], ttl: int):
+        """
+        Write many hash fields, one HSET + EXPIRE per row, pipelined per chunk.
+        
+        The TTL is refreshed for the whole row on every write, so Layer 2
+        values carry their own expiry (see _unpack_duration).
+        
+        Args:
+            entries: List of (hash key, field, value) tuples
+            ttl: Row TTL in seconds
+        """
+        rows: Dict[str, Dict[str, int]] = {}
+        for row, field, value in entries:
+            rows.setdefault(row, {})[field] = int(value)
+        
+        row_items = list(rows.items())
+        start = 0
+        while start < len(row_items):
+            pipe = self.redis_client.pipeline(transaction=False)
+            fields = 0
+            while start < len(row_items) and fields < self.BULK_CHUNK_SIZE:
+                row, mapping = row_items[start]
+                pipe.hset(row, mapping=mapping)
+                pipe.expire(row, ttl)
+                fields += len(mapping)
+                start += 1
+            pipe.execute()
+    
+    def _redis_read(
+        self,
+        keys: List[str],
+        cells: Optional[List[Tuple[str, str]]],
+        indices: List[int]
+    ) -> List[Optional[int]]:
+        """Read the given indices from the active layout (string keys or row hashes)."""
+        if cells is not None:
+            return self._hmget_ints([cells[i] for i in indices])
+        return self._mget_ints([keys[i] for i in indices])
+    
+    def _redis_write(
+        self,
+        keys: List[str],
+        cells: Optional[List[Tuple[str, str]]],
+        ttl: int,
+        items: List[Tuple[int, int]]
+    ):
+        """Write (index, value) items to the active layout (string keys or row hashes)."""
+        if cells is not None:
+            self._hset_many([(cells[i][0], cells[i][1], value) for i, value in items], ttl)
+        else:
+            self._setex_many([(keys[i], ttl, value) for i, value in items])
+    
+    def _local_ttl(self, departure_time: Optional[datetime] = None) -> int:
+        """
+        Layer 0 lifetime for an entry.
+        
+        Args:
+            departure_time: Departure time for traffic entries (None for Layer 1)
+            
+        Returns:
+            TTL in seconds
+        """
+        if departure_time is None:
+            return min(settings.CACHE_LOCAL_TTL_SECONDS, self.BASE_DISTANCE_TTL)
+        return min(settings.CACHE_LOCAL_TTL_SECONDS, self._get_hard_ttl(departure_time))
+    
+    def _lookup_many(
+        self,
+        keys: List[str],
+        layer: str,
+        local_ttl: int,
+        legacy_keys: Optional[List[str]] = None,
+        cells: Optional[List[Tuple[str, str]]] = None,
+        count_misses: bool = True
+    ) -> List[Optional[int]]:
+        """
+        Resolve keys from Layer 0, then Redis for the rest.
+        
+        Redis hits are copied into Layer 0. Redis errors count as misses
+        so Layer 0 hits are still returned.
+        
+        Args:
+            keys: Pair keys (Layer 0, and Redis in the pair layout)
+            layer: Stats prefix ("layer1", "layer2" or "negative")
+            local_ttl: Layer 0 lifetime for entries found in Redis
+            legacy_keys: Optional old-format keys aligned with keys, read for
+                         remaining misses and rewritten under the new key
+            cells: Optional (hash key, field) tuples aligned with keys for
+                   the row layout
+            count_misses: Whether misses count in stats (False when the
+                          caller looks them up elsewhere and counts them there)
+            
+        Returns:
+            List aligned with keys (None for missing values)
+        """
+        values = self.local_cache.get_many(keys)
+        missing = [i for i, value in enumerate(values) if value is None]
+        local_hits = len(keys) - len(missing)
+        
+        if missing:
+            try:
+                fetched = self._redis_read(keys, cells, missing)
+                self.circuit_breaker.record_success()
+            except Exception as e:
+                self.circuit_breaker.record_failure()
+                logger.error(f"Error getting {layer} values from Redis: {e}")
+                fetched = [None] * len(missing)
+            
+            for i, value in zip(missing, fetched):
+                values[i] = value
+            
+            if legacy_keys is not None:
+                self._migrate_legacy(keys, legacy_keys, values, missing, layer, cells)
+            
+            self.local_cache.set_many(
+                ((keys[i], values[i]) for i in missing if values[i] is not None),
+                local_ttl
+            )
+        
+        hits = sum(1 for value in values if value is not None)
+        misses = len(values) - hits if count_misses else 0
+        self._count(f"{layer}_hits", hits)
+        self._count(f"{layer}_local_hits", local_hits)
+        self._count(f"{layer}_misses", misses)
+        record_cache_lookups(layer, local_hits, hits - local_hits, misses)
+        return values
+    
+    def _migrate_legacy(
+        self,
+        keys: List[str],
+        legacy_keys: List[str],
+        values: List[Optional[int]],
+        candidates: List[int],
+        layer: str,
+        cells: Optional[List[Tuple[str, str]]] = None
+    ):
+        """
+        Fill remaining misses from legacy keys and copy hits to the new keys.
+        
+        Args:
+            keys: New-format keys
+            legacy_keys: Legacy keys aligned with keys
+            values: Values aligned with keys (updated in place)
+            candidates: Indices that missed Layer 0
+            layer: Stats prefix
+            cells: Row-layout cells aligned with keys (None for the pair layout)
+        """
+        missing = [i for i in candidates if values[i] is None]
+        if not missing:
+            return
+        
+        try:
+            fetched = self._mget_ints([legacy_keys[i] for i in missing])
+            migrated = []
+            for i, value in zip(missing, fetched):
+                if value is not None:
+                    values[i] = value
+                    migrated.append((i, value))
+            
+            if migrated:
+                self._redis_write(keys, cells, self.BASE_DISTANCE_TTL, migrated)
+                self._count(f"{layer}_legacy_hits", len(migrated))
+        except Exception as e:
+            self.circuit_breaker.record_failure()
+            logger.error(f"Error migrating legacy {layer} keys: {e}")
+    
     def _get_time_bucket(self, dt: Optional[datetime] = None) -> str:
         """
         Get time bucket for traffic caching.
@@ -161,6 +624,85 @@ class CacheService:
         
         return ttl_map.get(time_bucket, 1800)
     
+    def _get_hard_ttl(self, dt: Optional[datetime] = None) -> int:
+        """
+        Calculate how long Layer 2 entries stay servable (as stale) in Redis.
+        
+        Args:
+            dt: Datetime for TTL calculation (defaults to now)
+            
+        Returns:
+            TTL in seconds (dynamic TTL × CACHE_TRAFFIC_HARD_TTL_FACTOR)
+        """
+        return self._get_dynamic_ttl(dt) * max(1, settings.CACHE_TRAFFIC_HARD_TTL_FACTOR)
+    
+    def dynamic_ttl(self, dt: Optional[datetime] = None) -> int:
+        """
+        How long traffic data stays fresh at a time of day (the Layer 2 soft TTL).
+        
+        Args:
+            dt: Datetime for TTL calculation (defaults to now)
+            
+        Returns:
+            TTL in seconds
+        """
+        return self._get_dynamic_ttl(dt)
+    
+    def _pack_route(self, distance_meters: int, duration_seconds: Optional[int]) -> int:
+        """Pack a distance with its static duration (None if unknown) into one Layer 1 value."""
+        distance = min(int(distance_meters), self.DISTANCE_MASK)
+        if duration_seconds is None:
+            return distance
+        return ((int(duration_seconds) + 1) << self.DISTANCE_BITS) | distance
+    
+    def _unpack_route(self, value: int) -> Tuple[int, Optional[int]]:
+        """
+        Split a Layer 1 value into (distance, static duration).
+        
+        Values written before durations were cached are plain distances
+        and carry no duration.
+        """
+        duration = value >> self.DISTANCE_BITS
+        return value & self.DISTANCE_MASK, duration - 1 if duration else None
+    
+    def _pack_duration(self, duration_seconds: int, soft_expires_at: int) -> int:
+        """Pack a duration with its soft expiry into one Layer 2 value."""
+        return (soft_expires_at << self.DURATION_BITS) | min(int(duration_seconds), self.DURATION_MASK)
+    
+    def _unpack_duration(self, value: int, now: float, ttl: int) -> Optional[Tuple[int, bool]]:
+        """
+        Split a Layer 2 value into (duration, stale), or None past its hard expiry.
+        
+        The hard expiry is derived from the packed soft expiry and the
+        bucket's dynamic TTL, so a field of a row hash (whose Redis TTL is
+        refreshed by every write to the row) still expires on its own.
+        Values written before soft expiry existed carry no expiry and are stale.
+        """
+        soft_expires_at = value >> self.DURATION_BITS
+        hard_expires_at = soft_expires_at + (max(1, settings.CACHE_TRAFFIC_HARD_TTL_FACTOR) - 1) * ttl
+        if soft_expires_at and hard_expires_at <= now:
+            return None
+        return value & self.DURATION_MASK, soft_expires_at <= now
+    
+    def _lookup_traffic(
+        self,
+        pairs: Sequence[Tuple[Tuple[float, float], Tuple[float, float]]],
+        departure_time: datetime,
+        count_misses: bool = True
+    ) -> List[Optional[int]]:
+        """Read packed Layer 2 values for a departure time's bucket."""
+        keys = [
+            self._traffic_duration_key(origin, destination, departure_time)
+            for origin, destination in pairs
+        ]
+        cells = (
+            [self._traffic_duration_row(origin, destination, departure_time) for origin, destination in pairs]
+            if self.layout == "row" else None
+        )
+        return self._lookup_many(
+            keys, "layer2", self._local_ttl(departure_time), cells=cells, count_misses=count_misses
+        )
+    
     # Layer 1: Base Distance Cache (Static)
     
     def get_base_distance(
@@ -178,22 +720,7 @@ class CacheService:
         Returns:
             Distance in meters, or None if not cached
         """
-        if not self.enabled:
-            return None
-        
-        try:
-            key = f"distance:static:{self._generate_hash(origin, destination)}"
-            value = self.redis_client.get(key)
-            
-            if value:
-                self.stats["layer1_hits"] += 1
-                return int(value)
-            else:
-                self.stats["layer1_misses"] += 1
-                return None
-        except Exception as e:
-            logger.error(f"Error getting base distance from cache: {e}")
-            return None
+        return self.get_base_distances_bulk([(origin, destination)])[0]
     
     def set_base_distance(
         self,
@@ -212,17 +739,7 @@ class CacheService:
         Returns:
             True if successful, False otherwise
         """
-        if not self.enabled:
-            return False
-        
-        try:
-            key = f"distance:static:{self._generate_hash(origin, destination)}"
-            ttl = 30 * 24 * 60 * 60  # 30 days
-            self.redis_client.setex(key, ttl, distance_meters)
-            return True
-        except Exception as e:
-            logger.error(f"Error setting base distance in cache: {e}")
-            return False
+        return self.set_base_distances_bulk([(origin, destination, distance_meters)])
     
     # Layer 2: Traffic Duration Cache (Dynamic)
     
@@ -243,28 +760,7 @@ class CacheService:
         Returns:
             Duration in seconds, or None if not cached
         """
-        if not self.enabled:
-            return None
-        
-        try:
-            if departure_time is None:
-                departure_time = datetime.now()
-            
-            time_bucket = self._get_time_bucket(departure_time)
-            day_of_week = departure_time.strftime("%A")  # Monday, Tuesday, etc.
-            
-            key = f"duration:traffic:{self._generate_hash(origin, destination, time_bucket, day_of_week)}"
-            value = self.redis_client.get(key)
-            
-            if value:
-                self.stats["layer2_hits"] += 1
-                return int(value)
-            else:
-                self.stats["layer2_misses"] += 1
-                return None
-        except Exception as e:
-            logger.error(f"Error getting traffic duration from cache: {e}")
-            return None
+        return self.get_traffic_durations_bulk([(origin, destination)], departure_time)[0]
     
     def set_traffic_duration(
         self,
@@ -282,26 +778,406 @@ class CacheService:
             duration_seconds: Duration in seconds
             departure_time: Departure time (defaults to now)
             
+        Returns:
+            True if successful, False otherwise
+        """
+        return self.set_traffic_durations_bulk([(origin, destination, duration_seconds)], departure_time)
+    
+    # Bulk operations (matrix lookups)
+    
+    def get_base_distances_bulk(
+        self,
+        pairs: Sequence[Tuple[Tuple[float, float], Tuple[float, float]]]
+    ) -> List[Optional[int]]:
+        """
+        Get cached base distances for many pairs in a few round trips.
+        
+        Args:
+            pairs: List of (origin, destination) tuples
+        
+        Returns:
+            List aligned with pairs (distance in meters, or None if not cached)
+        """
+        return [None if route is None else route[0] for route in self.get_base_routes_bulk(pairs)]
+    
+    def get_base_routes_bulk(
+        self,
+        pairs: Sequence[Tuple[Tuple[float, float], Tuple[float, float]]]
+    ) -> List[Optional[Tuple[int, Optional[int]]]]:
+        """
+        Get cached base distances and static durations for many pairs.
+        
+        Args:
+            pairs: List of (origin, destination) tuples
+        
+        Returns:
+            List aligned with pairs ((distance in meters, static duration in
+            seconds or None if unknown), or None if not cached)
+        """
+        if not self.enabled or not pairs:
+            return [None] * len(pairs)
+        
+        try:
+            keys = [self._base_distance_key(origin, destination) for origin, destination in pairs]
+            # Legacy keys predate generations; an invalidation retires them too
+            legacy_keys = (
+                [self._legacy_base_distance_key(origin, destination) for origin, destination in pairs]
+                if self.legacy_fallback and self.get_generation("distance") == 0 else None
+            )
+            cells = (
+                [self._base_distance_row(origin, destination) for origin, destination in pairs]
+                if self.layout == "row" else None
+            )
+            values = self._lookup_many(keys, "layer1", self._local_ttl(), legacy_keys, cells)
+            return [None if value is None else self._unpack_route(value) for value in values]
+        except Exception as e:
+            logger.error(f"Error getting base distances from cache: {e}")
+            return [None] * len(pairs)
+    
+    def set_base_distances_bulk(
+        self,
+        entries: Sequence[Tuple[Tuple[float, float], Tuple[float, float], int]]
+    ) -> bool:
+        """
+        Cache base distances (without static durations) for many pairs.
+        
+        Args:
+            entries: List of (origin, destination, distance_meters) tuples
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        return self.set_base_routes_bulk(
+            [(origin, destination, distance, None) for origin, destination, distance in entries]
+        )
+    
+    def set_base_routes_bulk(
+        self,
+        entries: Sequence[Tuple[Tuple[float, float], Tuple[float, float], int, Optional[int]]]
+    ) -> bool:
+        """
+        Cache base distances and static durations for many pairs in a few round trips.
+        
+        Args:
+            entries: List of (origin, destination, distance_meters, duration_seconds)
+                     tuples (duration None if unknown)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.enabled:
+            return False
+        if not entries:
+            return True
+        
+        try:
+            keys = [self._base_distance_key(origin, destination) for origin, destination, _, _ in entries]
+            cells = (
+                [self._base_distance_row(origin, destination) for origin, destination, _, _ in entries]
+                if self.layout == "row" else None
+            )
+            values = [self._pack_route(distance, duration) for _, _, distance, duration in entries]
+            self._redis_write(keys, cells, self.BASE_DISTANCE_TTL, list(enumerate(values)))
+            self.circuit_breaker.record_success()
+            self.local_cache.set_many(zip(keys, values), self._local_ttl())
+            return True
+        except Exception as e:
+            self.circuit_breaker.record_failure()
+            logger.error(f"Error setting base distances in cache: {e}")
+            return False
+    
+    def get_negative_bulk(
+        self,
+        pairs: Sequence[Tuple[Tuple[float, float], Tuple[float, float]]]
+    ) -> List[Optional[int]]:
+        """
+        Get negative entries for many pairs.
+        
+        Args:
+            pairs: List of (origin, destination) tuples
+        
+        Returns:
+            List aligned with pairs (failure reason, or None if the pair has
+            no negative entry)
+        """
+        if not self.enabled or not pairs:
+            return [None] * len(pairs)
+        
+        try:
+            keys = [self._negative_key(origin, destination) for origin, destination in pairs]
+            # Layer 0 cannot tell the reasons apart, so it keeps entries for the shortest TTL
+            local_ttl = min(
+                settings.CACHE_LOCAL_TTL_SECONDS,
+                self._negative_ttl(self.NEGATIVE_UNROUTABLE),
+                self._negative_ttl(self.NEGATIVE_REQUEST_FAILED)
+            )
+            return self._lookup_many(keys, "negative", local_ttl)
+        except Exception as e:
+            logger.error(f"Error getting negative entries from cache: {e}")
+            return [None] * len(pairs)
+    
+    def set_negative_bulk(
+        self,
+        pairs: Sequence[Tuple[Tuple[float, float], Tuple[float, float]]],
+        reason: int
+    ) -> bool:
+        """
+        Mark many pairs as failing for a short TTL.
+        
+        Args:
+            pairs: List of (origin, destination) tuples
+            reason: NEGATIVE_UNROUTABLE (CACHE_NEGATIVE_TTL_SECONDS) or
+                    NEGATIVE_REQUEST_FAILED (CACHE_NEGATIVE_FAILURE_TTL_SECONDS)
+        
         Returns:
             True if successful, False otherwise
         """
         if not self.enabled:
             return False
+        if not pairs:
+            return True
+        
+        try:
+            ttl = self._negative_ttl(reason)
+            keys = [self._negative_key(origin, destination) for origin, destination in pairs]
+            self._setex_many([(key, ttl, reason) for key in keys])
+            self.circuit_breaker.record_success()
+            self.local_cache.set_many(((key, reason) for key in keys), min(settings.CACHE_LOCAL_TTL_SECONDS, ttl))
+            return True
+        except Exception as e:
+            self.circuit_breaker.record_failure()
+            logger.error(f"Error setting negative entries in cache: {e}")
+            return False
+    
+    def get_traffic_durations_bulk(
+        self,
+        pairs: Sequence[Tuple[Tuple[float, float], Tuple[float, float]]],
+        departure_time: Optional[datetime] = None
+    ) -> List[Optional[int]]:
+        """
+        Get fresh cached traffic-aware durations for many pairs in a few round trips.
+        
+        Entries past their soft TTL are treated as missing; use
+        get_traffic_durations_swr_bulk to serve them while refreshing.
+        
+        Args:
+            pairs: List of (origin, destination) tuples
+            departure_time: Departure time (defaults to now)
+        
+        Returns:
+            List aligned with pairs (duration in seconds, or None if not cached or stale)
+        """
+        return [
+            None if entry is None or entry[1] else entry[0]
+            for entry in self.get_traffic_durations_swr_bulk(pairs, departure_time, bucket_fallback=False)
+        ]
+    
+    def get_traffic_durations_swr_bulk(
+        self,
+        pairs: Sequence[Tuple[Tuple[float, float], Tuple[float, float]]],
+        departure_time: Optional[datetime] = None,
+        bucket_fallback: bool = True
+    ) -> List[Optional[Tuple[int, bool]]]:
+        """
+        Get cached traffic-aware durations, including stale ones.
+        
+        Entries past their soft TTL are returned flagged stale until their
+        hard TTL. Shortly after a time-bucket boundary (within one soft TTL),
+        pairs missing from the new bucket fall back to the previous bucket's
+        entries, also flagged stale.
+        
+        Args:
+            pairs: List of (origin, destination) tuples
+            departure_time: Departure time (defaults to now)
+            bucket_fallback: Whether to read the previous bucket for misses
+        
+        Returns:
+            List aligned with pairs ((duration in seconds, stale), or None if not cached)
+        """
+        if not self.enabled or not pairs:
+            return [None] * len(pairs)
         
         try:
             if departure_time is None:
                 departure_time = datetime.now()
             
-            time_bucket = self._get_time_bucket(departure_time)
-            day_of_week = departure_time.strftime("%A")
+            previous = departure_time - timedelta(seconds=self._get_dynamic_ttl(departure_time))
+            fallback = bucket_fallback and (
+                self._get_time_bucket(previous), previous.weekday()
+            ) != (self._get_time_bucket(departure_time), departure_time.weekday())
             
-            key = f"duration:traffic:{self._generate_hash(origin, destination, time_bucket, day_of_week)}"
+            now = self.clock()
             ttl = self._get_dynamic_ttl(departure_time)
+            # With a fallback, misses are counted once, by the fallback lookup
+            results: List[Optional[Tuple[int, bool]]] = [
+                None if value is None else self._unpack_duration(value, now, ttl)
+                for value in self._lookup_traffic(pairs, departure_time, count_misses=not fallback)
+            ]
+            
+            missing = [i for i, entry in enumerate(results) if entry is None]
+            if fallback and missing:
+                fetched = self._lookup_traffic([pairs[i] for i in missing], previous)
+                previous_ttl = self._get_dynamic_ttl(previous)
+                for i, value in zip(missing, fetched):
+                    entry = None if value is None else self._unpack_duration(value, now, previous_ttl)
+                    if entry is not None:
+                        results[i] = (entry[0], True)
+            
+            stale_hits = sum(1 for entry in results if entry is not None and entry[1])
+            self._count("layer2_stale_hits", stale_hits)
+            CACHE_STALE_HITS.inc(stale_hits)
+            return results
+        except Exception as e:
+            logger.error(f"Error getting traffic durations from cache: {e}")
+            return [None] * len(pairs)
+    
+    def set_traffic_durations_bulk(
+        self,
+        entries: Sequence[Tuple[Tuple[float, float], Tuple[float, float], int]],
+        departure_time: Optional[datetime] = None
+    ) -> bool:
+        """
+        Cache traffic-aware durations for many pairs.
+        
+        The dynamic TTL becomes the soft expiry; Redis keeps entries for the
+        hard TTL so they can be served stale while being refreshed.
+        
+        Args:
+            entries: List of (origin, destination, duration_seconds) tuples
+            departure_time: Departure time (defaults to now)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.enabled:
+            return False
+        if not entries:
+            return True
+        
+        try:
+            if departure_time is None:
+                departure_time = datetime.now()
             
-            self.redis_client.setex(key, ttl, duration_seconds)
+            soft_expires_at = int(self.clock()) + self._get_dynamic_ttl(departure_time)
+            keys = [
+                self._traffic_duration_key(origin, destination, departure_time)
+                for origin, destination, _ in entries
+            ]
+            cells = (
+                [self._traffic_duration_row(origin, destination, departure_time) for origin, destination, _ in entries]
+                if self.layout == "row" else None
+            )
+            values = [self._pack_duration(duration, soft_expires_at) for _, _, duration in entries]
+            self._redis_write(keys, cells, self._get_hard_ttl(departure_time), list(enumerate(values)))
+            self.circuit_breaker.record_success()
+            self.local_cache.set_many(zip(keys, values), self._local_ttl(departure_time))
+            return True
+        except Exception as e:
+            self.circuit_breaker.record_failure()
+            logger.error(f"Error setting traffic durations in cache: {e}")
+            return False
+    
+    # Solutions (solved TSP/CVRP results)
+    
+    def _solution_key(self, fingerprint: str) -> str:
+        """Build the solution key for a problem fingerprint."""
+        return f"{self._key_prefix('solution', 'result')}{fingerprint}"
+    
+    def matrix_version(self, use_traffic: bool, departure_time: Optional[datetime] = None) -> str:
+        """
+        Tag identifying the matrices the cache serves right now.
+        
+        Changes when a distance or duration namespace is invalidated, when
+        the key precision changes and, for traffic-aware matrices, when the
+        departure time moves to another time bucket.
+        
+        Args:
+            use_traffic: Whether traffic durations are used (Pro mode)
+            departure_time: Departure time (defaults to now)
+        
+        Returns:
+            Version string, e.g. "d0.q5" or "d0.q5.t1.peak_morning.Monday"
+        """
+        version = f"d{self.get_generation('distance')}.q{self.key_precision}"
+        if use_traffic:
+            if departure_time is None:
+                departure_time = datetime.now()
+            version += (
+                f".t{self.get_generation('duration')}.{self._get_time_bucket(departure_time)}"
+                f".{departure_time.strftime('%A')}"
+            )
+        return version
+    
+    def get_solution(self, fingerprint: str, count: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached solution.
+        
+        The in-process solution LRU is checked first, so solutions stay
+        available while Redis is down.
+        
+        Args:
+            fingerprint: Problem fingerprint
+            count: Record the lookup in the solution stats and metrics
+                   (False for warm-start reads of a previous result)
+        
+        Returns:
+            Solution dict, or None if not cached
+        """
+        key = self._solution_key(fingerprint)
+        raw = self.solution_cache.get(key)
+        local_hit = raw is not None
+        
+        if raw is None and self.enabled:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.get(key)
+                pipe.ttl(key)
+                raw, ttl = pipe.execute()
+                self.circuit_breaker.record_success()
+                if raw is not None and ttl > 0:
+                    self.solution_cache.set(key, raw, min(settings.CACHE_LOCAL_TTL_SECONDS, ttl))
+            except Exception as e:
+                self.circuit_breaker.record_failure()
+                logger.error(f"Error getting solution from cache: {e}")
+                raw = None
+        
+        hit = raw is not None
+        if count:
+            self._count("solution_hits", int(hit))
+            self._count("solution_local_hits", int(local_hit))
+            self._count("solution_misses", int(not hit))
+            record_cache_lookups("solution", int(local_hit), int(hit and not local_hit), int(not hit))
+        return json.loads(raw) if hit else None
+    
+    def set_solution(self, fingerprint: str, solution: Dict[str, Any], ttl: int) -> bool:
+        """
+        Cache a solution in Redis and the in-process solution LRU.
+        
+        Args:
+            fingerprint: Problem fingerprint
+            solution: Solution dict (UUIDs and datetimes are stored as strings)
+            ttl: Lifetime in seconds
+        
+        Returns:
+            True if stored in Redis, False if only kept in process
+        """
+        key = self._solution_key(fingerprint)
+        raw = json.dumps(solution, separators=(",", ":"), default=str)  # UUIDs as strings
+        
+        if not self.enabled:
+            # Layer 0 is the only copy, keep it for the full lifetime
+            self.solution_cache.set(key, raw, ttl)
+            return False
+        
+        self.solution_cache.set(key, raw, min(settings.CACHE_LOCAL_TTL_SECONDS, ttl))
+        
+        try:
+            self.redis_client.setex(key, ttl, raw)
+            self.circuit_breaker.record_success()
             return True
         except Exception as e:
-            logger.error(f"Error setting traffic duration in cache: {e}")
+            self.circuit_breaker.record_failure()
+            logger.error(f"Error setting solution in cache: {e}")
             return False
     
     # Statistics
@@ -313,63 +1189,393 @@ class CacheService:
         Returns:
             Dict with hit/miss rates and totals
         """
-        layer1_total = self.stats["layer1_hits"] + self.stats["layer1_misses"]
-        layer2_total = self.stats["layer2_hits"] + self.stats["layer2_misses"]
+        # One consistent snapshot; lookups keep counting on other threads
+        with self._stats_lock:
+            stats = dict(self.stats)
+        
+        layer1_total = stats["layer1_hits"] + stats["layer1_misses"]
+        layer2_total = stats["layer2_hits"] + stats["layer2_misses"]
         
         layer1_hit_rate = (
-            self.stats["layer1_hits"] / layer1_total * 100 
+            stats["layer1_hits"] / layer1_total * 100 
             if layer1_total > 0 else 0
         )
+        negative_total = stats["negative_hits"] + stats["negative_misses"]
+        
         layer2_hit_rate = (
-            self.stats["layer2_hits"] / layer2_total * 100 
+            stats["layer2_hits"] / layer2_total * 100 
             if layer2_total > 0 else 0
         )
         
         return {
             "enabled": self.enabled,
+            "circuit": self.circuit_breaker.snapshot(),
             "layer1": {
-                "hits": self.stats["layer1_hits"],
-                "misses": self.stats["layer1_misses"],
+                "hits": stats["layer1_hits"],
+                "misses": stats["layer1_misses"],
                 "total": layer1_total,
-                "hit_rate": round(layer1_hit_rate, 2)
+                "hit_rate": round(layer1_hit_rate, 2),
+                "local_hits": stats["layer1_local_hits"],
+                "redis_hits": stats["layer1_hits"] - stats["layer1_local_hits"],
+                "legacy_hits": stats["layer1_legacy_hits"]
             },
             "layer2": {
-                "hits": self.stats["layer2_hits"],
-                "misses": self.stats["layer2_misses"],
+                "hits": stats["layer2_hits"],
+                "misses": stats["layer2_misses"],
                 "total": layer2_total,
-                "hit_rate": round(layer2_hit_rate, 2)
+                "hit_rate": round(layer2_hit_rate, 2),
+                "local_hits": stats["layer2_local_hits"],
+                "redis_hits": stats["layer2_hits"] - stats["layer2_local_hits"],
+                "stale_hits": stats["layer2_stale_hits"],
+                "hard_ttl_factor": max(1, settings.CACHE_TRAFFIC_HARD_TTL_FACTOR)
+            },
+            "negative": {
+                "hits": stats["negative_hits"],
+                "misses": stats["negative_misses"],
+                "total": negative_total,
+                "local_hits": stats["negative_local_hits"],
+                "ttl_seconds": settings.CACHE_NEGATIVE_TTL_SECONDS,
+                "failure_ttl_seconds": settings.CACHE_NEGATIVE_FAILURE_TTL_SECONDS
+            },
+            "solution": {
+                "hits": stats["solution_hits"],
+                "misses": stats["solution_misses"],
+                "local_hits": stats["solution_local_hits"],
+                "local_entries": len(self.solution_cache)
+            },
+            "local": {
+                "entries": len(self.local_cache),
+                "max_entries": self.local_cache.max_entries
+            },
+            "keys": {
+                "generations": dict(self._generations),
+                "precision": self.key_precision,
+                "legacy_fallback": self.legacy_fallback,
+                "max_coordinate_error_meters": round(quantization_error_meters(self.key_scale), 3),
+                # Both endpoints may move, in opposite directions
+                "max_pair_distance_error_meters": round(2 * quantization_error_meters(self.key_scale), 3)
             }
         }
     
     def reset_stats(self):
         """Reset cache statistics."""
-        self.stats = {
-            "layer1_hits": 0,
-            "layer1_misses": 0,
-            "layer2_hits": 0,
-            "layer2_misses": 0
+        with self._stats_lock:
+            self.stats = {
+                "layer1_hits": 0,
+                "layer1_local_hits": 0,
+                "layer1_legacy_hits": 0,
+                "layer1_misses": 0,
+                "layer2_hits": 0,
+                "layer2_local_hits": 0,
+                "layer2_stale_hits": 0,
+                "layer2_misses": 0,
+                "negative_hits": 0,
+                "negative_local_hits": 0,
+                "negative_misses": 0,
+                "solution_hits": 0,
+                "solution_local_hits": 0,
+                "solution_misses": 0
+            }
+    
+    # Invalidation and maintenance
+    
+    def invalidate_namespace(self, namespace: str) -> Optional[int]:
+        """
+        Logically flush a namespace by bumping its generation.
+        
+        O(1) in Redis: keys of older generations are no longer read and
+        expire by TTL. Other workers switch within
+        CACHE_GENERATION_REFRESH_SECONDS.
+        
+        Args:
+            namespace: "distance", "duration" or "solution"
+        
+        Returns:
+            New generation, or None if Redis is not available
+        """
+        if namespace not in self.NAMESPACES:
+            raise ValueError(f"Unknown cache namespace: {namespace}")
+        
+        self.local_cache.clear(f"{namespace}:*")
+        self.solution_cache.clear(f"{namespace}:*")
+        
+        if not self.enabled:
+            logger.warning(f"Cannot invalidate {namespace} cache: Redis not available")
+            return None
+        
+        try:
+            generation = int(self.redis_client.hincrby(self.GENERATIONS_KEY, namespace, 1))
+            self.circuit_breaker.record_success()
+        except Exception as e:
+            self.circuit_breaker.record_failure()
+            logger.error(f"Error invalidating {namespace} cache: {e}")
+            return None
+        
+        self._generations = {**self._generations, namespace: generation}
+        logger.info(f"Invalidated {namespace} cache (generation {generation})")
+        return generation
+    
+    def _scan_keys(
+        self,
+        match: str,
+        max_keys: Optional[int] = None,
+        progress: Optional[Dict[str, Any]] = None
+    ) -> Iterator[List[str]]:
+        """
+        Incrementally SCAN keys (read-only).
+        
+        One SCAN batch (CACHE_SCAN_COUNT keys) per rate limiter token, so
+        at most CACHE_CLEANUP_KEYS_PER_SECOND keys are visited per second
+        and Redis never blocks on a large keyspace.
+        
+        Args:
+            match: SCAN MATCH pattern
+            max_keys: Stop after visiting this many keys (None scans everything)
+            progress: Optional dict kept up to date with "scanned" (keys
+                      visited) and "complete" (whether the scan finished)
+        
+        Yields:
+            Keys of one SCAN batch
+        """
+        scan_count = max(1, settings.CACHE_SCAN_COUNT)
+        limiter = TokenBucketRateLimiter(
+            rate=max(1, settings.CACHE_CLEANUP_KEYS_PER_SECOND) / scan_count, capacity=1
+        )
+        if progress is None:
+            progress = {}
+        progress.update(scanned=0, complete=False)
+        
+        cursor = 0
+        while True:
+            limiter.acquire()
+            cursor, keys = self.redis_client.scan(cursor=cursor, match=match, count=scan_count)
+            progress["scanned"] += len(keys)
+            progress["complete"] = cursor == 0
+            yield keys
+            if cursor == 0 or (max_keys is not None and progress["scanned"] >= max_keys):
+                return
+    
+    def _scan_unlink(
+        self,
+        match: str,
+        should_delete: Callable[[str], bool],
+        max_keys: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Incrementally SCAN keys and UNLINK the selected ones.
+        
+        Args:
+            match: SCAN MATCH pattern
+            should_delete: Predicate selecting keys to remove
+            max_keys: Stop after visiting this many keys (None scans everything)
+        
+        Returns:
+            Dict with scanned and deleted counts and whether the scan completed
+        """
+        progress: Dict[str, Any] = {}
+        deleted = 0
+        for keys in self._scan_keys(match, max_keys, progress):
+            doomed = [key for key in keys if should_delete(key)]
+            if doomed:
+                deleted += self.redis_client.unlink(*doomed)
+        
+        self.circuit_breaker.record_success()
+        return {"scanned": progress["scanned"], "deleted": deleted, "complete": progress["complete"]}
+    
+    def is_cleanup_running(self) -> bool:
+        """Whether cleanup_old_generations is running in this process."""
+        return self._cleanup_lock.locked()
+    
+    def cleanup_old_generations(
+        self,
+        namespace: Optional[str] = None,
+        max_keys: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Remove keys left behind by earlier generations.
+        
+        Optional: old keys also expire by TTL. Only one cleanup runs per
+        process at a time.
+        
+        Args:
+            namespace: "distance", "duration" or "solution" (None cleans all)
+            max_keys: Max keys to visit per namespace (None scans everything)
+        
+        Returns:
+            Dict with status ("completed", "incomplete", "busy", "unavailable"
+            or "failed") and per-namespace counts
+        """
+        namespaces = self.NAMESPACES if namespace is None else (namespace,)
+        if any(ns not in self.NAMESPACES for ns in namespaces):
+            raise ValueError(f"Unknown cache namespace: {namespace}")
+        
+        if not self.enabled:
+            return {"status": "unavailable", "namespaces": {}}
+        if not self._cleanup_lock.acquire(blocking=False):
+            return {"status": "busy", "namespaces": {}}
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        try:
+            for ns in namespaces:
+                current = self.get_generation(ns)
+                results[ns] = self._scan_unlink(
+                    f"{ns}:*",
+                    lambda key, current=current: self._key_generation(key) < current,
+                    max_keys
+                )
+                results[ns]["generation"] = current
+                logger.info(
+                    f"Cache cleanup {ns}: {results[ns]['deleted']} old-generation keys "
+                    f"removed of {results[ns]['scanned']} scanned"
+                )
+        except Exception as e:
+            self.circuit_breaker.record_failure()
+            logger.error(f"Error cleaning up old cache generations: {e}")
+            return {"status": "failed", "namespaces": results}
+        finally:
+            self._cleanup_lock.release()
+        
+        complete = all(result["complete"] for result in results.values())
+        return {"status": "completed" if complete else "incomplete", "namespaces": results}
+    
+    def namespace_stats(self, max_scan_keys: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Count keys and estimate memory per namespace.
+        
+        Scans at most max_scan_keys keys (rate-limited like cleanup). When
+        the scan stops early, counts are extrapolated from DBSIZE. Memory
+        is MEMORY USAGE of a sample of keys, scaled to the key count.
+        
+        Args:
+            max_scan_keys: Max keys to visit (defaults to CACHE_STATS_MAX_SCAN_KEYS)
+        
+        Returns:
+            Dict with totals and, per namespace ("distance", "duration",
+            "solution", "other"), generation, keys, current/old generation keys and
+            estimated memory
+        """
+        if not self.enabled:
+            return {"enabled": False, "namespaces": {}}
+        
+        max_scan_keys = max_scan_keys or settings.CACHE_STATS_MAX_SCAN_KEYS
+        sample_size = settings.CACHE_STATS_MEMORY_SAMPLE
+        names = self.NAMESPACES + ("other",)
+        counts = {name: {"keys": 0, "current_generation_keys": 0, "old_generation_keys": 0} for name in names}
+        samples: Dict[str, List[str]] = {name: [] for name in names}
+        generations = {ns: self.get_generation(ns) for ns in self.NAMESPACES}
+        
+        def classify(key: str):
+            namespace = key.split(":", 1)[0]
+            name = namespace if namespace in generations else "other"
+            counts[name]["keys"] += 1
+            if name != "other":
+                current = self._key_generation(key) == generations[name]
+                counts[name]["current_generation_keys" if current else "old_generation_keys"] += 1
+            if len(samples[name]) < sample_size:
+                samples[name].append(key)
+        
+        try:
+            scan: Dict[str, Any] = {}
+            for keys in self._scan_keys("*", max_scan_keys, scan):
+                for key in keys:
+                    classify(key)
+            total_keys = int(self.redis_client.dbsize())
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for name in names:
+                for key in samples[name]:
+                    pipe.memory_usage(key)
+            usages = iter(pipe.execute())
+            self.circuit_breaker.record_success()
+        except Exception as e:
+            self.circuit_breaker.record_failure()
+            logger.error(f"Error collecting cache namespace stats: {e}")
+            return {"enabled": True, "error": str(e), "namespaces": {}}
+        
+        scale = 1.0 if scan["complete"] or not scan["scanned"] else total_keys / scan["scanned"]
+        namespaces = {}
+        for name in names:
+            sampled = [next(usages) or 0 for _ in samples[name]]
+            average = sum(sampled) / len(sampled) if sampled else 0
+            entry = {field: round(value * scale) for field, value in counts[name].items()}
+            entry["memory_bytes"] = round(average * entry["keys"])
+            if name != "other":
+                entry["generation"] = generations[name]
+            namespaces[name] = entry
+        
+        return {
+            "enabled": True,
+            "total_keys": total_keys,
+            "scanned_keys": scan["scanned"],
+            "estimated": not scan["complete"],
+            "namespaces": namespaces
         }
     
     def clear_cache(self, pattern: Optional[str] = None):
         """
         Clear cache entries.
         
+        Namespace-wide clears ("distance:*", "duration:*", "solution:*" or everything)
+        bump generations instead of deleting keys. Other patterns are
+        deleted with a rate-limited SCAN + UNLINK (never KEYS or FLUSHDB).
+        
         Args:
             pattern: Optional pattern to match keys (e.g., 'distance:*')
-                    If None, clears all cache entries
+                    If None, clears all cache namespaces
         """
+        if pattern is None:
+            for namespace in self.NAMESPACES:
+                self.invalidate_namespace(namespace)
+            return
+        
+        namespace = pattern[:-2] if pattern.endswith(":*") else None
+        if namespace in self.NAMESPACES:
+            self.invalidate_namespace(namespace)
+            return
+        
+        self.local_cache.clear(pattern)
+        self.solution_cache.clear(pattern)
+        
         if not self.enabled:
             logger.warning("Cannot clear cache: Redis not available")
             return
         
         try:
-            if pattern:
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    self.redis_client.delete(*keys)
-                    logger.info(f"Cleared {len(keys)} cache entries matching '{pattern}'")
-            else:
-                self.redis_client.flushdb()
-                logger.info("Cleared entire cache database")
+            result = self._scan_unlink(pattern, lambda key: True)
+            logger.info(f"Cleared {result['deleted']} cache entries matching '{pattern}'")
         except Exception as e:
+            self.circuit_breaker.record_failure()
             logger.error(f"Error clearing cache: {e}")
+
+
+_cache_service: Optional[CacheService] = None
+_cache_service_lock = threading.Lock()
+
+
+def get_cache_service() -> CacheService:
+    """
+    Get the process-wide CacheService, creating it on first use.
+    
+    Every request handler and background job in the process shares it,
+    so Redis is pinged once and statistics aggregate per process.
+    
+    Returns:
+        Shared CacheService
+    """
+    global _cache_service
+    
+    if _cache_service is None:
+        with _cache_service_lock:
+            if _cache_service is None:
+                _cache_service = CacheService()
+    
+    return _cache_service
+
+
+def close_cache_service():
+    """Drop the process-wide CacheService and close the shared Redis pool."""
+    global _cache_service
+    
+    with _cache_service_lock:
+        _cache_service = None
+        close_redis_client()
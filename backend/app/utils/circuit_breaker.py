@@ -0,0 +1,112 @@
+"""
+Circuit breaker for optional backing services.
+Lets callers skip a failing dependency (e.g. Redis) for a cool-down
+period instead of paying its connection timeout on every call.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class CircuitBreaker:
+    """
+    Thread-safe three-state circuit breaker.
+    
+    - closed: calls go through; consecutive failures are counted
+    - open: calls are skipped until the cool-down has elapsed
+    - half_open: calls go through again; the next success closes the
+      circuit and the next failure re-opens it
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        failure_threshold: int,
+        cooldown_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize circuit breaker.
+        
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown_seconds: Seconds calls are skipped once open
+            clock: Monotonic time source in seconds (injectable for tests)
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._times_opened = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state (an open circuit turns half-open after the cool-down)."""
+        with self._lock:
+            return self._current_state()
+    
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.cooldown_seconds:
+            self._state = self.HALF_OPEN
+        return self._state
+    
+    def allow_request(self) -> bool:
+        """
+        Whether a call should be attempted now.
+        
+        Returns:
+            False while the circuit is open, True otherwise
+        """
+        with self._lock:
+            return self._current_state() != self.OPEN
+    
+    def record_success(self):
+        """Record a successful call (closes a half-open circuit)."""
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+    
+    def record_failure(self):
+        """Record a failed call (opens the circuit at the threshold or when half-open)."""
+        with self._lock:
+            self._failures += 1
+            if self._current_state() == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open()
+    
+    def trip(self):
+        """Open the circuit immediately (e.g. after a failed health check)."""
+        with self._lock:
+            self._open()
+    
+    def _open(self):
+        if self._state != self.OPEN:
+            self._times_opened += 1
+        self._state = self.OPEN
+        self._opened_at = self.clock()
+    
+    def snapshot(self) -> Dict:
+        """
+        Describe the breaker for stats endpoints.
+        
+        Returns:
+            Dict with state, consecutive failures, times opened and
+            seconds until a retry (0 unless open)
+        """
+        with self._lock:
+            state = self._current_state()
+            retry_in = (
+                self.cooldown_seconds - (self.clock() - self._opened_at)
+                if state == self.OPEN else 0.0
+            )
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "times_opened": self._times_opened,
+                "retry_in_seconds": round(max(0.0, retry_in), 1)
+            }
@@ -0,0 +1,107 @@
+"""
+Vectorized geometry helpers for route matrices.
+Matrices are int32 NumPy arrays (meters / seconds).
+"""
+from typing import List, Tuple
+
+import math
+
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371000
+
+
+def haversine_matrix(
+    origins: List[Tuple[float, float]],
+    destinations: List[Tuple[float, float]]
+) -> np.ndarray:
+    """
+    Great-circle distance between every origin and destination.
+    
+    Args:
+        origins: List of (lat, lng) tuples
+        destinations: List of (lat, lng) tuples
+    
+    Returns:
+        int32 array of shape (len(origins), len(destinations)) in meters
+    """
+    origin_rad = np.radians(np.asarray(origins, dtype=np.float64).reshape(-1, 2))
+    destination_rad = np.radians(np.asarray(destinations, dtype=np.float64).reshape(-1, 2))
+    
+    lat1 = origin_rad[:, 0][:, np.newaxis]
+    lng1 = origin_rad[:, 1][:, np.newaxis]
+    lat2 = destination_rad[:, 0][np.newaxis, :]
+    lng2 = destination_rad[:, 1][np.newaxis, :]
+    
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    
+    return (EARTH_RADIUS_METERS * c).astype(np.int32)
+
+
+def estimate_durations(distance_matrix: np.ndarray) -> np.ndarray:
+    """
+    Estimate durations from distances at a 60 km/h average speed.
+    
+    Args:
+        distance_matrix: Distances in meters
+    
+    Returns:
+        int32 array of durations in seconds
+    """
+    return (np.asarray(distance_matrix) / 60000 * 3600).astype(np.int32)
+
+
+# Coordinate quantization for compact integer keys (1e-5 degrees ≈ 1.1 m)
+COORDINATE_SCALE = 100000
+
+
+def pack_coordinate(lat: float, lng: float, scale: int = COORDINATE_SCALE) -> int:
+    """
+    Pack a quantized (lat, lng) into a single non-negative integer.
+    
+    Coordinates are rounded to 1/scale degrees (1e-5 by default) and shifted
+    to be non-negative, so the result fits in a signed 64-bit column.
+    
+    Args:
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        scale: Grid cells per degree
+    
+    Returns:
+        Packed coordinate key
+    """
+    lat_q = int(round((lat + 90) * scale))
+    lng_q = int(round((lng + 180) * scale))
+    return lat_q * (360 * scale + 1) + lng_q
+
+
+def unpack_coordinate(key: int, scale: int = COORDINATE_SCALE) -> Tuple[float, float]:
+    """
+    Inverse of pack_coordinate (up to quantization).
+    
+    Args:
+        key: Packed coordinate key
+        scale: Grid cells per degree used when packing
+    
+    Returns:
+        (lat, lng) tuple
+    """
+    lat_q, lng_q = divmod(key, 360 * scale + 1)
+    return lat_q / scale - 90, lng_q / scale - 180
+
+
+def quantization_error_meters(scale: int) -> float:
+    """
+    Worst-case displacement of a point snapped to a 1/scale degree grid.
+    
+    Half the cell diagonal at the equator (cells shrink towards the poles).
+    
+    Args:
+        scale: Grid cells per degree
+    
+    Returns:
+        Maximum error in meters
+    """
+    half_cell = math.radians(0.5 / scale) * EARTH_RADIUS_METERS
+    return half_cell * math.sqrt(2)
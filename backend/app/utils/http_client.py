@@ -0,0 +1,67 @@
+"""
+Shared HTTP session for outbound API calls.
+One pooled, keep-alive session per process so batched Routes API
+requests reuse TLS connections instead of handshaking every call.
+"""
+import logging
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def create_http_session(pool_size: Optional[int] = None) -> requests.Session:
+    """
+    Create a requests session with a keep-alive connection pool.
+    
+    Args:
+        pool_size: Maximum pooled connections per host
+                   (defaults to settings.ROUTES_API_MAX_WORKERS)
+    
+    Returns:
+        Configured requests.Session
+    """
+    pool_size = pool_size or settings.ROUTES_API_MAX_WORKERS
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the process-wide HTTP session, creating it on first use.
+    
+    Returns:
+        Shared requests.Session
+    """
+    global _session
+    
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_http_session()
+                logger.info("HTTP session created")
+    
+    return _session
+
+
+def close_http_session():
+    """Close the process-wide HTTP session and release pooled connections."""
+    global _session
+    
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+            logger.info("HTTP session closed")
@@ -0,0 +1,137 @@
+"""
+In-process LRU cache (Layer 0) in front of Redis.
+Keeps recently resolved distances and durations in worker memory so
+repeated lookups (e.g. depot → recipient pairs) skip the network.
+"""
+import fnmatch
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+
+class LocalCache:
+    """
+    Bounded, thread-safe LRU cache with a per-entry expiry.
+    
+    Memory is capped by the number of entries (roughly 200 bytes each for
+    a cache key and an integer value). The least recently used entry is
+    evicted once the cap is reached. A cap of 0 disables the cache.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+        value_type: Callable[[Any], Any] = int
+    ):
+        """
+        Initialize local cache.
+        
+        Args:
+            max_entries: Maximum number of entries kept (0 disables caching)
+            clock: Monotonic time source in seconds (injectable for tests)
+            value_type: Conversion applied to stored values (int by default)
+        """
+        self.max_entries = max_entries
+        self.clock = clock
+        self.value_type = value_type
+        self._entries: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+    
+    def get_many(self, keys: Sequence[str]) -> List[Optional[int]]:
+        """
+        Get values for many keys, refreshing their recency.
+        
+        Args:
+            keys: Cache keys
+        
+        Returns:
+            List aligned with keys (None for missing or expired entries)
+        """
+        if self.max_entries <= 0:
+            return [None] * len(keys)
+        
+        now = self.clock()
+        values: List[Optional[int]] = []
+        
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    values.append(None)
+                elif entry[0] <= now:
+                    del self._entries[key]
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    values.append(entry[1])
+        
+        return values
+    
+    def get(self, key: str) -> Optional[int]:
+        """Get a single value (None if missing or expired)."""
+        return self.get_many([key])[0]
+    
+    def set_many(self, entries: Iterable[Tuple[str, int]], ttl: float):
+        """
+        Store many values with the same time-to-live.
+        
+        Args:
+            entries: Iterable of (key, value) tuples
+            ttl: Time-to-live in seconds
+        """
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        
+        expires_at = self.clock() + ttl
+        
+        with self._lock:
+            for key, value in entries:
+                self._entries[key] = (expires_at, self.value_type(value))
+                self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def set(self, key: str, value: int, ttl: float):
+        """Store a single value."""
+        self.set_many([(key, value)], ttl)
+    
+    def clear(self, pattern: Optional[str] = None) -> int:
+        """
+        Remove entries.
+        
+        Args:
+            pattern: Optional glob pattern (Redis-style, e.g. 'distance:*').
+                    If None, removes every entry.
+        
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if pattern is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            
+            keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+
+# Process-wide Layer 0 shared by every CacheService in this worker
+local_cache = LocalCache(settings.CACHE_LOCAL_MAX_ENTRIES if settings.CACHE_LOCAL_ENABLED else 0)
+
+# Serialized solutions are much larger than distances, so they get their own small LRU
+solution_local_cache = LocalCache(
+    settings.SOLUTION_CACHE_LOCAL_MAX_ENTRIES if settings.CACHE_LOCAL_ENABLED else 0,
+    value_type=str
+)
@@ -0,0 +1,169 @@
+"""
+Prometheus metrics for cache, Routes API, solver and database.
+
+Metrics are process-local by default. With several uvicorn workers, set
+PROMETHEUS_MULTIPROC_DIR (an empty, writable directory) in the
+environment before starting the server; every worker then writes its
+samples there and /metrics aggregates all of them.
+"""
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Cache (Layer 1: static distance, Layer 2: traffic duration, negative: failing pairs)
+CACHE_LOOKUPS = Counter(
+    "rizq_cache_lookups_total",
+    "Cache lookups by layer and result (local_hit, redis_hit, miss)",
+    ["layer", "result"]
+)
+CACHE_STALE_HITS = Counter(
+    "rizq_cache_stale_hits_total",
+    "Layer 2 traffic durations served past their soft TTL"
+)
+
+# Google Routes API
+ROUTES_API_ELEMENTS = Counter(
+    "rizq_routes_api_elements_total",
+    "Billable Routes API matrix elements requested, by mode (essentials, pro)",
+    ["mode"]
+)
+ROUTES_API_FALLBACK_CELLS = Counter(
+    "rizq_routes_api_fallback_cells_total",
+    "Matrix cells filled with a Euclidean estimate after an API failure, by mode",
+    ["mode"]
+)
+ROUTES_API_REQUEST_SECONDS = Histogram(
+    "rizq_routes_api_request_seconds",
+    "Routes API batch request latency including retries, by mode",
+    ["mode"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)
+)
+
+# OR-Tools solver
+SOLVER_SECONDS = Histogram(
+    "rizq_solver_seconds",
+    "Solver wall time, by problem (tsp, cvrp)",
+    ["problem"],
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+)
+SOLVER_OBJECTIVE = Histogram(
+    "rizq_solver_objective",
+    "Objective value of returned solutions, by problem",
+    ["problem"],
+    buckets=(1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+)
+SOLVER_POOL_REJECTIONS = Counter(
+    "rizq_solver_pool_rejections_total",
+    "Optimization requests rejected because the solver pool and its queue were full"
+)
+
+# Database
+DB_QUERY_SECONDS = Histogram(
+    "rizq_db_query_seconds",
+    "Database query time, by API endpoint (route path, or 'background')",
+    ["endpoint"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+
+# ASGI scope of the request being handled (its route is set once routing is done)
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+
+def routes_api_mode(use_traffic: bool) -> str:
+    """Routes API billing mode label."""
+    return "pro" if use_traffic else "essentials"
+
+
+def record_cache_lookups(layer: str, local_hits: int, redis_hits: int, misses: int):
+    """
+    Count one bulk cache lookup.
+    
+    Args:
+        layer: "layer1", "layer2", "negative" or "solution"
+        local_hits: Pairs served from the in-process cache
+        redis_hits: Pairs served from Redis
+        misses: Pairs not cached
+    """
+    CACHE_LOOKUPS.labels(layer, "local_hit").inc(local_hits)
+    CACHE_LOOKUPS.labels(layer, "redis_hit").inc(redis_hits)
+    CACHE_LOOKUPS.labels(layer, "miss").inc(misses)
+
+
+def current_endpoint() -> str:
+    """Route path of the request being handled ("background" outside requests)."""
+    scope = _request_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware exposing the current request to the database timers."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+
+def instrument_engine(engine: Engine):
+    """
+    Time every query on an engine, labelled with the current endpoint.
+    
+    Args:
+        engine: SQLAlchemy engine
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        DB_QUERY_SECONDS.labels(current_endpoint()).observe(time.perf_counter() - started)
+    
+    @event.listens_for(engine, "handle_error")
+    def _drop_timer(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+
+
+def render_metrics() -> tuple:
+    """
+    Render all metrics in the Prometheus text format.
+    
+    Aggregates every worker's samples when PROMETHEUS_MULTIPROC_DIR is set.
+    
+    Returns:
+        (payload bytes, content type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
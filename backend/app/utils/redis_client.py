@@ -0,0 +1,94 @@
+"""
+Shared Redis client for the cache layers.
+One connection pool per process so request handlers, batch threads and
+background jobs reuse connections instead of connecting (and pinging)
+per request. A circuit breaker next to the client lets callers skip
+Redis while it is failing.
+"""
+import logging
+import threading
+from typing import Optional
+
+import redis
+
+from app.config import settings
+from app.utils.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[redis.Redis] = None
+_client_lock = threading.Lock()
+
+# Process-wide breaker for the shared client
+redis_circuit_breaker = CircuitBreaker(
+    failure_threshold=settings.CACHE_CIRCUIT_FAILURE_THRESHOLD,
+    cooldown_seconds=settings.CACHE_CIRCUIT_COOLDOWN_SECONDS
+)
+
+
+def create_redis_client(max_connections: Optional[int] = None) -> Optional[redis.Redis]:
+    """
+    Create a Redis client backed by its own connection pool.
+    
+    Args:
+        max_connections: Pool size (defaults to settings.REDIS_MAX_CONNECTIONS)
+    
+    Returns:
+        Configured redis.Redis, or None if the settings are invalid
+    """
+    kwargs = dict(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        username=settings.REDIS_USERNAME if settings.REDIS_USERNAME else None,
+        password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
+        db=settings.REDIS_DB,
+        decode_responses=True,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        max_connections=max_connections or settings.REDIS_MAX_CONNECTIONS
+    )
+    
+    try:
+        if settings.REDIS_SSL:
+            # For Redis Cloud with SSL/TLS
+            pool = redis.ConnectionPool(
+                connection_class=redis.SSLConnection,
+                ssl_cert_reqs='none',  # String 'none' instead of None
+                **kwargs
+            )
+        else:
+            # For local Redis without SSL
+            pool = redis.ConnectionPool(**kwargs)
+        return redis.Redis(connection_pool=pool)
+    except Exception as e:
+        logger.error(f"Failed to create Redis client: {e}")
+        return None
+
+
+def get_redis_client() -> Optional[redis.Redis]:
+    """
+    Get the process-wide Redis client, creating it on first use.
+    
+    Returns:
+        Shared redis.Redis (None if it could not be created)
+    """
+    global _client
+    
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_redis_client()
+                logger.info("Redis connection pool created")
+    
+    return _client
+
+
+def close_redis_client():
+    """Disconnect the process-wide Redis client and release pooled connections."""
+    global _client
+    
+    with _client_lock:
+        if _client is not None:
+            _client.connection_pool.disconnect()
+            _client = None
+            logger.info("Redis connection pool closed")
@@ -0,0 +1,95 @@
+"""
+Benchmark Redis distance-cache layouts (pair keys vs. one hash per origin).
+
+Writes and reads an N × N matrix through CacheService for each layout and
+reports Redis memory and bulk read/write latency. Requires a reachable
+Redis (settings from .env); the benchmark keys are deleted afterwards.
+
+Usage:
+    python benchmark_cache_layout.py --points 200 --repeats 5
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.config import settings
+from app.utils.cache_service import CacheService
+from app.utils.local_cache import LocalCache
+
+
+def make_points(n: int, seed: int):
+    """Random points within ~20 km of the depot."""
+    rng = random.Random(seed)
+    return [
+        (settings.DEPOT_LAT + rng.uniform(-0.2, 0.2), settings.DEPOT_LNG + rng.uniform(-0.2, 0.2))
+        for _ in range(n)
+    ]
+
+
+def written_keys(cache: CacheService, points):
+    """Redis keys the benchmark matrix occupies in the active layout."""
+    if cache.layout == "row":
+        return sorted({cache._base_distance_row(o, points[0])[0] for o in points})
+    return [cache._base_distance_key(o, d) for o in points for d in points]
+
+
+def run_layout(layout: str, points, repeats: int) -> dict:
+    """Write/read the matrix in one layout and measure it."""
+    cache = CacheService(local_cache=LocalCache(max_entries=0))  # Measure Redis, not Layer 0
+    if not cache.enabled:
+        raise SystemExit("Redis not available")
+    cache.layout = layout
+    cache.legacy_fallback = False
+    
+    pairs = [(o, d) for o in points for d in points]
+    entries = [(o, d, 1000 + i) for i, (o, d) in enumerate(pairs)]
+    keys = written_keys(cache, points)
+    
+    cache.redis_client.delete(*keys)
+    memory_before = cache.redis_client.info("memory")["used_memory"]
+    
+    write_times, read_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        cache.set_base_distances_bulk(entries)
+        write_times.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        values = cache.get_base_distances_bulk(pairs)
+        read_times.append(time.perf_counter() - start)
+        assert values == [value for _, _, value in entries]
+    
+    memory_after = cache.redis_client.info("memory")["used_memory"]
+    cache.redis_client.delete(*keys)
+    
+    return {
+        "layout": layout,
+        "keys": len(keys),
+        "memory_bytes": memory_after - memory_before,
+        "write_ms": statistics.median(write_times) * 1000,
+        "read_ms": statistics.median(read_times) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=200, help="Matrix size N (N × N pairs)")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repetitions per layout")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    points = make_points(args.points, args.seed)
+    print(f"=== Cache layout benchmark: {args.points} × {args.points} = {args.points ** 2} pairs ===\n")
+    print(f"{'layout':<8}{'keys':>8}{'memory (KB)':>14}{'bytes/pair':>12}{'write (ms)':>12}{'read (ms)':>12}")
+    
+    for layout in ("pair", "row"):
+        result = run_layout(layout, points, args.repeats)
+        print(
+            f"{result['layout']:<8}{result['keys']:>8}{result['memory_bytes'] / 1024:>14.1f}"
+            f"{result['memory_bytes'] / len(points) ** 2:>12.1f}{result['write_ms']:>12.1f}{result['read_ms']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
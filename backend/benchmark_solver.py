@@ -0,0 +1,119 @@
+"""
+Benchmark OR-Tools arc evaluation: Python callbacks vs. native transit matrices.
+
+Builds the same CVRP model as OptimizationService.solve_cvrp (PATH_CHEAPEST_ARC,
+guided local search, capacity dimension) on random points around the depot and
+solves it twice per size within the same time limit: once with Python
+distance/demand callbacks, once with RegisterTransitMatrix /
+RegisterUnaryTransitVector. Reports objective, solutions found and search
+branches per second. No database, Redis or Routes API is needed.
+
+Usage:
+    python benchmark_solver.py --sizes 50 100 200 --time-limit 10
+"""
+import argparse
+import math
+import random
+import time
+
+from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+
+from app.config import settings
+
+
+def make_problem(n: int, seed: int):
+    """Random recipients within ~20 km of the depot, Euclidean costs in meters."""
+    rng = random.Random(seed)
+    points = [(settings.DEPOT_LAT, settings.DEPOT_LNG)] + [
+        (settings.DEPOT_LAT + rng.uniform(-0.2, 0.2), settings.DEPOT_LNG + rng.uniform(-0.2, 0.2))
+        for _ in range(n)
+    ]
+    cost_table = [
+        [int(math.hypot(a[0] - b[0], a[1] - b[1]) * 111_000) for b in points]
+        for a in points
+    ]
+    demands = [0] + [rng.randint(1, 5) for _ in range(n)]
+    return cost_table, demands
+
+
+def solve(cost_table, demands, num_vehicles: int, capacity: int, native: bool, time_limit: int) -> dict:
+    """Solve one CVRP and measure the search."""
+    manager = pywrapcp.RoutingIndexManager(len(cost_table), num_vehicles, 0)
+    routing = pywrapcp.RoutingModel(manager)
+    
+    if native:
+        transit_callback_index = routing.RegisterTransitMatrix(cost_table)
+        demand_callback_index = routing.RegisterUnaryTransitVector(demands)
+    else:
+        def distance_callback(from_index, to_index):
+            return cost_table[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
+        
+        def demand_callback(from_index):
+            return demands[manager.IndexToNode(from_index)]
+        
+        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+        demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+    
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+    routing.AddDimensionWithVehicleCapacity(
+        demand_callback_index, 0, [capacity] * num_vehicles, True, "Capacity"
+    )
+    
+    solutions = 0
+    
+    def count_solution():
+        nonlocal solutions
+        solutions += 1
+    
+    routing.AddAtSolutionCallback(count_solution)
+    
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = (
+        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    )
+    search_parameters.local_search_metaheuristic = (
+        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    )
+    search_parameters.time_limit.seconds = time_limit
+    
+    start = time.perf_counter()
+    solution = routing.SolveWithParameters(search_parameters)
+    elapsed = time.perf_counter() - start
+    branches = routing.solver().Branches()
+    
+    return {
+        "objective": solution.ObjectiveValue() if solution else None,
+        "solutions": solutions,
+        "branches_per_second": branches / elapsed if elapsed else 0.0,
+        "seconds": elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200], help="Recipients per problem")
+    parser.add_argument("--time-limit", type=int, default=10, help="Solver time limit per run (seconds)")
+    parser.add_argument("--capacity", type=int, default=20, help="Packages per courier")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    print(f"{'nodes':>6} {'arc eval':>8} {'objective':>12} {'solutions':>10} {'branches/s':>12}")
+    for n in args.sizes:
+        cost_table, demands = make_problem(n, args.seed)
+        # Enough couriers for the total load plus one spare
+        num_vehicles = math.ceil(sum(demands) / args.capacity) + 1
+        results = {}
+        for native in (False, True):
+            label = "native" if native else "python"
+            results[label] = result = solve(cost_table, demands, num_vehicles, args.capacity, native, args.time_limit)
+            print(
+                f"{n:>6} {label:>8} {result['objective'] or '-':>12} "
+                f"{result['solutions']:>10} {result['branches_per_second']:>12.0f}"
+            )
+        if results["python"]["branches_per_second"]:
+            speedup = results["native"]["branches_per_second"] / results["python"]["branches_per_second"]
+            print(f"{'':>6} {'speedup':>8} {'':>12} {'':>10} {speedup:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,11 @@ from fastapi.testclient import TestClient
 # Add the parent directory to the path so we can import app modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Keep the background precompute worker from calling the Routes API in tests
+os.environ.setdefault("PRECOMPUTE_ENABLED", "false")
+# Solve in threads so patches of the Routes API apply to endpoint tests
+os.environ.setdefault("SOLVER_POOL_USE_PROCESSES", "false")
+
 from app.main import app
 from app.database import Base, get_db
 from app.models.user import User
@@ -64,7 +69,7 @@ def db_session(engine):
         
         # Clean up test data after each test
         with engine.connect() as conn:
-            conn.execute(text("TRUNCATE TABLE recipients, assignment_recipients, assignments, couriers, status_history, cities, provinces, users RESTART IDENTITY CASCADE;"))
+            conn.execute(text("TRUNCATE TABLE recipients, assignment_recipients, assignments, couriers, status_history, cities, provinces, users, pair_distances RESTART IDENTITY CASCADE;"))
             conn.commit()
 
 
@@ -4,7 +4,10 @@ Unit tests for CacheService (2-layer Redis caching).
 import pytest
 from datetime import datetime, time, timedelta
 from unittest.mock import Mock, patch
-from app.utils.cache_service import CacheService
+from app.config import settings
+from app.utils.cache_service import CacheService, get_cache_service, close_cache_service
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.local_cache import LocalCache
 
 
 class TestCacheService:
@@ -249,6 +252,735 @@ class TestCacheService:
         assert success is False
 
 
+class TestCacheServiceBulk:
+    """Test bulk (pipelined) cache operations with a mock Redis client."""
+    
+    @pytest.fixture
+    def mock_redis(self):
+        """Create mock Redis client."""
+        mock = Mock()
+        mock.ping.return_value = True
+        return mock
+    
+    @pytest.fixture
+    def cache_service(self, mock_redis):
+        """Create CacheService backed by the mock client (Layer 0 and legacy keys disabled)."""
+        service = CacheService(redis_client=mock_redis, local_cache=LocalCache(max_entries=0))
+        service.legacy_fallback = False
+        return service
+    
+    def test_get_base_distances_bulk_uses_mget(self, cache_service, mock_redis):
+        """Test bulk Layer 1 lookup issues a single MGET and keeps order."""
+        pairs = [((-6.2, 106.8), (-6.3, 106.9)), ((-6.3, 106.9), (-6.2, 106.8))]
+        mock_redis.mget.return_value = ["15000", None]
+        
+        result = cache_service.get_base_distances_bulk(pairs)
+        
+        assert result == [15000, None]
+        mock_redis.mget.assert_called_once()
+        keys = mock_redis.mget.call_args[0][0]
+        assert keys == [cache_service._base_distance_key(o, d) for o, d in pairs]
+        mock_redis.get.assert_not_called()
+        
+        stats = cache_service.get_cache_stats()
+        assert stats["layer1"]["hits"] == 1
+        assert stats["layer1"]["misses"] == 1
+    
+    def test_get_base_distances_bulk_chunks_round_trips(self, cache_service, mock_redis):
+        """Test bulk lookup splits large key sets into chunks."""
+        cache_service.BULK_CHUNK_SIZE = 10
+        pairs = [((-6.2, 106.8 + i * 0.001), (-6.3, 106.9)) for i in range(25)]
+        mock_redis.mget.side_effect = lambda keys: [None] * len(keys)
+        
+        result = cache_service.get_base_distances_bulk(pairs)
+        
+        assert result == [None] * 25
+        assert mock_redis.mget.call_count == 3
+    
+    def test_base_routes_pack_distance_and_static_duration(self, cache_service, mock_redis):
+        """Test Layer 1 stores distance and static duration in one value."""
+        pipe = Mock()
+        mock_redis.pipeline.return_value = pipe
+        pairs = [((-6.2, 106.8), (-6.3, 106.9)), ((-6.3, 106.9), (-6.2, 106.8))]
+        
+        cache_service.set_base_routes_bulk([(*pairs[0], 15000, 1100), (*pairs[1], 15500, None)])
+        written = [c[0][2] for c in pipe.setex.call_args_list]
+        mock_redis.mget.return_value = [str(value) for value in written]
+        
+        assert cache_service.get_base_routes_bulk(pairs) == [(15000, 1100), (15500, None)]
+        assert cache_service.get_base_distances_bulk(pairs) == [15000, 15500]
+        assert written[1] == 15500  # Without a duration the value is the plain distance
+        assert mock_redis.mget.call_count == 2
+    
+    def test_negative_entries_are_separate_from_layer1(self, cache_service, mock_redis):
+        """Test negative entries use their own keys and a TTL per failure reason."""
+        pipe = Mock()
+        mock_redis.pipeline.return_value = pipe
+        pair = ((-6.2, 106.8), (-5.6, 106.6))
+        
+        cache_service.set_negative_bulk([pair], CacheService.NEGATIVE_UNROUTABLE)
+        cache_service.set_negative_bulk([pair], CacheService.NEGATIVE_REQUEST_FAILED)
+        
+        key = cache_service._negative_key(*pair)
+        assert key.startswith("distance:unroutable:q5:")
+        assert key != cache_service._base_distance_key(*pair)
+        pipe.setex.assert_any_call(key, settings.CACHE_NEGATIVE_TTL_SECONDS, CacheService.NEGATIVE_UNROUTABLE)
+        pipe.setex.assert_any_call(key, settings.CACHE_NEGATIVE_FAILURE_TTL_SECONDS, CacheService.NEGATIVE_REQUEST_FAILED)
+        
+        mock_redis.mget.return_value = ["1"]
+        assert cache_service.get_negative_bulk([pair]) == [CacheService.NEGATIVE_UNROUTABLE]
+        assert mock_redis.mget.call_args[0][0] == [key]
+        assert cache_service.get_cache_stats()["negative"]["hits"] == 1
+    
+    def test_set_base_distances_bulk_uses_pipeline(self, cache_service, mock_redis):
+        """Test bulk Layer 1 write uses a non-transactional pipeline."""
+        pipe = Mock()
+        mock_redis.pipeline.return_value = pipe
+        entries = [((-6.2, 106.8), (-6.3, 106.9), 15000), ((-6.3, 106.9), (-6.2, 106.8), 15500)]
+        
+        assert cache_service.set_base_distances_bulk(entries) is True
+        
+        mock_redis.pipeline.assert_called_once_with(transaction=False)
+        assert pipe.setex.call_count == 2
+        pipe.setex.assert_any_call(
+            cache_service._base_distance_key((-6.2, 106.8), (-6.3, 106.9)),
+            CacheService.BASE_DISTANCE_TTL,
+            15000
+        )
+        pipe.execute.assert_called_once()
+    
+    def test_traffic_durations_bulk_roundtrip_keys(self, cache_service, mock_redis):
+        """Test bulk Layer 2 read and write use the same time-bucketed keys."""
+        pipe = Mock()
+        mock_redis.pipeline.return_value = pipe
+        departure_time = datetime(2025, 11, 1, 8, 0)
+        origin, dest = (-6.2, 106.8), (-6.3, 106.9)
+        
+        cache_service.clock = lambda: 1_000_000.0
+        
+        cache_service.set_traffic_durations_bulk([(origin, dest, 1800)], departure_time)
+        written_key, ttl, value = pipe.setex.call_args[0]
+        assert ttl == 900 * settings.CACHE_TRAFFIC_HARD_TTL_FACTOR  # peak morning hard TTL
+        assert value == (1_000_900 << CacheService.DURATION_BITS) | 1800  # soft expiry + duration
+        
+        mock_redis.mget.return_value = [str(value)]
+        assert cache_service.get_traffic_durations_bulk([(origin, dest)], departure_time) == [1800]
+        assert mock_redis.mget.call_args[0][0] == [written_key]
+    
+    def test_bulk_errors_degrade_to_misses(self, cache_service, mock_redis):
+        """Test Redis errors in bulk lookup are treated as cache misses."""
+        mock_redis.mget.side_effect = Exception("Connection lost")
+        pairs = [((-6.2, 106.8), (-6.3, 106.9))]
+        
+        assert cache_service.get_base_distances_bulk(pairs) == [None]
+        assert cache_service.get_traffic_durations_bulk(pairs) == [None]
+
+
+class TestLocalCache:
+    """Test the in-process Layer 0 cache."""
+    
+    @pytest.fixture
+    def clock(self):
+        """Controllable monotonic clock."""
+        now = [1000.0]
+        clock = lambda: now[0]
+        clock.advance = lambda seconds: now.__setitem__(0, now[0] + seconds)
+        return clock
+    
+    @pytest.fixture
+    def mock_redis(self):
+        """Create mock Redis client."""
+        mock = Mock()
+        mock.ping.return_value = True
+        mock.pipeline.return_value = Mock()
+        return mock
+    
+    @pytest.fixture
+    def cache_service(self, mock_redis, clock):
+        """Create CacheService with a private Layer 0."""
+        service = CacheService(redis_client=mock_redis, local_cache=LocalCache(max_entries=100, clock=clock))
+        service.legacy_fallback = False
+        return service
+    
+    def test_lru_evicts_least_recently_used(self, clock):
+        """Test the entry cap evicts the least recently used key."""
+        cache = LocalCache(max_entries=2, clock=clock)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3, ttl=60)
+        
+        assert cache.get_many(["a", "b", "c"]) == [1, None, 3]
+        assert len(cache) == 2
+    
+    def test_entries_expire(self, clock):
+        """Test entries are dropped after their TTL."""
+        cache = LocalCache(max_entries=10, clock=clock)
+        cache.set("a", 1, ttl=60)
+        
+        clock.advance(59)
+        assert cache.get("a") == 1
+        clock.advance(2)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+    
+    def test_repeated_bulk_lookup_skips_redis(self, cache_service, mock_redis):
+        """Test a second lookup of the same pairs is served from Layer 0."""
+        pairs = [((-6.2, 106.8), (-6.3, 106.9)), ((-6.3, 106.9), (-6.2, 106.8))]
+        mock_redis.mget.return_value = ["15000", "15500"]
+        
+        assert cache_service.get_base_distances_bulk(pairs) == [15000, 15500]
+        assert cache_service.get_base_distances_bulk(pairs) == [15000, 15500]
+        
+        mock_redis.mget.assert_called_once()
+        stats = cache_service.get_cache_stats()
+        assert stats["layer1"]["hits"] == 4
+        assert stats["layer1"]["local_hits"] == 2
+        assert stats["layer1"]["redis_hits"] == 2
+        assert stats["local"]["entries"] == 2
+    
+    def test_writes_fill_local_layer(self, cache_service, mock_redis):
+        """Test bulk writes are readable without a Redis round trip."""
+        origin, dest = (-6.2, 106.8), (-6.3, 106.9)
+        departure_time = datetime(2025, 11, 1, 14, 0)
+        
+        cache_service.set_base_distances_bulk([(origin, dest, 15000)])
+        cache_service.set_traffic_durations_bulk([(origin, dest, 1800)], departure_time)
+        
+        assert cache_service.get_base_distance(origin, dest) == 15000
+        assert cache_service.get_traffic_durations_bulk([(origin, dest)], departure_time) == [1800]
+        mock_redis.get.assert_not_called()
+        mock_redis.mget.assert_not_called()
+        
+        stats = cache_service.get_cache_stats()
+        assert stats["layer1"]["local_hits"] == 1
+        assert stats["layer2"]["local_hits"] == 1
+    
+    def test_traffic_entries_respect_hard_ttl(self, cache_service, mock_redis, clock):
+        """Test Layer 0 traffic entries expire with the time-of-day hard TTL."""
+        origin, dest = (-6.2, 106.8), (-6.3, 106.9)
+        departure_time = datetime(2025, 11, 1, 8, 0)  # Peak morning: 900s soft
+        mock_redis.mget.side_effect = lambda keys: [None] * len(keys)
+        
+        with patch.object(settings, "CACHE_TRAFFIC_HARD_TTL_FACTOR", 2):
+            cache_service.set_base_distances_bulk([(origin, dest, 15000)])
+            cache_service.set_traffic_durations_bulk([(origin, dest, 1800)], departure_time)
+        clock.advance(1801)
+        
+        assert cache_service.get_traffic_durations_swr_bulk([(origin, dest)], departure_time) == [None]
+        assert cache_service.get_traffic_durations_bulk([(origin, dest)], departure_time) == [None]
+        assert cache_service.get_base_distances_bulk([(origin, dest)]) == [15000]
+    
+    def test_redis_errors_keep_local_hits(self, cache_service, mock_redis):
+        """Test a Redis failure still returns values held in Layer 0."""
+        known, unknown = ((-6.2, 106.8), (-6.3, 106.9)), ((-6.3, 106.9), (-6.2, 106.8))
+        cache_service.set_base_distances_bulk([(*known, 15000)])
+        mock_redis.mget.side_effect = Exception("Connection lost")
+        
+        assert cache_service.get_base_distances_bulk([known, unknown]) == [15000, None]
+    
+    def test_clear_cache_clears_local_layer(self, cache_service):
+        """Test clear_cache with a pattern also removes matching Layer 0 entries."""
+        origin, dest = (-6.2, 106.8), (-6.3, 106.9)
+        cache_service.set_base_distances_bulk([(origin, dest, 15000)])
+        cache_service.set_traffic_durations_bulk([(origin, dest, 1800)])
+        cache_service.redis_client.keys.return_value = []
+        
+        cache_service.clear_cache(pattern="distance:*")
+        
+        assert len(cache_service.local_cache) == 1
+
+
+class TestCircuitBreakerIntegration:
+    """Test CacheService skips Redis while it is failing."""
+    
+    @pytest.fixture
+    def mock_redis(self):
+        """Create mock Redis client whose reads time out."""
+        mock = Mock()
+        mock.ping.return_value = True
+        mock.mget.side_effect = TimeoutError("Timeout reading from socket")
+        return mock
+    
+    @pytest.fixture
+    def cache_service(self, mock_redis):
+        """Create CacheService with a private breaker (threshold 2) and no Layer 0."""
+        service = CacheService(
+            redis_client=mock_redis,
+            local_cache=LocalCache(max_entries=0),
+            circuit_breaker=CircuitBreaker(failure_threshold=2, cooldown_seconds=30)
+        )
+        service.legacy_fallback = False
+        return service
+    
+    def test_failures_open_circuit_and_skip_redis(self, cache_service, mock_redis):
+        """Test Redis is not called again once the circuit opens."""
+        pairs = [((-6.2, 106.8), (-6.3, 106.9))]
+        
+        for _ in range(5):
+            assert cache_service.get_base_distances_bulk(pairs) == [None]
+        
+        assert mock_redis.mget.call_count == 2
+        assert cache_service.enabled is False
+        assert cache_service.set_base_distances_bulk([(*pairs[0], 15000)]) is False
+        assert cache_service.get_cache_stats()["circuit"]["state"] == "open"
+    
+    def test_failed_ping_retried_after_cooldown(self):
+        """Test a service that could not connect pings again after the cool-down."""
+        now = [0.0]
+        mock_redis = Mock()
+        mock_redis.ping.side_effect = [ConnectionError("refused"), True]
+        cache = CacheService(
+            redis_client=mock_redis,
+            circuit_breaker=CircuitBreaker(failure_threshold=3, cooldown_seconds=30, clock=lambda: now[0])
+        )
+        
+        assert cache.enabled is False
+        assert mock_redis.ping.call_count == 1
+        
+        now[0] = 31.0
+        assert cache.enabled is True
+        assert mock_redis.ping.call_count == 2
+    
+    def test_process_wide_service_is_shared(self):
+        """Test every default RoutesAPIService uses the same CacheService."""
+        from app.services.routes_api_service import RoutesAPIService
+        
+        try:
+            assert get_cache_service() is get_cache_service()
+            assert RoutesAPIService(api_key="test").cache_service is get_cache_service()
+        finally:
+            close_cache_service()
+
+
+class TestStaleWhileRevalidate:
+    """Test soft/hard expiry of Layer 2 traffic durations."""
+    
+    @pytest.fixture
+    def clock(self):
+        """Controllable clock shared by Layer 0 and the soft expiry."""
+        now = [1_000_000.0]
+        clock = lambda: now[0]
+        clock.advance = lambda seconds: now.__setitem__(0, now[0] + seconds)
+        return clock
+    
+    @pytest.fixture
+    def cache_service(self, clock):
+        """Create CacheService backed by Layer 0 only (Redis always misses)."""
+        redis_client = Mock()
+        redis_client.ping.return_value = True
+        redis_client.pipeline.return_value = Mock()
+        redis_client.mget.side_effect = lambda keys: [None] * len(keys)
+        service = CacheService(redis_client=redis_client, local_cache=LocalCache(max_entries=100, clock=clock))
+        service.clock = clock
+        return service
+    
+    def test_entries_turn_stale_after_soft_ttl(self, cache_service, clock):
+        """Test entries past the dynamic TTL are served flagged stale, not as fresh."""
+        pair = ((-6.2, 106.8), (-6.3, 106.9))
+        departure_time = datetime(2025, 11, 1, 8, 0)  # Peak morning: 900s soft
+        cache_service.set_traffic_durations_bulk([(*pair, 1800)], departure_time)
+        
+        assert cache_service.get_traffic_durations_swr_bulk([pair], departure_time) == [(1800, False)]
+        
+        clock.advance(901)
+        assert cache_service.get_traffic_durations_swr_bulk([pair], departure_time) == [(1800, True)]
+        assert cache_service.get_traffic_durations_bulk([pair], departure_time) == [None]
+        assert cache_service.get_cache_stats()["layer2"]["stale_hits"] == 2
+    
+    def test_values_without_soft_expiry_are_stale(self, cache_service):
+        """Test plain durations written before soft expiry existed are stale."""
+        pair = ((-6.2, 106.8), (-6.3, 106.9))
+        departure_time = datetime(2025, 11, 1, 14, 0)
+        cache_service.redis_client.mget.side_effect = None
+        cache_service.redis_client.mget.return_value = ["1800"]
+        
+        assert cache_service.get_traffic_durations_swr_bulk([pair], departure_time) == [(1800, True)]
+    
+    def test_values_past_hard_ttl_are_misses(self, cache_service, clock):
+        """Test values still in Redis (e.g. a refreshed row hash) expire at their hard TTL."""
+        pair = ((-6.2, 106.8), (-6.3, 106.9))
+        departure_time = datetime(2025, 11, 1, 8, 0)  # Peak morning: 900s soft
+        stale_for = (settings.CACHE_TRAFFIC_HARD_TTL_FACTOR - 1) * 900
+        cache_service.redis_client.mget.side_effect = None
+        
+        soft_expires_at = int(clock()) - stale_for + 1
+        cache_service.redis_client.mget.return_value = [str(cache_service._pack_duration(1800, soft_expires_at))]
+        assert cache_service.get_traffic_durations_swr_bulk([pair], departure_time) == [(1800, True)]
+        
+        other_pair = ((-6.2, 106.8), (-6.4, 107.0))
+        soft_expires_at = int(clock()) - stale_for
+        cache_service.redis_client.mget.return_value = [str(cache_service._pack_duration(1800, soft_expires_at))]
+        assert cache_service.get_traffic_durations_swr_bulk([other_pair], departure_time) == [None]
+    
+    def test_previous_bucket_served_stale_after_boundary(self, cache_service):
+        """Test misses right after a bucket boundary fall back to the previous bucket."""
+        pair = ((-6.2, 106.8), (-6.3, 106.9))
+        cache_service.set_traffic_durations_bulk([(*pair, 1800)], datetime(2025, 11, 1, 8, 50))
+        
+        # Business bucket starts at 09:00; its soft TTL is 30 minutes
+        assert cache_service.get_traffic_durations_swr_bulk([pair], datetime(2025, 11, 1, 9, 5)) == [(1800, True)]
+        assert cache_service.get_traffic_durations_swr_bulk([pair], datetime(2025, 11, 1, 9, 45)) == [None]
+        assert cache_service.get_traffic_durations_bulk([pair], datetime(2025, 11, 1, 9, 5)) == [None]
+        
+        stats = cache_service.get_cache_stats()["layer2"]
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+class TestCacheKeys:
+    """Test quantized cache keys and the legacy key fallback."""
+    
+    @pytest.fixture
+    def mock_redis(self):
+        """Create mock Redis client."""
+        mock = Mock()
+        mock.ping.return_value = True
+        mock.pipeline.return_value = Mock()
+        return mock
+    
+    @pytest.fixture
+    def cache_service(self, mock_redis):
+        """Create CacheService with Layer 0 disabled."""
+        return CacheService(redis_client=mock_redis, local_cache=LocalCache(max_entries=0))
+    
+    def test_nearby_points_share_keys(self, cache_service):
+        """Test points closer than the grid share a key and distant ones do not."""
+        origin, dest = (-6.200001, 106.800001), (-6.3, 106.9)
+        nearby = (-6.200003, 106.800002)  # ~30 cm away
+        
+        assert cache_service._base_distance_key(origin, dest) == cache_service._base_distance_key(nearby, dest)
+        assert cache_service._base_distance_key(origin, dest) != cache_service._base_distance_key((-6.2001, 106.8), dest)
+        assert cache_service._base_distance_key(origin, dest) != cache_service._base_distance_key(dest, origin)
+    
+    def test_key_format(self, cache_service):
+        """Test keys keep the layer prefixes used by clear_cache patterns."""
+        departure_time = datetime(2025, 11, 1, 8, 0)
+        origin, dest = (-6.2, 106.8), (-6.3, 106.9)
+        
+        assert cache_service._base_distance_key(origin, dest).startswith("distance:static:q5:")
+        assert cache_service._traffic_duration_key(origin, dest, departure_time).startswith("duration:traffic:q5:")
+        assert cache_service._traffic_duration_key(origin, dest, departure_time).endswith(":peak_morning:Saturday")
+    
+    def test_legacy_keys_are_read_and_migrated(self, cache_service, mock_redis):
+        """Test a miss on the new key falls back to the legacy key and rewrites it."""
+        pairs = [((-6.2, 106.8), (-6.3, 106.9)), ((-6.3, 106.9), (-6.2, 106.8))]
+        mock_redis.mget.side_effect = [[None, None], ["15000", None]]
+        
+        assert cache_service.get_base_distances_bulk(pairs) == [15000, None]
+        
+        legacy_keys = mock_redis.mget.call_args_list[1][0][0]
+        assert legacy_keys == [cache_service._legacy_base_distance_key(o, d) for o, d in pairs]
+        mock_redis.pipeline.return_value.setex.assert_called_once_with(
+            cache_service._base_distance_key(*pairs[0]), CacheService.BASE_DISTANCE_TTL, 15000
+        )
+        
+        stats = cache_service.get_cache_stats()
+        assert stats["layer1"]["hits"] == 1
+        assert stats["layer1"]["legacy_hits"] == 1
+        assert stats["layer1"]["misses"] == 1
+    
+    def test_stats_report_quantization_error(self, cache_service):
+        """Test the quantization error bound is reported with the precision."""
+        keys = cache_service.get_cache_stats()["keys"]
+        
+        assert keys["precision"] == 5
+        assert 0.7 < keys["max_coordinate_error_meters"] < 0.8
+        assert keys["max_pair_distance_error_meters"] == pytest.approx(2 * keys["max_coordinate_error_meters"], abs=0.01)
+
+
+class TestRowLayout:
+    """Test the one-hash-per-origin Redis layout."""
+    
+    @pytest.fixture
+    def pipe(self):
+        """Mock pipeline returned by the mock client."""
+        return Mock()
+    
+    @pytest.fixture
+    def cache_service(self, pipe):
+        """Create a row-layout CacheService with Layer 0 and legacy keys disabled."""
+        mock_redis = Mock()
+        mock_redis.ping.return_value = True
+        mock_redis.pipeline.return_value = pipe
+        service = CacheService(redis_client=mock_redis, local_cache=LocalCache(max_entries=0))
+        service.layout = "row"
+        service.legacy_fallback = False
+        return service
+    
+    def test_row_read_is_one_hmget_per_origin(self, cache_service, pipe):
+        """Test a matrix is read with one HMGET per origin row in one round trip."""
+        origins = [(-6.2, 106.8), (-6.3, 106.9)]
+        destinations = [(-6.1, 106.7), (-6.25, 106.85), (-6.35, 106.95)]
+        pairs = [(o, d) for o in origins for d in destinations]
+        pipe.execute.return_value = [["100", None, "300"], ["400", "500", None]]
+        
+        result = cache_service.get_base_distances_bulk(pairs)
+        
+        assert result == [100, None, 300, 400, 500, None]
+        assert pipe.hmget.call_count == 2
+        assert pipe.execute.call_count == 1
+        row, fields = pipe.hmget.call_args_list[0][0]
+        assert row == cache_service._base_distance_row(origins[0], destinations[0])[0]
+        assert fields == [cache_service._base_distance_row(origins[0], d)[1] for d in destinations]
+        cache_service.redis_client.mget.assert_not_called()
+    
+    def test_row_write_sets_row_ttl(self, cache_service, pipe):
+        """Test writes are one HSET per row and the TTL matches each layer."""
+        origin = (-6.2, 106.8)
+        entries = [(origin, (-6.1, 106.7), 100), (origin, (-6.3, 106.9), 200)]
+        
+        cache_service.set_base_distances_bulk(entries)
+        cache_service.set_traffic_durations_bulk(entries, datetime(2025, 11, 1, 8, 0))
+        
+        assert pipe.hset.call_count == 2
+        distance_row = cache_service._base_distance_row(origin, (-6.1, 106.7))[0]
+        assert pipe.hset.call_args_list[0][1]["mapping"] == {
+            cache_service._base_distance_row(origin, (-6.1, 106.7))[1]: 100,
+            cache_service._base_distance_row(origin, (-6.3, 106.9))[1]: 200
+        }
+        pipe.expire.assert_any_call(distance_row, CacheService.BASE_DISTANCE_TTL)
+        duration_row = pipe.hset.call_args_list[1][0][0]
+        assert duration_row.startswith("duration:row:") and duration_row.endswith(":peak_morning:Saturday")
+        pipe.expire.assert_any_call(duration_row, 900 * settings.CACHE_TRAFFIC_HARD_TTL_FACTOR)
+    
+    def test_row_pipelines_are_chunked_by_fields(self, cache_service, pipe):
+        """Test large matrices are split into bounded pipelines."""
+        cache_service.BULK_CHUNK_SIZE = 4
+        origins = [(-6.2 + i * 0.01, 106.8) for i in range(3)]
+        destinations = [(-6.1, 106.7 + j * 0.01) for j in range(3)]
+        pairs = [(o, d) for o in origins for d in destinations]
+        pipe.execute.side_effect = [[[None] * 3, [None] * 3], [[None] * 3]]
+        
+        assert cache_service.get_base_distances_bulk(pairs) == [None] * 9
+        assert pipe.execute.call_count == 2
+
+
+
+class TestNamespaceGenerations:
+    """Test versioned namespaces, SCAN-based invalidation and namespace stats."""
+    
+    @pytest.fixture
+    def mock_redis(self):
+        """Create mock Redis client with no stored generations."""
+        mock = Mock()
+        mock.ping.return_value = True
+        mock.hgetall.return_value = {}
+        mock.mget.side_effect = lambda keys: [None] * len(keys)
+        mock.unlink.side_effect = lambda *keys: len(keys)
+        return mock
+    
+    @pytest.fixture
+    def cache_service(self, mock_redis):
+        """Create CacheService with a small Layer 0."""
+        return CacheService(redis_client=mock_redis, local_cache=LocalCache(max_entries=100))
+    
+    def test_invalidate_bumps_generation_in_keys(self, cache_service, mock_redis):
+        """Test invalidation versions new keys and retires legacy keys."""
+        origin, dest = (-6.2, 106.8), (-6.3, 106.9)
+        departure_time = datetime(2025, 11, 1, 8, 0)
+        unversioned = cache_service._base_distance_key(origin, dest)
+        assert unversioned.startswith("distance:static:q5:")
+        
+        mock_redis.hincrby.return_value = 3
+        assert cache_service.invalidate_namespace("distance") == 3
+        
+        mock_redis.hincrby.assert_called_once_with(CacheService.GENERATIONS_KEY, "distance", 1)
+        assert cache_service._base_distance_key(origin, dest) == unversioned.replace(":q5:", ":g3:q5:")
+        assert cache_service._base_distance_row(origin, dest)[0].startswith("distance:row:g3:q5:")
+        assert cache_service._traffic_duration_key(origin, dest, departure_time).startswith("duration:traffic:q5:")
+        
+        cache_service.get_base_distances_bulk([(origin, dest)])
+        assert mock_redis.mget.call_count == 1  # No legacy fallback read
+    
+    def test_invalidate_drops_local_entries(self, cache_service):
+        """Test invalidating one namespace clears only its Layer 0 entries."""
+        origin, dest = (-6.2, 106.8), (-6.3, 106.9)
+        cache_service.set_base_distances_bulk([(origin, dest, 15000)])
+        cache_service.set_traffic_durations_bulk([(origin, dest, 1800)])
+        cache_service.redis_client.hincrby.return_value = 1
+        
+        cache_service.invalidate_namespace("distance")
+        
+        assert len(cache_service.local_cache) == 1
+        with pytest.raises(ValueError):
+            cache_service.invalidate_namespace("warmup")
+    
+    def test_generations_are_refreshed_from_redis(self, cache_service, mock_redis):
+        """Test another worker's invalidation is picked up after the refresh interval."""
+        origin, dest = (-6.2, 106.8), (-6.3, 106.9)
+        mock_redis.hgetall.return_value = {"duration": "2"}
+        
+        assert cache_service.get_generation("duration") == 0  # Cached
+        
+        with patch.object(settings, "CACHE_GENERATION_REFRESH_SECONDS", 0):
+            key = cache_service._traffic_duration_key(origin, dest, datetime(2025, 11, 1, 8, 0))
+        
+        assert key.startswith("duration:traffic:g2:q5:")
+        assert cache_service.get_cache_stats()["keys"]["generations"] == {"distance": 0, "duration": 2, "solution": 0}
+    
+    def test_clear_cache_never_uses_keys_or_flushdb(self, cache_service, mock_redis):
+        """Test namespace clears bump generations and other patterns SCAN + UNLINK."""
+        mock_redis.hincrby.return_value = 1
+        mock_redis.scan.side_effect = [(7, ["warmup:a"]), (0, ["warmup:b", "warmup:c"])]
+        
+        cache_service.clear_cache()
+        cache_service.clear_cache(pattern="duration:*")
+        cache_service.clear_cache(pattern="warmup:*")
+        
+        assert mock_redis.hincrby.call_count == 4
+        assert mock_redis.scan.call_args_list[0][1] == {"cursor": 0, "match": "warmup:*", "count": settings.CACHE_SCAN_COUNT}
+        assert mock_redis.unlink.call_count == 2
+        mock_redis.keys.assert_not_called()
+        mock_redis.flushdb.assert_not_called()
+    
+    def test_cleanup_removes_only_old_generations(self, cache_service, mock_redis):
+        """Test cleanup unlinks keys of earlier generations across SCAN pages."""
+        cache_service._generations = {"distance": 2, "duration": 0}
+        pages = {
+            "distance:*": [
+                (5, ["distance:static:q5:1:2", "distance:static:g1:q5:1:2"]),
+                (0, ["distance:static:g2:q5:1:2", "distance:row:g1:q5:1"])
+            ],
+            "duration:*": [(0, ["duration:traffic:q5:1:2:business:Monday"])],
+            "solution:*": [(0, [])]
+        }
+        mock_redis.scan.side_effect = lambda cursor, match, count: pages[match].pop(0)
+        
+        result = cache_service.cleanup_old_generations()
+        
+        assert result["status"] == "completed"
+        assert result["namespaces"]["distance"]["deleted"] == 3
+        assert result["namespaces"]["distance"]["scanned"] == 4
+        assert result["namespaces"]["duration"]["deleted"] == 0
+        unlinked = [key for call in mock_redis.unlink.call_args_list for key in call[0]]
+        assert "distance:static:g2:q5:1:2" not in unlinked
+        assert not cache_service.is_cleanup_running()
+    
+    def test_namespace_stats_extrapolates_partial_scan(self, cache_service, mock_redis):
+        """Test stats classify keys and scale counts to DBSIZE when the scan stops early."""
+        cache_service._generations = {"distance": 1, "duration": 0}
+        mock_redis.scan.return_value = (9, [
+            "distance:static:q5:1:2", "distance:static:g1:q5:1:2",
+            "duration:traffic:q5:1:2:business:Monday", "cache:generations"
+        ])
+        mock_redis.dbsize.return_value = 8
+        pipe = Mock()
+        pipe.execute.return_value = [100, 60, 80, 40]
+        mock_redis.pipeline.return_value = pipe
+        
+        stats = cache_service.namespace_stats(max_scan_keys=4)
+        
+        assert stats["estimated"] is True
+        assert stats["scanned_keys"] == 4
+        distance = stats["namespaces"]["distance"]
+        assert distance == {
+            "keys": 4, "current_generation_keys": 2, "old_generation_keys": 2,
+            "memory_bytes": 320, "generation": 1
+        }
+        assert stats["namespaces"]["other"]["keys"] == 2
+        mock_redis.unlink.assert_not_called()
+
+
+class TestSolutionCache:
+    """Test the solution cache and matrix versions."""
+    
+    @pytest.fixture
+    def mock_redis(self):
+        """Create mock Redis client with an empty pipeline."""
+        mock = Mock()
+        mock.ping.return_value = True
+        mock.hgetall.return_value = {}
+        pipe = Mock()
+        pipe.execute.return_value = [None, -2]
+        mock.pipeline.return_value = pipe
+        return mock
+    
+    @pytest.fixture
+    def cache_service(self, mock_redis):
+        """Create CacheService with small in-process caches."""
+        return CacheService(
+            redis_client=mock_redis,
+            local_cache=LocalCache(max_entries=100),
+            solution_cache=LocalCache(max_entries=10, value_type=str)
+        )
+    
+    def test_set_and_get_solution(self, cache_service, mock_redis):
+        """Test solutions are written to Redis and served from Layer 0."""
+        solution = {"total_distance": 12000, "optimized_sequence": ["a", "b"]}
+        
+        assert cache_service.get_solution("abc") is None
+        assert cache_service.set_solution("abc", solution, 600) is True
+        
+        mock_redis.setex.assert_called_once()
+        key, ttl, _ = mock_redis.setex.call_args[0]
+        assert key == "solution:result:abc"
+        assert ttl == 600
+        assert cache_service.get_solution("abc") == solution
+        
+        stats = cache_service.get_cache_stats()["solution"]
+        assert stats == {"hits": 1, "misses": 1, "local_hits": 1, "local_entries": 1}
+    
+    def test_solution_read_from_redis(self, cache_service, mock_redis):
+        """Test a Redis hit fills Layer 0 for the next lookup."""
+        mock_redis.pipeline.return_value.execute.return_value = ['{"total_distance":5}', 300]
+        
+        assert cache_service.get_solution("abc") == {"total_distance": 5}
+        assert cache_service.get_solution("abc") == {"total_distance": 5}
+        assert mock_redis.pipeline.call_count == 1
+    
+    def test_uncounted_lookup_skips_stats(self, cache_service, mock_redis):
+        """Test warm-start reads do not count as solution hits or misses."""
+        cache_service.set_solution("abc", {"routes": []}, 600)
+        
+        with patch('app.utils.cache_service.record_cache_lookups') as record:
+            assert cache_service.get_solution("abc", count=False) == {"routes": []}
+            assert cache_service.get_solution("gone", count=False) is None
+        
+        record.assert_not_called()
+        stats = cache_service.get_cache_stats()["solution"]
+        assert (stats["hits"], stats["misses"], stats["local_hits"]) == (0, 0, 0)
+    
+    def test_solution_kept_locally_while_redis_down(self, mock_redis):
+        """Test Layer 0 keeps solutions when Redis writes are skipped."""
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=60)
+        cache_service = CacheService(
+            redis_client=mock_redis,
+            circuit_breaker=breaker,
+            solution_cache=LocalCache(max_entries=10, value_type=str)
+        )
+        breaker.trip()
+        
+        assert cache_service.set_solution("abc", {"routes": []}, 600) is False
+        
+        assert cache_service.get_solution("abc") == {"routes": []}
+        mock_redis.setex.assert_not_called()
+    
+    def test_solution_invalidation(self, cache_service, mock_redis):
+        """Test invalidating the solution namespace hides earlier solutions."""
+        cache_service.set_solution("abc", {"routes": []}, 600)
+        mock_redis.hincrby.return_value = 1
+        
+        cache_service.invalidate_namespace("solution")
+        
+        assert cache_service._solution_key("abc") == "solution:result:g1:abc"
+        assert cache_service.get_solution("abc") is None
+    
+    def test_matrix_version_tracks_generations_and_buckets(self, cache_service, mock_redis):
+        """Test matrix versions change with invalidations and traffic time buckets."""
+        monday_peak = datetime(2025, 11, 3, 8, 0)
+        monday_night = datetime(2025, 11, 3, 23, 0)
+        static = cache_service.matrix_version(use_traffic=False)
+        traffic = cache_service.matrix_version(use_traffic=True, departure_time=monday_peak)
+        
+        assert static == "d0.q5"
+        assert traffic.startswith("d0.q5.t0.")
+        assert traffic != cache_service.matrix_version(use_traffic=True, departure_time=monday_night)
+        
+        mock_redis.hincrby.return_value = 1
+        cache_service.invalidate_namespace("distance")
+        assert cache_service.matrix_version(use_traffic=False) == "d1.q5"
+
+
 class TestCacheServiceIntegration:
     """Integration tests with real Redis connection."""
     
@@ -0,0 +1,127 @@
+"""
+Unit tests for the cache warm-up of unassigned recipients.
+"""
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from app.config import settings
+from app.services.cache_warmup_service import CacheWarmupService
+
+
+class FakeRoutes:
+    """Routes API stand-in backed by an in-memory Layer 1."""
+    
+    def __init__(self):
+        self.cached = {}
+        self.elements_requested = 0
+        self.cache_service = Mock()
+        self.cache_service.enabled = False
+        self.cache_service.get_base_routes_bulk.side_effect = lambda pairs: [
+            self.cached.get(pair) for pair in pairs
+        ]
+        self.calls = []
+    
+    def compute_route_matrix(self, origins, destinations, use_traffic=False):
+        self.calls.append((origins, destinations))
+        self.elements_requested += len(origins) * len(destinations)
+        for o in origins:
+            for d in destinations:
+                if o != d:
+                    self.cached[(o, d)] = (1000, 60)
+        return {"status": "OK"}
+
+
+class TestCacheWarmupService:
+    """Test warm-up planning, budgets and resuming."""
+    
+    @pytest.fixture
+    def recipients(self):
+        """30 recipients in city 1 and 5 in city 2."""
+        return [
+            SimpleNamespace(city_id=1, point=(-6.20 - i * 0.001, 106.80)) for i in range(30)
+        ] + [
+            SimpleNamespace(city_id=2, point=(-6.40 - i * 0.001, 106.90)) for i in range(5)
+        ]
+    
+    @pytest.fixture
+    def routes(self):
+        return FakeRoutes()
+    
+    @pytest.fixture
+    def service(self, routes, recipients):
+        """Create warm-up service whose repository serves the in-memory recipients."""
+        service = CacheWarmupService(
+            routes_api_service=routes,
+            session_factory=Mock,
+            clock=lambda: datetime(2025, 11, 1, 23, 0)  # Off-peak
+        )
+        
+        patcher = patch('app.services.cache_warmup_service.RecipientRepository')
+        repo_cls = patcher.start()
+        repo_cls.return_value.get_by_status.return_value = recipients
+        repo_cls.extract_location.side_effect = lambda r: {"lat": r.point[0], "lng": r.point[1]}
+        yield service
+        patcher.stop()
+    
+    def test_plan_covers_depot_and_intra_city_pairs(self, service, recipients):
+        """Test tiles cover every depot and same-city pair, and no cross-city pair."""
+        depot = (settings.DEPOT_LAT, settings.DEPOT_LNG)
+        n_recipients, n_cities, tiles = service.plan()
+        
+        covered = {(o, d) for _, origins, destinations in tiles for o in origins for d in destinations if o != d}
+        city1 = [r.point for r in recipients if r.city_id == 1]
+        city2 = [r.point for r in recipients if r.city_id == 2]
+        
+        assert (n_recipients, n_cities) == (35, 2)
+        assert all(len(o) * len(d) <= 625 for _, o, d in tiles)
+        assert all((depot, p) in covered and (p, depot) in covered for p in city1 + city2)
+        assert all((a, b) in covered for a in city1 for b in city1 if a != b)
+        assert (city1[0], city2[0]) not in covered
+    
+    def test_run_completes_and_resumes_for_free(self, service, routes):
+        """Test a full run reports elements spent and a re-run spends nothing."""
+        progress = service.run(budget_elements=10000)
+        
+        assert progress["status"] == "completed"
+        assert progress["tiles_done"] == progress["tiles_total"]
+        assert progress["elements_spent"] == routes.elements_requested > 0
+        
+        calls = len(routes.calls)
+        again = service.run(budget_elements=10000)
+        
+        assert again["status"] == "completed"
+        assert again["elements_spent"] == 0
+        assert again["total_elements_spent"] == progress["total_elements_spent"]
+        assert len(routes.calls) == calls
+    
+    def test_budget_stops_before_overspending(self, service, routes):
+        """Test the budget is never exceeded and the next run picks up the rest."""
+        progress = service.run(budget_elements=700)
+        
+        assert progress["status"] == "budget_exhausted"
+        assert 0 < progress["elements_spent"] <= 700
+        assert progress["tiles_done"] < progress["tiles_total"]
+        
+        resumed = service.run(budget_elements=10000)
+        
+        assert resumed["status"] == "completed"
+        assert resumed["total_elements_spent"] == routes.elements_requested
+    
+    def test_waits_for_offpeak_window(self, service, routes):
+        """Test nothing is fetched outside the off-peak window unless forced."""
+        service.clock = lambda: datetime(2025, 11, 1, 10, 0)
+        
+        progress = service.run()
+        assert progress["status"] == "outside_offpeak"
+        assert routes.calls == []
+        
+        assert service.run(ignore_offpeak=True)["status"] == "completed"
+    
+    def test_progress_is_saved_per_region_filter(self, service):
+        """Test progress is stored under a key derived from the filter."""
+        service.run(city_ids=[2, 1])
+        
+        assert service.get_progress(city_ids=[1, 2])["status"] == "completed"
+        assert service.get_progress()["status"] == "not_started"
+        assert CacheWarmupService.job_key([31], None) == "p31:c-"
@@ -0,0 +1,69 @@
+"""
+Unit tests for CircuitBreaker.
+"""
+import pytest
+from app.utils.circuit_breaker import CircuitBreaker
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+    
+    @pytest.fixture
+    def clock(self):
+        """Controllable monotonic clock."""
+        now = [100.0]
+        clock = lambda: now[0]
+        clock.advance = lambda seconds: now.__setitem__(0, now[0] + seconds)
+        return clock
+    
+    @pytest.fixture
+    def breaker(self, clock):
+        return CircuitBreaker(failure_threshold=3, cooldown_seconds=30, clock=clock)
+    
+    def test_opens_after_consecutive_failures(self, breaker):
+        """Test the circuit opens only at the failure threshold."""
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.allow_request() is True
+        
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+    
+    def test_success_resets_failure_count(self, breaker):
+        """Test failures must be consecutive to open the circuit."""
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitBreaker.CLOSED
+    
+    def test_half_open_after_cooldown(self, breaker, clock):
+        """Test a trial is allowed after the cool-down and its result decides the state."""
+        breaker.trip()
+        clock.advance(29)
+        assert breaker.allow_request() is False
+        
+        clock.advance(1)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request() is True
+        
+        breaker.record_failure()  # One failure re-opens a half-open circuit
+        assert breaker.allow_request() is False
+        
+        clock.advance(30)
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+    
+    def test_snapshot(self, breaker, clock):
+        """Test the snapshot reports state and remaining cool-down."""
+        breaker.trip()
+        clock.advance(10)
+        
+        assert breaker.snapshot() == {
+            "state": "open",
+            "consecutive_failures": 0,
+            "times_opened": 1,
+            "retry_in_seconds": 20.0
+        }
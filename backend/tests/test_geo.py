@@ -0,0 +1,90 @@
+"""
+Unit tests for vectorized geometry helpers.
+"""
+import numpy as np
+import pytest
+from app.utils.geo import (
+    haversine_matrix, estimate_durations, pack_coordinate, unpack_coordinate, quantization_error_meters
+)
+
+
+class TestHaversineMatrix:
+    """Test vectorized haversine distances."""
+    
+    def test_shape_and_dtype(self):
+        """Test matrix shape follows origins × destinations as int32."""
+        origins = [(-6.2, 106.8), (-6.3, 106.9)]
+        destinations = [(-6.2, 106.8), (-6.4, 106.9), (-6.6, 106.8)]
+        
+        matrix = haversine_matrix(origins, destinations)
+        
+        assert matrix.shape == (2, 3)
+        assert matrix.dtype == np.int32
+    
+    def test_same_point_is_zero(self):
+        """Test distance from a point to itself is 0."""
+        assert haversine_matrix([(-6.2, 106.8)], [(-6.2, 106.8)])[0, 0] == 0
+    
+    def test_known_distance(self):
+        """Test Jakarta to Bogor is about 44.5 km."""
+        distance = haversine_matrix([(-6.2, 106.8)], [(-6.6, 106.8)])[0, 0]
+        assert 44000 < distance < 45000
+    
+    def test_symmetric(self):
+        """Test haversine distance is symmetric."""
+        points = [(-6.2 + i * 0.05, 106.8 + i * 0.03) for i in range(5)]
+        matrix = haversine_matrix(points, points)
+        
+        assert np.array_equal(matrix, matrix.T)
+
+
+class TestEstimateDurations:
+    """Test duration estimates from distances."""
+    
+    def test_sixty_kmh(self):
+        """Test 15 km takes 900 s at 60 km/h."""
+        durations = estimate_durations(np.array([[0, 15000]], dtype=np.int32))
+        
+        assert durations.dtype == np.int32
+        assert durations.tolist() == [[0, 900]]
+
+
+class TestPackCoordinate:
+    """Test quantized coordinate keys."""
+    
+    def test_roundtrip(self):
+        """Test packing is reversible up to 1e-5 degrees."""
+        lat, lng = unpack_coordinate(pack_coordinate(-6.208765, 106.845599))
+        
+        assert lat == pytest.approx(-6.208765, abs=1e-5)
+        assert lng == pytest.approx(106.845599, abs=1e-5)
+    
+    def test_fits_bigint(self):
+        """Test extreme coordinates fit a signed 64-bit column."""
+        assert 0 <= pack_coordinate(-90, -180) < pack_coordinate(90, 180) < 2 ** 63
+    
+    def test_quantization_merges_nearby_points(self):
+        """Test points closer than the quantum share a key."""
+        assert pack_coordinate(-6.200001, 106.8) == pack_coordinate(-6.2, 106.8)
+        assert pack_coordinate(-6.20001, 106.8) != pack_coordinate(-6.2, 106.8)
+    
+    def test_custom_scale(self):
+        """Test a coarser grid merges points within its cell and stays reversible."""
+        assert pack_coordinate(-6.2001, 106.8, scale=1000) == pack_coordinate(-6.2, 106.8, scale=1000)
+        lat, lng = unpack_coordinate(pack_coordinate(-6.2087, 106.8456, scale=1000), scale=1000)
+        assert lat == pytest.approx(-6.209, abs=1e-9)
+        assert lng == pytest.approx(106.846, abs=1e-9)
+    
+    def test_quantization_error_bound(self):
+        """Test the reported bound covers the actual snapping error."""
+        bound = quantization_error_meters(1000)
+        point = (-6.2084999, 106.8454999)  # Near a cell corner
+        snapped = unpack_coordinate(pack_coordinate(*point, scale=1000), scale=1000)
+        
+        assert haversine_matrix([point], [snapped])[0][0] <= bound
+        assert bound == pytest.approx(78.6, abs=0.1)
+
+
+if __name__ == "__main__":
+    """Run tests directly."""
+    pytest.main([__file__, "-v", "-s"])
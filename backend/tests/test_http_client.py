@@ -0,0 +1,42 @@
+"""
+Unit tests for the shared HTTP session.
+"""
+import pytest
+from app.utils import http_client
+from app.utils.http_client import create_http_session, get_http_session, close_http_session
+
+
+class TestHttpClient:
+    """Test process-wide session lifecycle."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_session(self):
+        """Start and end every test without a shared session."""
+        close_http_session()
+        yield
+        close_http_session()
+    
+    def test_session_is_shared(self):
+        """Test that repeated calls return the same session."""
+        assert get_http_session() is get_http_session()
+    
+    def test_close_releases_session(self):
+        """Test that closing drops the session and a new one is created on demand."""
+        first = get_http_session()
+        close_http_session()
+        
+        assert http_client._session is None
+        assert get_http_session() is not first
+    
+    def test_close_without_session_is_noop(self):
+        """Test that closing twice does not raise."""
+        close_http_session()
+        close_http_session()
+    
+    def test_pool_size(self):
+        """Test that the adapter pool is sized for concurrent batches."""
+        session = create_http_session(pool_size=5)
+        adapter = session.get_adapter("https://routes.googleapis.com")
+        
+        assert adapter._pool_maxsize == 5
+        session.close()
@@ -0,0 +1,148 @@
+"""
+Unit tests for Routes API request planning (matrix_planner).
+"""
+import pytest
+from app.services.matrix_planner import (
+    plan_missing_requests,
+    plan_tiles,
+    split_request,
+    count_elements
+)
+
+
+def covered_cells(plan):
+    """Expand a request plan into the set of cells it fetches."""
+    return {(i, j) for rows, cols in plan for i in rows for j in cols}
+
+
+class TestSplitRequest:
+    """Test splitting rectangles to fit element limits."""
+    
+    def test_fits_in_one_request(self):
+        """Test rectangle under the limit is a single request."""
+        plan = split_request(list(range(5)), list(range(5)), 625)
+        assert plan == [(list(range(5)), list(range(5)))]
+    
+    def test_split_respects_limit(self):
+        """Test every request stays within the element limit."""
+        plan = split_request(list(range(30)), list(range(30)), 100)
+        
+        assert all(len(rows) * len(cols) <= 100 for rows, cols in plan)
+        assert covered_cells(plan) == {(i, j) for i in range(30) for j in range(30)}
+    
+    def test_wide_row_is_split_by_columns(self):
+        """Test a single row wider than the limit is split by columns."""
+        plan = split_request([0], list(range(250)), 100)
+        
+        assert len(plan) == 3
+        assert all(len(cols) <= 100 for _, cols in plan)
+
+
+class TestPlanTiles:
+    """Test 2D tile scheduling for large matrices."""
+    
+    @pytest.mark.parametrize("n_rows,n_cols,limit", [
+        (201, 201, 100),
+        (201, 201, 625),
+        (1001, 1001, 625),
+        (1, 1000, 625),
+        (7, 3, 100),
+    ])
+    def test_tiles_cover_matrix_within_limit(self, n_rows, n_cols, limit):
+        """Test tiles cover every cell exactly once and fit the limit."""
+        tiles = plan_tiles(n_rows, n_cols, limit)
+        
+        sizes = [(r.stop - r.start) * (c.stop - c.start) for r, c in tiles]
+        assert all(size <= limit for size in sizes)
+        assert sum(sizes) == n_rows * n_cols
+        
+        covered = {(i, j) for r, c in tiles for i in range(r.start, r.stop) for j in range(c.start, c.stop)}
+        assert len(covered) == n_rows * n_cols
+    
+    def test_pro_mode_with_many_origins(self):
+        """Test Pro mode with more than 100 origins still produces tiles."""
+        tiles = plan_tiles(150, 150, 100)
+        assert tiles
+        assert all((r.stop - r.start) * (c.stop - c.start) <= 100 for r, c in tiles)
+    
+    def test_tiles_are_balanced(self):
+        """Test tile sizes along an axis differ by at most one."""
+        tiles = plan_tiles(201, 201, 625)
+        row_sizes = {r.stop - r.start for r, _ in tiles}
+        col_sizes = {c.stop - c.start for _, c in tiles}
+        
+        assert max(row_sizes) - min(row_sizes) <= 1
+        assert max(col_sizes) - min(col_sizes) <= 1
+    
+    def test_invalid_limit_raises_error(self):
+        """Test that a zero element limit is rejected."""
+        with pytest.raises(ValueError):
+            plan_tiles(10, 10, 0)
+
+
+class TestPlanMissingRequests:
+    """Test grouping of missing cells into sub-rectangles."""
+    
+    def test_no_misses(self):
+        """Test empty plan when nothing is missing."""
+        assert plan_missing_requests([], 625) == []
+    
+    def test_full_miss_is_single_request(self):
+        """Test fully missing matrix becomes one request."""
+        missing = [(i, j) for i in range(4) for j in range(4)]
+        plan = plan_missing_requests(missing, 625)
+        
+        assert len(plan) == 1
+        assert count_elements(plan) == 16
+    
+    def test_new_recipients_only_fetch_new_rows_and_columns(self):
+        """Test adding recipients only requests their rows and columns."""
+        n_old, n_new = 20, 3
+        n = n_old + n_new
+        new = set(range(n_old, n))
+        missing = [(i, j) for i in range(n) for j in range(n) if i in new or j in new]
+        
+        plan = plan_missing_requests(missing, 625)
+        
+        assert covered_cells(plan) == set(missing)
+        assert len(plan) == 2
+        assert count_elements(plan) == len(missing)
+    
+    def test_scattered_misses_use_dense_rectangle(self):
+        """Test many distinct row signatures collapse into one request."""
+        # Diagonal already known: every row has a different signature
+        missing = [(i, j) for i in range(10) for j in range(10) if i != j]
+        plan = plan_missing_requests(missing, 625)
+        
+        assert len(plan) == 1
+        assert covered_cells(plan) >= set(missing)
+    
+    def test_exact_plan_requests_only_missing_cells(self):
+        """Test exact planning never bills cells outside the miss set."""
+        missing = [(i, j) for i in range(10) for j in range(10) if i != j]
+        plan = plan_missing_requests(missing, 625, exact=True)
+        
+        assert covered_cells(plan) == set(missing)
+        assert count_elements(plan) == len(missing)
+    
+    def test_upper_triangle_is_bisected(self):
+        """Test a triangular miss set is split instead of fetched densely."""
+        n = 40
+        missing = [(i, j) for i in range(n) for j in range(n) if i < j]
+        plan = plan_missing_requests(missing, 625)
+        
+        assert covered_cells(plan) >= set(missing)
+        assert count_elements(plan) < 0.75 * n * n
+    
+    def test_plan_respects_pro_limit(self):
+        """Test planned requests fit the Pro mode element limit."""
+        missing = [(i, j) for i in range(10) for j in range(10) if (i + j) % 3]
+        plan = plan_missing_requests(missing, 100)
+        
+        assert all(len(rows) * len(cols) <= 100 for rows, cols in plan)
+        assert covered_cells(plan) >= set(missing)
+
+
+if __name__ == "__main__":
+    """Run tests directly."""
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,112 @@
+"""
+Unit tests for the Prometheus metrics.
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.api.metrics import metrics
+from app.services.routes_api_service import RoutesAPIService
+from app.utils.cache_service import CacheService
+from app.utils.local_cache import LocalCache
+from app.utils.metrics import MetricsMiddleware, current_endpoint, instrument_engine, render_metrics
+
+
+def sample(name, **labels):
+    """Current value of a metric sample (0 if never recorded)."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics:
+    """Test metrics are recorded where the work happens."""
+    
+    def test_cache_lookups_by_layer_and_result(self):
+        """Test bulk lookups count local hits, Redis hits and misses."""
+        redis_client = Mock()
+        redis_client.ping.return_value = True
+        redis_client.mget.return_value = ["15000", None]
+        cache = CacheService(redis_client=redis_client, local_cache=LocalCache(max_entries=0))
+        cache.legacy_fallback = False
+        before = {
+            result: sample("rizq_cache_lookups_total", layer="layer1", result=result)
+            for result in ("redis_hit", "miss")
+        }
+        
+        cache.get_base_distances_bulk([((-6.2, 106.8), (-6.3, 106.9)), ((-6.3, 106.9), (-6.2, 106.8))])
+        
+        assert sample("rizq_cache_lookups_total", layer="layer1", result="redis_hit") == before["redis_hit"] + 1
+        assert sample("rizq_cache_lookups_total", layer="layer1", result="miss") == before["miss"] + 1
+    
+    def test_routes_api_elements_and_latency_by_mode(self):
+        """Test each API call counts its billable elements and latency."""
+        response = Mock(status_code=200)
+        response.json.return_value = []
+        session = Mock()
+        session.post.return_value = response
+        service = RoutesAPIService(api_key="test", cache_service=Mock(spec=CacheService), session=session)
+        elements = sample("rizq_routes_api_elements_total", mode="pro")
+        requests = sample("rizq_routes_api_request_seconds_count", mode="pro")
+        
+        service._call_routes_api([(-6.2, 106.8)] * 2, [(-6.3, 106.9)] * 3, True, None)
+        
+        assert sample("rizq_routes_api_elements_total", mode="pro") == elements + 6
+        assert sample("rizq_routes_api_request_seconds_count", mode="pro") == requests + 1
+    
+    def test_fallback_cells_counted(self):
+        """Test cells estimated after an API failure are counted."""
+        cache = Mock(spec=CacheService)
+        cache.get_base_routes_bulk.side_effect = lambda pairs: [None] * len(pairs)
+        cache.get_negative_bulk.side_effect = lambda pairs: [None] * len(pairs)
+        store = Mock()
+        store.get_many.side_effect = lambda pairs: [None] * len(pairs)
+        service = RoutesAPIService(api_key="test", cache_service=cache, distance_store=store)
+        service._call_routes_api = Mock(side_effect=RuntimeError("API down"))
+        before = sample("rizq_routes_api_fallback_cells_total", mode="essentials")
+        
+        result = service.compute_route_matrix([(-6.2, 106.8), (-6.3, 106.9)], [(-6.4, 107.0)])
+        
+        assert result["status"] == "FALLBACK"
+        assert sample("rizq_routes_api_fallback_cells_total", mode="essentials") == before + 2
+    
+    def test_db_queries_labelled_with_endpoint(self):
+        """Test queries are timed per route path, and as background outside requests."""
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+        
+        async def endpoint_app(scope, receive, send):
+            scope["route"] = SimpleNamespace(path="/api/v1/items/{item_id}")  # Set by routing
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            await send({"endpoint": current_endpoint()})
+        
+        sent = []
+        
+        async def send(message):
+            sent.append(message)
+        
+        before = sample("rizq_db_query_seconds_count", endpoint="/api/v1/items/{item_id}")
+        asyncio.run(MetricsMiddleware(endpoint_app)({"type": "http"}, None, send))
+        
+        assert sent == [{"endpoint": "/api/v1/items/{item_id}"}]
+        assert sample("rizq_db_query_seconds_count", endpoint="/api/v1/items/{item_id}") == before + 1
+        assert current_endpoint() == "background"
+    
+    def test_metrics_endpoint_renders_text_format(self):
+        """Test /metrics returns the Prometheus exposition format."""
+        response = metrics()
+        
+        assert response.media_type.startswith("text/plain")
+        assert b"rizq_routes_api_elements_total" in response.body
+    
+    def test_multiprocess_aggregation(self, tmp_path, monkeypatch):
+        """Test worker samples are read from PROMETHEUS_MULTIPROC_DIR when set."""
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        
+        payload, content_type = render_metrics()
+        
+        assert content_type.startswith("text/plain")
+        assert b"rizq_" not in payload  # Empty directory: no worker has written samples yet
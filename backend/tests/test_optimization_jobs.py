@@ -0,0 +1,163 @@
+"""
+Unit tests for asynchronous optimization jobs.
+"""
+import asyncio
+import json
+import threading
+import pytest
+from unittest.mock import patch
+from app.config import settings
+from app.services.optimization_jobs import OptimizationJob, OptimizationJobManager
+from app.services.optimization_service import OptimizationCancelledError
+from app.services.solver_pool import SolverBusyError, SolverPool
+
+
+class FakeOptimizationService:
+    """Reports two improving solutions, then waits to be released or cancelled."""
+    
+    def __init__(self):
+        self.release = threading.Event()
+    
+    def solve_tsp(self, recipient_ids, on_progress=None, cancel_event=None, **kwargs):
+        on_progress({"objective": 200, "solutions": 1, "elapsed_seconds": 0.1, "routes": [["b", "a"]]})
+        on_progress({"objective": 100, "solutions": 2, "elapsed_seconds": 0.2, "routes": [["a", "b"]]})
+        while not self.release.wait(0.01):
+            if cancel_event.is_set():
+                raise OptimizationCancelledError("Optimization cancelled")
+        if not recipient_ids:
+            raise ValueError("recipient_ids cannot be empty")
+        return {"optimized_sequence": ["a", "b"], "total_distance_meters": 1000}
+
+
+async def wait_until(condition, timeout=5.0):
+    """Poll condition until it holds."""
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Condition not reached")
+
+
+class TestOptimizationJobManager:
+    """Test job lifecycle with thread workers."""
+    
+    @pytest.fixture
+    def service(self):
+        """Install a fake service in the solver workers."""
+        service = FakeOptimizationService()
+        with patch("app.services.solver_pool._service", service):
+            yield service
+    
+    @pytest.fixture
+    def jobs(self):
+        """Create a job manager on a one-worker thread pool."""
+        pool = SolverPool(max_workers=1, max_queued=0, use_processes=False)
+        yield OptimizationJobManager(pool=pool)
+        pool.stop()
+    
+    def test_job_completes_with_progress(self, jobs, service):
+        """Test a job reports progress, then its result."""
+        async def scenario():
+            job = jobs.submit("tsp", "admin", recipient_ids=["a", "b"])
+            assert job.status == OptimizationJob.QUEUED
+            
+            await wait_until(lambda: job.progress is not None and job.progress["objective"] == 100)
+            assert job.status == OptimizationJob.RUNNING
+            
+            service.release.set()
+            await wait_until(lambda: job.finished)
+            return job
+        
+        job = asyncio.run(scenario())
+        
+        assert job.status == OptimizationJob.COMPLETED
+        assert job.result["optimized_sequence"] == ["a", "b"]
+        assert job.snapshot()["started_at"] is not None
+        assert jobs.get(job.id, "admin") is job
+        assert jobs.get(job.id, "someone-else") is None
+    
+    def test_progress_reader_threads_end_with_jobs(self, jobs, service):
+        """Test each job's progress reader is a dedicated thread that exits when the job ends."""
+        service.release.set()
+        
+        def readers():
+            return [t for t in threading.enumerate() if t.name.startswith("job-progress-")]
+        
+        async def scenario():
+            job = jobs.submit("tsp", "admin", recipient_ids=["a"])
+            await wait_until(lambda: job.finished)
+            await wait_until(lambda: not readers())
+            return job
+        
+        job = asyncio.run(scenario())
+        
+        assert job.status == OptimizationJob.COMPLETED
+    
+    def test_job_failure_and_admission(self, jobs, service):
+        """Test solver errors fail the job and a full pool rejects new jobs."""
+        async def scenario():
+            job = jobs.submit("tsp", "admin", recipient_ids=[])
+            with pytest.raises(SolverBusyError):
+                jobs.submit("tsp", "admin", recipient_ids=["a"])
+            service.release.set()
+            await wait_until(lambda: job.finished)
+            return job
+        
+        job = asyncio.run(scenario())
+        
+        assert job.status == OptimizationJob.FAILED
+        assert job.error == "recipient_ids cannot be empty"
+    
+    def test_cancel_stops_running_solve(self, jobs, service):
+        """Test cancelling marks the job at once and frees the worker."""
+        async def scenario():
+            job = jobs.submit("tsp", "admin", recipient_ids=["a", "b"])
+            await wait_until(lambda: job.status == OptimizationJob.RUNNING)
+            
+            jobs.cancel(job)
+            assert job.status == OptimizationJob.CANCELLED
+            
+            await wait_until(lambda: jobs.pool.snapshot()["in_flight"] == 0)
+            return job
+        
+        job = asyncio.run(scenario())
+        
+        assert job.result is None
+    
+    def test_finished_jobs_expire(self, jobs, service):
+        """Test finished jobs are dropped after the TTL."""
+        service.release.set()
+        
+        async def scenario():
+            job = jobs.submit("tsp", "admin", recipient_ids=["a"])
+            await wait_until(lambda: job.finished)
+            return job
+        
+        job = asyncio.run(scenario())
+        
+        with patch.object(settings, "OPTIMIZATION_JOB_TTL_SECONDS", -1):
+            assert jobs.get(job.id, "admin") is None
+    
+    def test_event_stream(self, jobs, service):
+        """Test the SSE stream sends progress and ends with the final event."""
+        async def scenario():
+            job = jobs.submit("tsp", "admin", recipient_ids=["a", "b"])
+            await wait_until(lambda: job.progress is not None and job.progress["objective"] == 100)
+            frames = []
+            
+            async def collect():
+                async for frame in jobs.events(job):
+                    frames.append(frame)
+            
+            reader = asyncio.ensure_future(collect())
+            await wait_until(lambda: frames)
+            service.release.set()
+            await asyncio.wait_for(reader, 5)
+            return frames
+        
+        frames = asyncio.run(scenario())
+        
+        assert frames[0].startswith("event: progress\n")
+        assert json.loads(frames[0].split("data: ", 1)[1])["progress"]["objective"] == 100
+        assert frames[-1].startswith("event: completed\n")
+        assert json.loads(frames[-1].split("data: ", 1)[1])["result"]["total_distance_meters"] == 1000
@@ -0,0 +1,254 @@
+"""
+Unit tests for the optimization service solution cache, warm starts and progress.
+"""
+import threading
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from uuid import uuid4
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from app.config import settings
+from app.services.optimization_service import (
+    OptimizationCancelledError, OptimizationService, solution_fingerprint, warm_start_routes
+)
+
+DEPOT = (-6.2088, 106.8456)
+
+
+def make_recipient(lat, lng, num_packages=1, updated_at=datetime(2025, 11, 1, 8, 0)):
+    """Create a recipient-like row with a PostGIS location."""
+    return SimpleNamespace(
+        id=uuid4(),
+        location=from_shape(Point(lng, lat), srid=4326),
+        num_packages=num_packages,
+        updated_at=updated_at
+    )
+
+
+class TestSolutionFingerprint:
+    """Test canonical problem fingerprints."""
+    
+    @pytest.fixture
+    def recipients(self):
+        """Create three recipients."""
+        return [make_recipient(-6.20, 106.80), make_recipient(-6.21, 106.81, 3), make_recipient(-6.22, 106.82)]
+    
+    def test_independent_of_recipient_order(self, recipients):
+        """Test the request order of recipients does not matter."""
+        fingerprint = solution_fingerprint("tsp", recipients, DEPOT, "d0.q5", timeout=30)
+        
+        assert fingerprint == solution_fingerprint("tsp", recipients[::-1], DEPOT, "d0.q5", timeout=30)
+    
+    def test_changes_with_problem_inputs(self, recipients):
+        """Test every input that affects the solution changes the fingerprint."""
+        fingerprint = solution_fingerprint("cvrp", recipients, DEPOT, "d0.q5", num_couriers=2)
+        
+        assert fingerprint != solution_fingerprint("tsp", recipients, DEPOT, "d0.q5", num_couriers=2)
+        assert fingerprint != solution_fingerprint("cvrp", recipients[:2], DEPOT, "d0.q5", num_couriers=2)
+        assert fingerprint != solution_fingerprint("cvrp", recipients, (-6.3, 106.9), "d0.q5", num_couriers=2)
+        assert fingerprint != solution_fingerprint("cvrp", recipients, DEPOT, "d1.q5", num_couriers=2)
+        assert fingerprint != solution_fingerprint("cvrp", recipients, DEPOT, "d0.q5", num_couriers=3)
+    
+    def test_changes_when_recipient_updated(self, recipients):
+        """Test editing an involved recipient yields a new fingerprint."""
+        fingerprint = solution_fingerprint("tsp", recipients, DEPOT, "d0.q5")
+        
+        recipients[1].updated_at += timedelta(minutes=1)
+        
+        assert fingerprint != solution_fingerprint("tsp", recipients, DEPOT, "d0.q5")
+
+
+class TestSolveTSPSolutionCache:
+    """Test solve_tsp reuses cached solutions."""
+    
+    @pytest.fixture
+    def service(self):
+        """Create service with a mocked matrix source."""
+        routes_api_service = Mock()
+        routes_api_service.cache_service.matrix_version.return_value = "d0.q5"
+        routes_api_service.cache_service.get_solution.return_value = None
+        routes_api_service.compute_route_matrix.return_value = {
+            "distance_matrix": [[0, 1000, 2000], [1000, 0, 1500], [2000, 1500, 0]],
+            "duration_matrix": [[0, 100, 200], [100, 0, 150], [200, 150, 0]],
+            "api_calls": 1,
+            "cache_hits": 0
+        }
+        return OptimizationService(routes_api_service=routes_api_service)
+    
+    def test_solution_stored_then_reused(self, service):
+        """Test the first solve is cached and an identical request skips the solver."""
+        recipients = [make_recipient(-6.20, 106.80), make_recipient(-6.21, 106.81)]
+        cache = service.routes_api_service.cache_service
+        
+        with patch.object(service, "get_recipients", return_value=recipients):
+            result = service.solve_tsp([r.id for r in recipients], depot_location=DEPOT, timeout_seconds=1)
+            
+            assert result["solution_cached"] is False
+            fingerprint, stored, ttl = cache.set_solution.call_args[0]
+            assert ttl == settings.SOLUTION_CACHE_TTL_SECONDS
+            assert "_profiling" not in stored
+            
+            cache.get_solution.return_value = dict(stored)
+            cached = service.solve_tsp([r.id for r in recipients], depot_location=DEPOT, timeout_seconds=1)
+        
+        assert cached["solution_cached"] is True
+        assert cached["optimized_sequence"] == result["optimized_sequence"]
+        assert cache.get_solution.call_args[0][0] == fingerprint
+        assert service.routes_api_service.compute_route_matrix.call_count == 1
+
+
+class TestWarmStartRoutes:
+    """Test seeding routes from a previous solution."""
+    
+    # Depot 0 and four stops on a line: cost is the distance between positions
+    COSTS = [[abs(a - b) for b in range(5)] for a in range(5)]
+    NODE_IDS = ["", "a", "b", "c", "d"]
+    
+    def test_removed_recipients_skipped_and_new_inserted(self):
+        """Test removed ids are dropped and new nodes take their cheapest position."""
+        routes = warm_start_routes([["a", "x", "d", "b"]], self.NODE_IDS, self.COSTS, 1)
+        
+        assert routes == [[1, 3, 4, 2]]
+    
+    def test_capacity_respected(self):
+        """Test stops over capacity are released and re-inserted where they fit."""
+        demands = [0, 2, 2, 2, 2]
+        
+        routes = warm_start_routes(
+            [["a", "b", "c"], ["d"]], self.NODE_IDS, self.COSTS, 2, demands, capacity=4
+        )
+        
+        assert routes == [[1, 2], [3, 4]]
+    
+    def test_extra_routes_released(self):
+        """Test routes beyond the vehicle count are merged into the remaining ones."""
+        routes = warm_start_routes([["a"], ["b"], ["c", "d"]], self.NODE_IDS, self.COSTS, 2)
+        
+        assert sorted(node for route in routes for node in route) == [1, 2, 3, 4]
+        assert len(routes) == 2
+    
+    def test_nothing_reusable(self):
+        """Test no seed is built when no previous recipient remains or one cannot fit."""
+        assert warm_start_routes([["x", "y"]], self.NODE_IDS, self.COSTS, 1) is None
+        assert warm_start_routes(
+            [["a", "b", "c", "d"]], self.NODE_IDS, self.COSTS, 1, [0, 2, 2, 2, 2], capacity=4
+        ) is None
+
+
+@pytest.fixture
+def recipients():
+    """Create four recipients on a diagonal."""
+    return [make_recipient(-6.20 - 0.01 * i, 106.80 + 0.01 * i) for i in range(4)]
+
+
+@pytest.fixture
+def euclidean_service():
+    """Create service with a Manhattan-distance matrix and no cached solutions."""
+    points = [DEPOT] + [(-6.20 - 0.01 * i, 106.80 + 0.01 * i) for i in range(4)]
+    matrix = [[int(1e5 * (abs(a[0] - b[0]) + abs(a[1] - b[1]))) for b in points] for a in points]
+    routes_api_service = Mock()
+    routes_api_service.cache_service.matrix_version.return_value = "d0.q5"
+    routes_api_service.cache_service.get_solution.return_value = None
+    routes_api_service.compute_route_matrix.return_value = {
+        "distance_matrix": matrix, "duration_matrix": matrix, "api_calls": 0, "cache_hits": 0
+    }
+    return OptimizationService(routes_api_service=routes_api_service)
+
+
+class TestSolveTSPWarmStart:
+    """Test solve_tsp seeded with a previous solution."""
+    
+    @pytest.fixture
+    def service(self, euclidean_service):
+        """Service with a Manhattan-distance matrix."""
+        return euclidean_service
+    
+    def test_initial_sequence_seeds_search(self, service, recipients):
+        """Test a previous sequence with a new recipient is warm-started."""
+        previous = [recipients[0].id, recipients[2].id, recipients[1].id]
+        
+        with patch.object(service, "get_recipients", return_value=recipients), \
+                patch.object(settings, "SOLUTION_CACHE_ENABLED", False):
+            result = service.solve_tsp(
+                [r.id for r in recipients], depot_location=DEPOT, timeout_seconds=2, initial_sequence=previous
+            )
+        
+        assert result["warm_start"] is True
+        assert sorted(result["optimized_sequence"]) == sorted(str(r.id) for r in recipients)
+    
+    def test_previous_result_id_resolved(self, service, recipients):
+        """Test previous_result_id loads the sequence from the solution cache."""
+        cache = service.routes_api_service.cache_service
+        cache.get_solution.side_effect = lambda key, count=True: (
+            {"optimized_sequence": [str(r.id) for r in recipients]} if key == "earlier" else None
+        )
+        
+        with patch.object(service, "get_recipients", return_value=recipients):
+            result = service.solve_tsp(
+                [r.id for r in recipients], depot_location=DEPOT, timeout_seconds=1, previous_result_id="earlier"
+            )
+        
+        assert result["warm_start"] is True
+        assert result["result_id"] == cache.set_solution.call_args[0][0]
+        cache.get_solution.assert_any_call("earlier", count=False)
+    
+    def test_unknown_previous_result_solves_cold(self, service, recipients):
+        """Test an expired previous result falls back to a cold start."""
+        with patch.object(service, "get_recipients", return_value=recipients):
+            result = service.solve_tsp(
+                [r.id for r in recipients], depot_location=DEPOT, timeout_seconds=1, previous_result_id="gone"
+            )
+        
+        assert result["warm_start"] is False
+
+
+class TestSolveProgress:
+    """Test progress reports and cancellation of a running solve."""
+    
+    def test_progress_reports_improving_solutions(self, euclidean_service, recipients):
+        """Test the solution callback reports improving objectives with routes."""
+        reports = []
+        
+        with patch.object(euclidean_service, "get_recipients", return_value=recipients), \
+                patch.object(settings, "OPTIMIZATION_PROGRESS_INTERVAL_SECONDS", 0):
+            result = euclidean_service.solve_tsp(
+                [r.id for r in recipients], depot_location=DEPOT, timeout_seconds=1, on_progress=reports.append
+            )
+        
+        assert reports
+        objectives = [report["objective"] for report in reports]
+        assert objectives == sorted(objectives, reverse=True)
+        assert sorted(reports[-1]["routes"][0]) == sorted(result["optimized_sequence"])
+    
+    def test_cancelled_solve_raises(self, euclidean_service, recipients):
+        """Test a set cancel event stops the solve without caching a result."""
+        cancel_event = threading.Event()
+        cancel_event.set()
+        
+        with patch.object(euclidean_service, "get_recipients", return_value=recipients):
+            with pytest.raises(OptimizationCancelledError):
+                euclidean_service.solve_tsp(
+                    [r.id for r in recipients], depot_location=DEPOT, timeout_seconds=1, cancel_event=cancel_event
+                )
+        
+        euclidean_service.routes_api_service.cache_service.set_solution.assert_not_called()
+
+
+class TestSolveCVRPMatrixElements:
+    """Test the matrix element counts reported by solve_cvrp."""
+    
+    def test_fallback_cells_reported_as_estimated(self, euclidean_service, recipients):
+        """Test cells served from the Euclidean fallback are not counted as real."""
+        euclidean_service.routes_api_service.compute_route_matrix.return_value["fallback_cells"] = 3
+        
+        with patch.object(euclidean_service, "get_recipients", return_value=recipients), \
+                patch.object(settings, "SOLUTION_CACHE_ENABLED", False):
+            result = euclidean_service.solve_cvrp(
+                [r.id for r in recipients], num_couriers=2, capacity_per_courier=10,
+                depot_location=DEPOT, timeout_seconds=1
+            )
+        
+        assert result["matrix_estimated_elements"] == 3
+        assert result["matrix_real_elements"] == 5 * 4 - 3
@@ -0,0 +1,55 @@
+"""
+Unit tests for PairDistanceRepository.
+Tests bulk reads and upserts of stored pair distances.
+"""
+import pytest
+from app.repositories.pair_distance_repository import PairDistanceRepository
+
+
+def test_bulk_upsert_and_get(db_session):
+    """Test stored pairs are returned aligned with the requested keys."""
+    repo = PairDistanceRepository(db_session)
+    
+    written = repo.bulk_upsert([
+        (1, 2, 1500, 180),
+        (2, 1, 1700, 200),
+    ])
+    
+    assert written == 2
+    assert repo.bulk_get([(2, 1), (3, 4), (1, 2)]) == [(1700, 200), None, (1500, 180)]
+
+
+def test_bulk_upsert_updates_existing(db_session):
+    """Test upsert overwrites distance of an existing pair."""
+    repo = PairDistanceRepository(db_session)
+    
+    repo.bulk_upsert([(1, 2, 1500, 180)])
+    repo.bulk_upsert([(1, 2, 1600, 190)])
+    
+    assert repo.bulk_get([(1, 2)]) == [(1600, 190)]
+
+
+def test_bulk_upsert_keeps_static_duration(db_session):
+    """Test a write without duration keeps the stored static duration."""
+    repo = PairDistanceRepository(db_session)
+    
+    repo.bulk_upsert([(1, 2, 1500, 180)])
+    repo.bulk_upsert([(1, 2, 1550, None)])
+    
+    assert repo.bulk_get([(1, 2)]) == [(1550, 180)]
+
+
+def test_bulk_upsert_deduplicates_batch(db_session):
+    """Test duplicate keys within one batch do not violate the primary key."""
+    repo = PairDistanceRepository(db_session)
+    
+    written = repo.bulk_upsert([(1, 2, 1500, 180), (1, 2, 1600, 190)])
+    
+    assert written == 1
+    assert repo.bulk_get([(1, 2)]) == [(1600, 190)]
+
+
+def test_bulk_get_empty(db_session):
+    """Test empty key list returns empty result."""
+    repo = PairDistanceRepository(db_session)
+    assert repo.bulk_get([]) == []
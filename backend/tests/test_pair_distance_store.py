@@ -0,0 +1,83 @@
+"""
+Unit tests for PairDistanceStore (durable Layer 3).
+"""
+import pytest
+from unittest.mock import Mock, patch
+from app.services.pair_distance_store import PairDistanceStore
+from app.utils.geo import pack_coordinate
+
+
+ORIGIN = (-6.2, 106.8)
+DESTINATION = (-6.3, 106.9)
+
+
+class TestPairDistanceStore:
+    """Test store behaviour with a mocked repository."""
+    
+    @pytest.fixture
+    def session(self):
+        """Create mock database session."""
+        return Mock()
+    
+    @pytest.fixture
+    def store(self, session):
+        """Create enabled store with mock sessions."""
+        return PairDistanceStore(session_factory=lambda: session, enabled=True)
+    
+    def test_get_many_packs_keys(self, store, session):
+        """Test coordinates are packed into integer keys for lookup."""
+        with patch('app.services.pair_distance_store.PairDistanceRepository') as repo_cls:
+            repo_cls.return_value.bulk_get.return_value = [(1500, 180)]
+            
+            result = store.get_many([(ORIGIN, DESTINATION)])
+        
+        repo_cls.return_value.bulk_get.assert_called_once_with(
+            [(pack_coordinate(*ORIGIN), pack_coordinate(*DESTINATION))]
+        )
+        assert result == [(1500, 180)]
+        session.close.assert_called_once()
+    
+    def test_get_many_error_is_miss(self, store):
+        """Test database errors degrade to misses."""
+        with patch('app.services.pair_distance_store.PairDistanceRepository') as repo_cls:
+            repo_cls.return_value.bulk_get.side_effect = Exception("connection refused")
+            
+            result = store.get_many([(ORIGIN, DESTINATION), (DESTINATION, ORIGIN)])
+        
+        assert result == [None, None]
+    
+    def test_put_many_error_rolls_back(self, store, session):
+        """Test failed writes are rolled back and reported as 0 rows."""
+        with patch('app.services.pair_distance_store.PairDistanceRepository') as repo_cls:
+            repo_cls.return_value.bulk_upsert.side_effect = Exception("deadlock")
+            
+            written = store.put_many([(ORIGIN, DESTINATION, 1500, 180)])
+        
+        assert written == 0
+        session.rollback.assert_called_once()
+    
+    def test_put_many_async_backfills(self, store):
+        """Test background backfill writes packed rows."""
+        with patch('app.services.pair_distance_store.PairDistanceRepository') as repo_cls:
+            repo_cls.return_value.bulk_upsert.return_value = 1
+            
+            future = store.put_many_async([(ORIGIN, DESTINATION, 1500, None)])
+            assert future.result(timeout=5) == 1
+        
+        repo_cls.return_value.bulk_upsert.assert_called_once_with(
+            [(pack_coordinate(*ORIGIN), pack_coordinate(*DESTINATION), 1500, None)]
+        )
+    
+    def test_disabled_store_is_noop(self, session):
+        """Test disabled store never opens a session."""
+        store = PairDistanceStore(session_factory=Mock(), enabled=False)
+        
+        assert store.get_many([(ORIGIN, DESTINATION)]) == [None]
+        assert store.put_many([(ORIGIN, DESTINATION, 1500, 180)]) == 0
+        assert store.put_many_async([(ORIGIN, DESTINATION, 1500, 180)]) is None
+        store.session_factory.assert_not_called()
+
+
+if __name__ == "__main__":
+    """Run tests directly."""
+    pytest.main([__file__, "-v", "-s"])
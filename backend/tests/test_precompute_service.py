@@ -0,0 +1,139 @@
+"""
+Unit tests for background neighbor-distance precomputation.
+"""
+import time
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from uuid import uuid4
+from app.config import settings
+from app.services.precompute_service import PrecomputeQueue, is_off_peak
+
+
+class TestIsOffPeak:
+    """Test off-peak window checks."""
+    
+    @pytest.mark.parametrize("hour,expected", [
+        (21, False), (22, True), (23, True), (0, True), (5, True), (6, False), (12, False)
+    ])
+    def test_window_wrapping_midnight(self, hour, expected):
+        """Test a 22 → 6 window."""
+        assert is_off_peak(datetime(2025, 11, 1, hour, 30), 22, 6) is expected
+    
+    @pytest.mark.parametrize("hour,expected", [(0, False), (1, True), (4, True), (5, False)])
+    def test_window_same_day(self, hour, expected):
+        """Test a 1 → 5 window."""
+        assert is_off_peak(datetime(2025, 11, 1, hour), 1, 5) is expected
+    
+    def test_equal_hours_always_open(self):
+        """Test equal start and end hours cover the whole day."""
+        assert is_off_peak(datetime(2025, 11, 1, 14), 0, 0)
+
+
+class TestPrecomputeQueue:
+    """Test queueing, batching and pair collection."""
+    
+    @pytest.fixture
+    def routes_service(self):
+        """Create mock Routes API service."""
+        service = Mock()
+        service.prefetch_pairs.side_effect = lambda pairs: {"pairs": len(pairs), "status": "OK"}
+        return service
+    
+    @pytest.fixture
+    def recipients(self):
+        """Create three recipients on a line, keyed by ID."""
+        return {
+            uuid4(): SimpleNamespace(point=(-6.20 - i * 0.01, 106.80))
+            for i in range(3)
+        }
+    
+    @pytest.fixture
+    def queue(self, routes_service, recipients):
+        """Create queue whose repository serves the in-memory recipients."""
+        queue = PrecomputeQueue(routes_api_service=routes_service, session_factory=Mock)
+        
+        repo = Mock()
+        repo.get_by_id.side_effect = lambda recipient_id: recipients.get(recipient_id)
+        repo.get_nearest_neighbors.side_effect = lambda recipient, k: [
+            other for other in recipients.values() if other is not recipient
+        ][:k]
+        
+        patcher = patch('app.services.precompute_service.RecipientRepository')
+        repo_cls = patcher.start()
+        repo_cls.return_value = repo
+        repo_cls.extract_location.side_effect = lambda r: {"lat": r.point[0], "lng": r.point[1]}
+        yield queue
+        patcher.stop()
+    
+    def test_enqueue_deduplicates(self, queue):
+        """Test the same recipient is only queued once."""
+        recipient_id = uuid4()
+        
+        assert queue.enqueue(recipient_id) is True
+        assert queue.enqueue(recipient_id) is False
+        assert queue.pending_count() == 1
+    
+    def test_batch_prefetches_depot_and_neighbor_pairs(self, queue, routes_service, recipients):
+        """Test one batch sends depot and neighbor pairs in both directions together."""
+        ids = list(recipients)
+        for recipient_id in ids[:2]:
+            queue.enqueue(recipient_id)
+        
+        processed = queue.process_batch()
+        
+        assert processed == 2
+        routes_service.prefetch_pairs.assert_called_once()
+        pairs = routes_service.prefetch_pairs.call_args[0][0]
+        
+        depot = (settings.DEPOT_LAT, settings.DEPOT_LNG)
+        first = recipients[ids[0]].point
+        second = recipients[ids[1]].point
+        assert (depot, first) in pairs and (first, depot) in pairs
+        assert (first, second) in pairs and (second, first) in pairs
+        assert len(pairs) == len(set(pairs))
+        assert queue.pending_count() == 0
+    
+    def test_batch_size_limits_drain(self, queue, routes_service, recipients):
+        """Test a batch takes at most batch_size recipients."""
+        queue.batch_size = 2
+        for recipient_id in recipients:
+            queue.enqueue(recipient_id)
+        
+        assert queue.process_batch() == 2
+        assert queue.pending_count() == 1
+    
+    def test_missing_recipient_is_skipped(self, queue, routes_service):
+        """Test recipients deleted before processing are ignored."""
+        queue.enqueue(uuid4())
+        
+        assert queue.process_batch() == 1
+        routes_service.prefetch_pairs.assert_called_once_with([])
+    
+    def test_worker_waits_for_off_peak(self, queue, routes_service, recipients):
+        """Test the worker only drains the queue inside the off-peak window."""
+        queue.poll_seconds = 0.01
+        queue.clock = lambda: datetime(2025, 11, 1, 12, 0)
+        queue.enqueue(next(iter(recipients)))
+        
+        with patch.object(settings, 'PRECOMPUTE_ENABLED', True):
+            queue.start()
+            try:
+                time.sleep(0.1)
+                assert routes_service.prefetch_pairs.call_count == 0
+                
+                queue.clock = lambda: datetime(2025, 11, 1, 23, 0)
+                deadline = time.monotonic() + 2
+                while queue.pending_count() and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                queue.stop()
+        
+        assert queue.pending_count() == 0
+        routes_service.prefetch_pairs.assert_called_once()
+
+
+if __name__ == "__main__":
+    """Run tests directly."""
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,62 @@
+"""
+Unit tests for TokenBucketRateLimiter.
+"""
+import threading
+import time
+import pytest
+from app.utils.rate_limiter import TokenBucketRateLimiter
+
+
+class TestTokenBucketRateLimiter:
+    """Test token bucket behaviour."""
+    
+    def test_invalid_rate_raises_error(self):
+        """Test that non-positive rate is rejected."""
+        with pytest.raises(ValueError, match="rate must be positive"):
+            TokenBucketRateLimiter(rate=0)
+    
+    def test_burst_up_to_capacity(self):
+        """Test that a full bucket allows a burst of `capacity` calls."""
+        limiter = TokenBucketRateLimiter(rate=1, capacity=3)
+        
+        assert limiter.try_acquire() is True
+        assert limiter.try_acquire() is True
+        assert limiter.try_acquire() is True
+        assert limiter.try_acquire() is False
+    
+    def test_acquire_waits_for_refill(self):
+        """Test that acquire blocks until a token is refilled."""
+        limiter = TokenBucketRateLimiter(rate=20, capacity=1)
+        limiter.acquire()
+        
+        start = time.monotonic()
+        limiter.acquire()
+        elapsed = time.monotonic() - start
+        
+        assert elapsed >= 0.03  # ~1/20s refill
+    
+    def test_acquire_timeout(self):
+        """Test that acquire gives up after the timeout."""
+        limiter = TokenBucketRateLimiter(rate=0.1, capacity=1)
+        limiter.acquire()
+        
+        assert limiter.acquire(timeout=0.05) is False
+    
+    def test_rate_is_respected_across_threads(self):
+        """Test that concurrent callers share the same QPS budget."""
+        limiter = TokenBucketRateLimiter(rate=50, capacity=1)
+        
+        def worker():
+            for _ in range(5):
+                limiter.acquire()
+        
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        start = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+        
+        # 20 acquisitions at 50/s with a burst of 1 take at least ~0.38s
+        assert elapsed >= 0.3
@@ -186,6 +186,35 @@ class TestRecipientRepository:
         # Should skip the Assigned one
         assert deleted_count == 4
     
+    def test_get_nearest_neighbors(self, db_session, test_recipients):
+        """Test KNN query orders neighbors by distance and excludes self."""
+        repo = RecipientRepository(db_session)
+        
+        neighbors = repo.get_nearest_neighbors(test_recipients[0], k=2)
+        
+        assert [r.id for r in neighbors] == [test_recipients[1].id, test_recipients[2].id]
+    
+    def test_get_nearest_neighbors_skips_deleted(self, db_session, test_recipients):
+        """Test deleted recipients are not returned as neighbors."""
+        repo = RecipientRepository(db_session)
+        test_recipients[1].is_deleted = True
+        db_session.commit()
+        
+        neighbors = repo.get_nearest_neighbors(test_recipients[0], k=1)
+        
+        assert [r.id for r in neighbors] == [test_recipients[2].id]
+    
+    def test_get_by_status_filters_status_and_city(self, db_session, test_recipients, test_city):
+        """Test unassigned recipients are selected per city, skipping other statuses."""
+        repo = RecipientRepository(db_session)
+        test_recipients[0].status = RecipientStatus.ASSIGNED.value
+        db_session.commit()
+        
+        unassigned = repo.get_by_status(RecipientStatus.UNASSIGNED, city_id=[test_city.id])
+        
+        assert {r.id for r in unassigned} == {r.id for r in test_recipients[1:]}
+        assert repo.get_by_status(RecipientStatus.UNASSIGNED, city_id=[test_city.id + 1000]) == []
+    
     def test_extract_location(self, db_session, test_recipient):
         """Test extracting lat/lng from location."""
         location = RecipientRepository.extract_location(test_recipient)
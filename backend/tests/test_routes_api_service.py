@@ -1,11 +1,18 @@
 """
 Unit tests for RoutesAPIService (Google Routes API v2 integration).
 """
+import json
+import threading
+import time
 import pytest
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import Mock, patch, MagicMock
 from app.services.routes_api_service import RoutesAPIService
 from app.utils.cache_service import CacheService
+from app.utils.rate_limiter import TokenBucketRateLimiter
+from app.utils.http_client import create_http_session
+from app.services.pair_distance_store import PairDistanceStore
 
 
 class TestRoutesAPIService:
@@ -19,14 +26,29 @@ class TestRoutesAPIService:
         cache.get_traffic_duration.return_value = None
         cache.set_base_distance.return_value = True
         cache.set_traffic_duration.return_value = True
+        cache.get_base_routes_bulk.side_effect = lambda pairs: [None] * len(pairs)
+        cache.get_traffic_durations_swr_bulk.side_effect = (
+            lambda pairs, departure_time=None: [None] * len(pairs)
+        )
+        cache.set_base_routes_bulk.return_value = True
+        cache.set_traffic_durations_bulk.return_value = True
+        cache.get_negative_bulk.side_effect = lambda pairs: [None] * len(pairs)
         return cache
     
     @pytest.fixture
-    def routes_service(self, mock_cache_service):
+    def mock_distance_store(self):
+        """Create mock durable pair distance store (always misses)."""
+        store = Mock(spec=PairDistanceStore)
+        store.get_many.side_effect = lambda pairs: [None] * len(pairs)
+        return store
+    
+    @pytest.fixture
+    def routes_service(self, mock_cache_service, mock_distance_store):
         """Create RoutesAPIService instance for testing."""
         return RoutesAPIService(
             api_key="test-api-key",
-            cache_service=mock_cache_service
+            cache_service=mock_cache_service,
+            distance_store=mock_distance_store
         )
     
     # Initialization Tests
@@ -93,19 +115,58 @@ class TestRoutesAPIService:
         origins = [(-6.2, 106.8)]
         destinations = [(-6.3, 106.9)]
         
-        # Mock cache hit
-        mock_cache_service.get_base_distance.return_value = 15000
+        # Mock cache hit (distance with static duration)
+        mock_cache_service.get_base_routes_bulk.side_effect = None
+        mock_cache_service.get_base_routes_bulk.return_value = [(15000, 1100)]
         
-        result = routes_service.compute_route_matrix(
-            origins, destinations, use_traffic=False
-        )
+        with patch.object(routes_service, '_call_routes_api') as mock_api:
+            result = routes_service.compute_route_matrix(
+                origins, destinations, use_traffic=False
+            )
         
+        mock_api.assert_not_called()
         assert result["distance_matrix"][0][0] == 15000
-        assert result["duration_matrix"][0][0] == 900  # 15km at 60km/h = 15 min
+        assert result["duration_matrix"][0][0] == 1100  # Cached static duration, not an estimate
         assert result["status"] == "OK"
         
-        # Verify cache was checked
-        mock_cache_service.get_base_distance.assert_called_once()
+        # Verify cache was checked in bulk
+        mock_cache_service.get_base_routes_bulk.assert_called_once()
+    
+    def test_cached_and_uncached_essentials_matrices_match(self, routes_service, mock_cache_service):
+        """Test a cached run reproduces the matrix of the run that filled the cache."""
+        locations = [(-6.2 + i * 0.01, 106.8) for i in range(4)]
+        layer1 = {}
+        mock_cache_service.get_base_routes_bulk.side_effect = lambda pairs: [layer1.get(p) for p in pairs]
+        mock_cache_service.set_base_routes_bulk.side_effect = lambda entries: layer1.update(
+            {(o, d): (distance, duration) for o, d, distance, duration in entries}
+        )
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=self._fake_api()) as mock_api:
+            uncached = routes_service.compute_route_matrix(locations, locations)
+            cached = routes_service.compute_route_matrix(locations, locations)
+        
+        assert mock_api.call_count == 1
+        assert (cached["distance_matrix"] == uncached["distance_matrix"]).all()
+        assert (cached["duration_matrix"] == uncached["duration_matrix"]).all()
+        assert mock_cache_service.get_base_routes_bulk.call_count == 2
+    
+    def test_distance_only_hit_is_refetched_in_essentials_mode(self, routes_service, mock_cache_service):
+        """Test a Layer 1 entry without a static duration is not estimated."""
+        origins = [(-6.2, 106.8)]
+        destinations = [(-6.3, 106.9)]
+        mock_cache_service.get_base_routes_bulk.side_effect = None
+        mock_cache_service.get_base_routes_bulk.return_value = [(15000, None)]
+        
+        with patch.object(routes_service, '_call_routes_api', return_value=[
+            {"originIndex": 0, "destinationIndex": 0, "distanceMeters": 15000,
+             "duration": "1300s", "status": "OK"}
+        ]):
+            result = routes_service.compute_route_matrix(origins, destinations)
+        
+        assert result["duration_matrix"][0][0] == 1300
+        mock_cache_service.set_base_routes_bulk.assert_called_once_with(
+            [(origins[0], destinations[0], 15000, 1300)]
+        )
     
     def test_cache_hit_pro_mode(self, routes_service, mock_cache_service):
         """Test that cache hit returns cached data (Pro mode with traffic)."""
@@ -114,8 +175,10 @@ class TestRoutesAPIService:
         departure_time = datetime(2025, 11, 1, 8, 0)
         
         # Mock both Layer 1 and Layer 2 cache hits
-        mock_cache_service.get_base_distance.return_value = 15000
-        mock_cache_service.get_traffic_duration.return_value = 1800
+        mock_cache_service.get_base_routes_bulk.side_effect = None
+        mock_cache_service.get_base_routes_bulk.return_value = [(15000, None)]
+        mock_cache_service.get_traffic_durations_swr_bulk.side_effect = None
+        mock_cache_service.get_traffic_durations_swr_bulk.return_value = [(1800, False)]
         
         result = routes_service.compute_route_matrix(
             origins, destinations, use_traffic=True, departure_time=departure_time
@@ -126,10 +189,10 @@ class TestRoutesAPIService:
         assert result["status"] == "OK"
         
         # Verify both cache layers checked
-        mock_cache_service.get_base_distance.assert_called_once()
-        mock_cache_service.get_traffic_duration.assert_called_once()
+        mock_cache_service.get_base_routes_bulk.assert_called_once()
+        mock_cache_service.get_traffic_durations_swr_bulk.assert_called_once()
     
-    @patch('app.services.routes_api_service.requests.post')
+    @patch('app.services.routes_api_service.requests.Session.post')
     def test_cache_miss_calls_api(self, mock_post, routes_service, mock_cache_service):
         """Test that cache miss triggers API call."""
         origins = [(-6.2, 106.8)]
@@ -160,9 +223,492 @@ class TestRoutesAPIService:
         mock_post.assert_called_once()
         
         # Verify result was cached
-        mock_cache_service.set_base_distance.assert_called_once_with(
-            origins[0], destinations[0], 15000
+        mock_cache_service.set_base_routes_bulk.assert_called_once_with(
+            [(origins[0], destinations[0], 15000, 900)]
+        )
+    
+    def test_cache_lookup_is_bulk_per_matrix(self, routes_service, mock_cache_service):
+        """Test that a fully cached matrix is resolved with one bulk lookup."""
+        origins = [(-6.2 + i*0.01, 106.8) for i in range(5)]
+        destinations = [(-6.3 + j*0.01, 106.9) for j in range(4)]
+        
+        mock_cache_service.get_base_routes_bulk.side_effect = (
+            lambda pairs: [(1000 + k, 60) for k in range(len(pairs))]
+        )
+        
+        with patch('app.services.routes_api_service.requests.Session.post') as mock_post:
+            result = routes_service.compute_route_matrix(origins, destinations)
+        
+        mock_post.assert_not_called()
+        mock_cache_service.get_base_routes_bulk.assert_called_once()
+        mock_cache_service.get_base_distance.assert_not_called()
+        
+        # Pairs are requested row-major and mapped back to (i, j)
+        pairs = mock_cache_service.get_base_routes_bulk.call_args[0][0]
+        assert pairs[0] == (origins[0], destinations[0])
+        assert pairs[5] == (origins[1], destinations[1])
+        assert result["distance_matrix"][1][1] == 1005
+        assert result["distance_matrix"][4][3] == 1019
+    
+    def test_pro_mode_layer2_only_checked_for_layer1_hits(self, routes_service, mock_cache_service):
+        """Test that Layer 2 bulk lookup only covers pairs with a Layer 1 hit."""
+        origins = [(-6.2, 106.8)]
+        destinations = [(-6.3, 106.9), (-6.4, 107.0)]
+        
+        mock_cache_service.get_base_routes_bulk.side_effect = None
+        mock_cache_service.get_base_routes_bulk.return_value = [(15000, 1100), None]
+        mock_cache_service.get_traffic_durations_swr_bulk.side_effect = None
+        mock_cache_service.get_traffic_durations_swr_bulk.return_value = [(1800, False)]
+        
+        with patch.object(routes_service, '_call_routes_api', return_value=[]):
+            routes_service.compute_route_matrix(origins, destinations, use_traffic=True)
+        
+        traffic_pairs = mock_cache_service.get_traffic_durations_swr_bulk.call_args[0][0]
+        assert traffic_pairs == [(origins[0], destinations[0])]
+    
+    def test_pro_mode_keeps_cached_static_duration(self, routes_service, mock_cache_service):
+        """Test a traffic-aware fetch rewrites Layer 1 without losing its static duration."""
+        origins = [(-6.2, 106.8)]
+        destinations = [(-6.3, 106.9)]
+        mock_cache_service.get_base_routes_bulk.side_effect = None
+        mock_cache_service.get_base_routes_bulk.return_value = [(15000, 1100)]
+        
+        with patch.object(routes_service, '_call_routes_api', return_value=[
+            {"originIndex": 0, "destinationIndex": 0, "distanceMeters": 15000,
+             "duration": "1800s", "status": "OK"}
+        ]):
+            result = routes_service.compute_route_matrix(origins, destinations, use_traffic=True)
+        
+        assert result["duration_matrix"][0][0] == 1800
+        mock_cache_service.set_base_routes_bulk.assert_called_once_with(
+            [(origins[0], destinations[0], 15000, 1100)]
+        )
+    
+    def test_stale_durations_served_and_refreshed(self, routes_service, mock_cache_service):
+        """Test stale Layer 2 hits are returned at once and refreshed in the background."""
+        origins = [(-6.2, 106.8)]
+        destinations = [(-6.3, 106.9), (-6.4, 107.0)]
+        departure_time = datetime(2025, 11, 1, 8, 0)
+        
+        mock_cache_service.get_base_routes_bulk.side_effect = None
+        mock_cache_service.get_base_routes_bulk.return_value = [(15000, None), (16000, None)]
+        mock_cache_service.get_traffic_durations_swr_bulk.side_effect = None
+        mock_cache_service.get_traffic_durations_swr_bulk.return_value = [(1800, True), (1900, False)]
+        
+        with patch.object(routes_service, '_call_routes_api') as mock_api, \
+                patch.object(routes_service, '_schedule_refresh') as mock_refresh:
+            result = routes_service.compute_route_matrix(
+                origins, destinations, use_traffic=True, departure_time=departure_time
+            )
+        
+        mock_api.assert_not_called()
+        assert result["duration_matrix"].tolist() == [[1800, 1900]]
+        assert result["stale_cells"] == 1
+        mock_refresh.assert_called_once_with(origins, destinations, departure_time, [(0, 0)])
+    
+    def test_refresh_refetches_stale_cells_once(self, routes_service, mock_cache_service):
+        """Test a background refresh bypasses the cache and is not duplicated while in flight."""
+        origins = [(-6.2, 106.8)]
+        destinations = [(-6.3, 106.9), (-6.4, 107.0)]
+        departure_time = datetime(2025, 11, 1, 8, 0)
+        release = threading.Event()
+        
+        def slow_api(o, d, use_traffic, dt):
+            release.wait(5)
+            return [{"originIndex": 0, "destinationIndex": 0, "distanceMeters": 15000,
+                     "duration": "2000s", "status": "OK"}]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=slow_api) as mock_api:
+            future = routes_service._schedule_refresh(origins, destinations, departure_time, [(0, 0)])
+            assert routes_service._schedule_refresh(origins, destinations, departure_time, [(0, 0)]) is None
+            release.set()
+            future.result(timeout=5)
+        
+        mock_api.assert_called_once()
+        assert mock_api.call_args[0][1] == [destinations[0]]
+        mock_cache_service.get_base_routes_bulk.assert_not_called()
+        mock_cache_service.set_base_routes_bulk.assert_not_called()
+        mock_cache_service.set_traffic_durations_bulk.assert_called_once_with(
+            [(origins[0], destinations[0], 2000)], departure_time
+        )
+        
+        # Once finished, the tile can be refreshed again
+        with patch.object(routes_service, '_call_routes_api', return_value=[]):
+            again = routes_service._schedule_refresh(origins, destinations, departure_time, [(0, 0)])
+            assert again is not None
+            again.result(timeout=5)
+    
+    def test_partial_hit_only_requests_missing_cells(self, routes_service, mock_cache_service):
+        """Test that partial cache hits only send the missing sub-rectangles."""
+        locations = [(-6.2 + i*0.01, 106.8) for i in range(20)]
+        new = {18, 19}  # Last two locations were just added to the group
+        
+        def cached(pairs):
+            return [
+                None if locations.index(o) in new or locations.index(d) in new else (1000, 60)
+                for o, d in pairs
+            ]
+        mock_cache_service.get_base_routes_bulk.side_effect = cached
+        
+        def fake_api(origins, destinations, use_traffic, departure_time):
+            return [
+                {"originIndex": i, "destinationIndex": j, "distanceMeters": 2000,
+                 "duration": "120s", "status": "OK"}
+                for i in range(len(origins)) for j in range(len(destinations))
+            ]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=fake_api) as mock_api:
+            result = routes_service.compute_route_matrix(locations, locations)
+        
+        requested = sum(
+            len(call.args[0]) * len(call.args[1]) for call in mock_api.call_args_list
         )
+        # new rows (2 × 19, self-pairs skipped) + new columns for old rows (18 × 2)
+        assert requested == 74
+        assert result["distance_matrix"][19][0] == 2000
+        assert result["distance_matrix"][0][18] == 2000
+        assert result["distance_matrix"][1][2] == 1000
+        assert result["distance_matrix"][19][19] == 0
+        assert len(mock_cache_service.set_base_routes_bulk.call_args[0][0]) == 74
+    
+    def test_over_covered_cells_are_cached(
+        self, routes_service, mock_cache_service, mock_distance_store
+    ):
+        """Test known cells billed by a dense request rectangle are cached, not dropped."""
+        origins = [(-6.2 + i * 0.01, 106.8) for i in range(5)]
+        destinations = [(-6.3, 106.9 + j * 0.01) for j in range(5)]
+        known = (origins[2], destinations[3])
+        mock_cache_service.get_base_routes_bulk.side_effect = lambda pairs: [
+            (1000, 60) if pair == known else None for pair in pairs
+        ]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=self._fake_api()) as mock_api:
+            routes_service.compute_route_matrix(origins, destinations)
+        
+        # One 5 × 5 request is cheaper than splitting around the known cell
+        assert mock_api.call_count == 1
+        stored = mock_cache_service.set_base_routes_bulk.call_args[0][0]
+        assert len(stored) == 25
+        fresh = self._fake_api()([known[0]], [known[1]], False, None)[0]
+        assert (*known, fresh["distanceMeters"], int(fresh["duration"].rstrip("s"))) in stored
+        assert len(mock_distance_store.put_many_async.call_args[0][0]) == 25
+    
+    # Negative Cache Tests
+    
+    def test_failed_pairs_are_cached_negatively(self, routes_service, mock_cache_service):
+        """Test unroutable elements and failed requests get negative entries and count as fallback."""
+        origins = [(-6.2, 106.8)]
+        destinations = [(-6.3, 106.9), (-5.6, 106.6)]  # Second one is offshore
+        
+        with patch.object(routes_service, '_call_routes_api', return_value=[
+            {"originIndex": 0, "destinationIndex": 0, "distanceMeters": 15000,
+             "duration": "900s", "status": "OK"},
+            {"originIndex": 0, "destinationIndex": 1, "status": "ROUTE_NOT_FOUND"}
+        ]):
+            result = routes_service.compute_route_matrix(origins, destinations)
+        
+        assert result["status"] == "OK"
+        assert result["fallback_cells"] == 1
+        assert result["distance_matrix"][0][1] > 0
+        mock_cache_service.set_negative_bulk.assert_called_once_with(
+            [(origins[0], destinations[1])], CacheService.NEGATIVE_UNROUTABLE
+        )
+        mock_cache_service.set_base_routes_bulk.assert_called_once_with(
+            [(origins[0], destinations[0], 15000, 900)]
+        )
+        
+        mock_cache_service.set_negative_bulk.reset_mock()
+        with patch.object(routes_service, '_call_routes_api', side_effect=Exception("API Error")):
+            result = routes_service.compute_route_matrix(origins, destinations)
+        
+        assert result["status"] == "FALLBACK"
+        assert result["fallback_cells"] == 2
+        mock_cache_service.set_negative_bulk.assert_called_once_with(
+            [(origins[0], destinations[0]), (origins[0], destinations[1])],
+            CacheService.NEGATIVE_REQUEST_FAILED
+        )
+    
+    def test_negative_hits_skip_the_api(self, routes_service, mock_cache_service):
+        """Test known-unroutable pairs are served from the fallback without a request."""
+        origins = [(-6.2, 106.8)]
+        destinations = [(-6.3, 106.9), (-5.6, 106.6)]
+        mock_cache_service.get_negative_bulk.side_effect = (
+            lambda pairs: [CacheService.NEGATIVE_UNROUTABLE if d == destinations[1] else None for _, d in pairs]
+        )
+        
+        with patch.object(routes_service, '_call_routes_api', return_value=[
+            {"originIndex": 0, "destinationIndex": 0, "distanceMeters": 15000,
+             "duration": "900s", "status": "OK"}
+        ]) as mock_api:
+            result = routes_service.compute_route_matrix(origins, destinations)
+        
+        assert mock_api.call_args[0][1] == [destinations[0]]
+        assert result["fallback_cells"] == 1
+        assert result["status"] == "OK"
+        expected = routes_service._calculate_euclidean_distance(origins[0], destinations[1])
+        assert result["distance_matrix"][0][1] == expected
+        mock_cache_service.set_negative_bulk.assert_not_called()
+        
+        # Once every pair is known to fail, nothing is requested
+        mock_cache_service.get_negative_bulk.side_effect = (
+            lambda pairs: [CacheService.NEGATIVE_REQUEST_FAILED] * len(pairs)
+        )
+        with patch.object(routes_service, '_call_routes_api') as mock_api:
+            result = routes_service.compute_route_matrix(origins, destinations)
+        
+        mock_api.assert_not_called()
+        assert result["status"] == "FALLBACK"
+        assert result["fallback_cells"] == 2
+    
+    # Durable Store (Layer 3) Tests
+    
+    def test_store_hit_after_redis_miss(self, routes_service, mock_cache_service, mock_distance_store):
+        """Test Redis misses are served from the durable store and re-warm Redis."""
+        origins = [(-6.2, 106.8)]
+        destinations = [(-6.3, 106.9), (-6.4, 106.9)]
+        
+        mock_distance_store.get_many.side_effect = lambda pairs: [(15000, 1100), None]
+        
+        with patch.object(routes_service, '_call_routes_api', return_value=[
+            {"originIndex": 0, "destinationIndex": 0, "distanceMeters": 20000,
+             "duration": "1500s", "status": "OK"}
+        ]) as mock_api:
+            result = routes_service.compute_route_matrix(origins, destinations)
+        
+        # Only the pair missing everywhere is requested
+        assert mock_api.call_args[0][1] == [destinations[1]]
+        assert result["distance_matrix"][0][0] == 15000
+        assert result["duration_matrix"][0][0] == 1100  # static duration, not estimated
+        assert result["distance_matrix"][0][1] == 20000
+        
+        # Store hits are written back to Redis
+        warm = mock_cache_service.set_base_routes_bulk.call_args_list[0][0][0]
+        assert warm == [(origins[0], destinations[0], 15000, 1100)]
+        
+        # API results are backfilled with their static duration
+        mock_distance_store.put_many_async.assert_called_once_with(
+            [(origins[0], destinations[1], 20000, 1500)]
+        )
+    
+    def test_store_not_consulted_in_pro_mode(self, routes_service, mock_distance_store):
+        """Test Pro mode skips the store and backfills distances without durations."""
+        origins = [(-6.2, 106.8)]
+        destinations = [(-6.3, 106.9)]
+        
+        with patch.object(routes_service, '_call_routes_api', return_value=[
+            {"originIndex": 0, "destinationIndex": 0, "distanceMeters": 20000,
+             "duration": "1800s", "status": "OK"}
+        ]):
+            routes_service.compute_route_matrix(origins, destinations, use_traffic=True)
+        
+        mock_distance_store.get_many.assert_not_called()
+        mock_distance_store.put_many_async.assert_called_once_with(
+            [(origins[0], destinations[0], 20000, None)]
+        )
+    
+    # Sparse Matrix Tests
+    
+    def test_sparse_matrix_fetches_depot_and_neighbor_arcs(self, routes_service, mock_cache_service):
+        """Test sparse mode fetches O(N·k) arcs and estimates the rest."""
+        import numpy as np
+        
+        locations = [(-6.2, 106.8)] + [(-6.2 - i * 0.01, 106.8 + (i % 2) * 0.005) for i in range(1, 30)]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=self._fake_api()) as mock_api:
+            result = routes_service.compute_sparse_route_matrix(locations, k=3)
+        
+        n = len(locations)
+        mask = result["real_mask"]
+        stored = sum(len(c.args[0]) for c in mock_cache_service.set_base_routes_bulk.call_args_list)
+        billed = sum(len(c.args[0]) * len(c.args[1]) for c in mock_api.call_args_list)
+        
+        assert stored == billed == result["billed_elements"] == result["real_elements"] == int(mask.sum())
+        assert result["real_elements"] + result["estimated_elements"] == n * (n - 1)
+        assert result["real_elements"] < n * 3 * 2 + 2 * (n - 1)
+        assert mask[0, 1:].all() and mask[1:, 0].all()  # depot arcs
+        assert mask[5, 4] and mask[5, 6]  # nearest neighbors
+        assert not mask[1, 29]
+        assert np.array_equal(mask, mask.T)
+        
+        # Estimated cells are filled and zero stays on the diagonal only
+        matrix = result["distance_matrix"]
+        assert matrix[1, 29] > 0
+        assert all(matrix[i, i] == 0 for i in range(n))
+    
+    def test_sparse_estimate_is_calibrated(self, routes_service):
+        """Test estimated arcs use the median road/haversine ratio of real arcs."""
+        from app.utils.geo import haversine_matrix
+        
+        locations = [(-6.2 - i * 0.01, 106.8) for i in range(12)]
+        haversine = haversine_matrix(locations, locations)
+        
+        def road_api(origins, destinations, use_traffic, departure_time):
+            # Roads are exactly 1.4× the straight line
+            straight = haversine_matrix(origins, destinations)
+            return [
+                {"originIndex": i, "destinationIndex": j,
+                 "distanceMeters": int(straight[i, j] * 1.4), "duration": "60s", "status": "OK"}
+                for i in range(len(origins)) for j in range(len(destinations))
+            ]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=road_api):
+            result = routes_service.compute_sparse_route_matrix(locations, k=2)
+        
+        assert not result["real_mask"][3, 10]
+        assert result["distance_matrix"][3, 10] == pytest.approx(haversine[3, 10] * 1.4, rel=0.01)
+    
+    def test_sparse_fallback_cells_are_not_calibration_arcs(self, routes_service):
+        """Test cells that fell back to haversine are re-estimated and do not skew the detour factor."""
+        from app.utils.geo import haversine_matrix
+        
+        locations = [(-6.2 - i * 0.01, 106.8) for i in range(12)]
+        haversine = haversine_matrix(locations, locations)
+        
+        def road_api(origins, destinations, use_traffic, departure_time):
+            # Roads are 1.4× the straight line; arcs leaving the depot are unroutable
+            straight = haversine_matrix(origins, destinations)
+            return [
+                {"originIndex": i, "destinationIndex": j,
+                 "distanceMeters": int(straight[i, j] * 1.4), "duration": "60s",
+                 "status": "NOT_FOUND" if origins[i] == locations[0] else "OK"}
+                for i in range(len(origins)) for j in range(len(destinations))
+            ]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=road_api):
+            result = routes_service.compute_sparse_route_matrix(locations, k=2)
+        
+        assert result["fallback_cells"] == 11
+        assert not result["real_mask"][0, 1:].any()
+        assert result["distance_matrix"][0, 11] == pytest.approx(haversine[0, 11] * 1.4, rel=0.01)
+        assert result["distance_matrix"][3, 10] == pytest.approx(haversine[3, 10] * 1.4, rel=0.01)
+    
+    def test_prefetch_pairs_only_requests_given_pairs(self, routes_service, mock_cache_service):
+        """Test prefetching sparse pairs caches exactly those pairs."""
+        a, b, c = (-6.2, 106.8), (-6.3, 106.9), (-6.4, 106.7)
+        pairs = [(a, b), (b, a), (a, c)]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=self._fake_api()):
+            result = routes_service.prefetch_pairs(pairs)
+        
+        assert result == {"pairs": 3, "status": "OK"}
+        stored = mock_cache_service.set_base_routes_bulk.call_args[0][0]
+        assert sorted((o, d) for o, d, _, _ in stored) == sorted(pairs)
+    
+    def test_prefetch_pairs_bills_only_needed_pairs(self, routes_service):
+        """Test neighbor pairs of many points are planned as a whole, not per tile."""
+        import random
+        from app.utils.geo import haversine_matrix
+        
+        rng = random.Random(7)
+        points = [(-6.2 + rng.uniform(-0.2, 0.2), 106.8 + rng.uniform(-0.2, 0.2)) for _ in range(51)]
+        distances = haversine_matrix(points, points)
+        pairs = [
+            (points[i], points[j])
+            for i in range(len(points))
+            for j in sorted(range(len(points)), key=lambda j: distances[i, j])[1:11]
+        ]
+        pairs += [(d, o) for o, d in pairs]
+        needed = set(pairs)
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=self._fake_api()) as mock_api:
+            routes_service.prefetch_pairs(pairs)
+        
+        billed = sum(len(c.args[0]) * len(c.args[1]) for c in mock_api.call_args_list)
+        assert billed == len(needed)
+        assert all(len(c.args[0]) * len(c.args[1]) <= 625 for c in mock_api.call_args_list)
+    
+    def test_matrices_are_int32_arrays(self, routes_service):
+        """Test matrices are returned as compact int32 NumPy arrays."""
+        import numpy as np
+        
+        locations = [(-6.2 + i*0.01, 106.8) for i in range(4)]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=Exception("API Error")):
+            result = routes_service.compute_route_matrix(locations, locations)
+        
+        assert isinstance(result["distance_matrix"], np.ndarray)
+        assert result["distance_matrix"].dtype == np.int32
+        assert result["duration_matrix"].dtype == np.int32
+        assert result["distance_matrix"].shape == (4, 4)
+    
+    # Diagonal / Symmetric Mode Tests
+    
+    def test_self_pairs_filled_locally(self, routes_service, mock_cache_service):
+        """Test that diagonal cells are neither looked up nor requested."""
+        locations = [(-6.2 + i*0.01, 106.8) for i in range(5)]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=self._fake_api()):
+            result = routes_service.compute_route_matrix(locations, locations)
+        
+        pairs = mock_cache_service.get_base_routes_bulk.call_args[0][0]
+        assert len(pairs) == 20
+        assert all(o != d for o, d in pairs)
+        assert len(mock_cache_service.set_base_routes_bulk.call_args[0][0]) == 20
+        assert all(result["distance_matrix"][i][i] == 0 for i in range(5))
+        assert all(result["duration_matrix"][i][i] == 0 for i in range(5))
+        assert result["distance_matrix"][0][1] > 0
+    
+    def _fake_api(self, asymmetric=False):
+        """Fake Routes API whose distance depends on the latitudes of each pair."""
+        def fake_api(origins, destinations, use_traffic, departure_time):
+            elements = []
+            for i, (o_lat, _) in enumerate(origins):
+                for j, (d_lat, _) in enumerate(destinations):
+                    distance = int(abs(o_lat - d_lat) * 100000)
+                    if asymmetric and o_lat > d_lat:
+                        distance *= 2
+                    elements.append({
+                        "originIndex": i, "destinationIndex": j,
+                        "distanceMeters": distance, "duration": f"{distance // 10}s",
+                        "status": "OK"
+                    })
+            return elements
+        return fake_api
+    
+    def test_symmetric_mode_fetches_upper_triangle(self, routes_service, mock_cache_service):
+        """Test symmetric mode requests the upper triangle plus samples and mirrors it."""
+        locations = [(-6.2 + i*0.01, 106.8) for i in range(20)]
+        samples = {(i + 1, i) for i in range(10)}  # fixed samples keep the request plan deterministic
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=self._fake_api()) as mock_api, \
+             patch.object(routes_service, '_sample_lower_triangle', return_value=samples):
+            result = routes_service.compute_route_matrix(locations, locations, symmetric=True)
+        
+        stored = {(o, d) for c in mock_cache_service.set_base_routes_bulk.call_args_list for o, d, _, _ in c.args[0]}
+        assert all((locations[i], locations[j]) in stored for i in range(20) for j in range(i + 1, 20))
+        assert all((locations[i], locations[j]) in stored for i, j in samples)
+        requested = sum(len(c.args[0]) * len(c.args[1]) for c in mock_api.call_args_list)
+        assert requested < 400  # full matrix would bill 400 elements
+        assert result["symmetry"]["mirrored"] is True
+        assert result["symmetry"]["sampled_pairs"] == 10
+        
+        matrix = result["distance_matrix"]
+        assert all(matrix[i][j] == matrix[j][i] for i in range(20) for j in range(20))
+        assert matrix[19][0] == matrix[0][19] > 0
+    
+    def test_symmetric_mode_falls_back_on_asymmetry(self, routes_service, mock_cache_service):
+        """Test that asymmetric samples trigger a full fetch instead of mirroring."""
+        locations = [(-6.2 + i*0.01, 106.8) for i in range(20)]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=self._fake_api(asymmetric=True)):
+            result = routes_service.compute_route_matrix(locations, locations, symmetric=True)
+        
+        stored = {(o, d) for c in mock_cache_service.set_base_routes_bulk.call_args_list for o, d, _, _ in c.args[0]}
+        assert len(stored) == 380  # every off-diagonal cell
+        assert result["symmetry"]["mirrored"] is False
+        assert result["symmetry"]["mean_deviation"] == 0.5
+        assert result["distance_matrix"][19][0] == 2 * result["distance_matrix"][0][19]
+    
+    def test_symmetric_mode_requires_self_matrix(self, routes_service):
+        """Test that symmetric mode is ignored for non-square inputs."""
+        origins = [(-6.2, 106.8)]
+        destinations = [(-6.3, 106.9), (-6.4, 106.9)]
+        
+        with patch.object(routes_service, '_call_routes_api', side_effect=self._fake_api()):
+            result = routes_service.compute_route_matrix(origins, destinations, symmetric=True)
+        
+        assert "symmetry" not in result
+        assert result["distance_matrix"][0][1] > 0
     
     # Batching Tests
     
@@ -234,7 +780,7 @@ class TestRoutesAPIService:
     
     # API Call Payload Tests
     
-    @patch('app.services.routes_api_service.requests.post')
+    @patch('app.services.routes_api_service.requests.Session.post')
     def test_api_payload_essentials_mode(self, mock_post, routes_service, mock_cache_service):
         """Test API payload structure for Essentials mode."""
         origins = [(-6.2, 106.8)]
@@ -261,7 +807,7 @@ class TestRoutesAPIService:
         assert payload['origins'][0]['waypoint']['location']['latLng']['latitude'] == -6.2
         assert 'departureTime' not in payload  # No departure time for Essentials
     
-    @patch('app.services.routes_api_service.requests.post')
+    @patch('app.services.routes_api_service.requests.Session.post')
     def test_api_payload_pro_mode(self, mock_post, routes_service, mock_cache_service):
         """Test API payload structure for Pro mode."""
         origins = [(-6.2, 106.8)]
@@ -288,7 +834,7 @@ class TestRoutesAPIService:
     
     # Error Handling Tests
     
-    @patch('app.services.routes_api_service.requests.post')
+    @patch('app.services.routes_api_service.requests.Session.post')
     def test_api_error_fallback_to_euclidean(self, mock_post, routes_service, mock_cache_service):
         """Test that API error triggers fallback to Euclidean distance."""
         origins = [(-6.2, 106.8)]
@@ -307,6 +853,257 @@ class TestRoutesAPIService:
         assert result["duration_matrix"][0][0] > 0
 
 
+class FakeRoutesAPI:
+    """Local fake Routes API server with injectable latency and 429s."""
+    
+    def __init__(self, latency=0.05, rate_limited_calls=0, failing_destination_lat=None):
+        self.latency = latency
+        self.rate_limited_calls = rate_limited_calls
+        self.failing_destination_lat = failing_destination_lat
+        self.calls = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/distanceMatrix/v2:computeRouteMatrix"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+    
+    def _handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive so connection reuse can be observed
+            protocol_version = "HTTP/1.1"
+            
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.connections += 1
+            
+            def log_message(self, *args):
+                pass
+            
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with fake.lock:
+                    fake.calls += 1
+                    throttled = fake.calls <= fake.rate_limited_calls
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    time.sleep(fake.latency)
+                    origins = payload["origins"]
+                    first_lat = origins[0]["waypoint"]["location"]["latLng"]["latitude"]
+                    if throttled:
+                        self._reply(429, {"error": {"code": 429}})
+                    elif fake.failing_destination_lat is not None and any(
+                        d["waypoint"]["location"]["latLng"]["latitude"] == fake.failing_destination_lat
+                        for d in payload["destinations"]
+                    ):
+                        self._reply(500, {"error": {"code": 500}})
+                    else:
+                        self._reply(200, [
+                            {
+                                "originIndex": i,
+                                "destinationIndex": j,
+                                "distanceMeters": 1000 + i * 10 + j,
+                                "duration": f"{60 + i + j}s",
+                                "status": "OK"
+                            }
+                            for i in range(len(origins))
+                            for j in range(len(payload["destinations"]))
+                        ])
+                finally:
+                    with fake.lock:
+                        fake.in_flight -= 1
+            
+            def _reply(self, code, body):
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+        
+        return Handler
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestConcurrentBatching:
+    """Test concurrent, rate-limited batch dispatch against a fake Routes API."""
+    
+    @pytest.fixture
+    def disabled_cache(self):
+        """Create a cache service with Redis disabled."""
+        redis_client = Mock()
+        redis_client.ping.side_effect = Exception("no redis")
+        return CacheService(redis_client=redis_client)
+    
+    def make_service(self, fake, cache, qps=100.0, workers=4):
+        service = RoutesAPIService(
+            api_key="test-key",
+            cache_service=cache,
+            rate_limiter=TokenBucketRateLimiter(rate=qps, capacity=workers),
+            session=create_http_session(pool_size=workers),
+            distance_store=PairDistanceStore(enabled=False)
+        )
+        service.BASE_URL = fake.url
+        service.max_workers = workers
+        service.retry_backoff = 0.01
+        return service
+    
+    def test_batches_run_concurrently(self, disabled_cache):
+        """Test that Pro-mode batches are in flight at the same time."""
+        # 12 × 12 = 144 elements > 100 (Pro) -> 2 tiles of 12 × 6
+        origins = [(-6.2 + i * 0.01, 106.8) for i in range(12)]
+        
+        with FakeRoutesAPI(latency=0.2) as fake:
+            service = self.make_service(fake, disabled_cache)
+            start = time.monotonic()
+            result = service.compute_route_matrix(origins, origins, use_traffic=True)
+            elapsed = time.monotonic() - start
+        
+        assert result["status"] == "OK"
+        assert fake.max_in_flight > 1
+        assert elapsed < 0.2 * fake.calls
+        assert all(len(row) == 12 for row in result["distance_matrix"])
+        # Destination 11 is index 5 of the second tile (destinations [6:12])
+        assert result["distance_matrix"][3][11] == 1000 + 3 * 10 + 5
+    
+    def test_split_tiles_stay_within_worker_limit(self, disabled_cache):
+        """Test tiles planned as several sub-requests do not start nested pools."""
+        origins = [(-6.2 + i * 0.01, 106.8) for i in range(30)]
+        
+        with FakeRoutesAPI(latency=0.05) as fake:
+            service = self.make_service(fake, disabled_cache, workers=2)
+            with patch(
+                "app.services.routes_api_service.plan_missing_requests",
+                side_effect=lambda cells, max_elements, exact=False: [([i], [j]) for i, j in cells][:4]
+            ):
+                result = service.compute_route_matrix(origins, origins, use_traffic=True)
+        
+        assert result["status"] == "OK"
+        assert fake.calls > 2
+        assert fake.max_in_flight <= 2
+    
+    def test_rate_limited_responses_are_retried(self, disabled_cache):
+        """Test that 429 responses are retried and the matrix still completes."""
+        origins = [(-6.2 + i * 0.01, 106.8) for i in range(12)]
+        
+        with FakeRoutesAPI(latency=0.01, rate_limited_calls=2) as fake:
+            service = self.make_service(fake, disabled_cache)
+            result = service.compute_route_matrix(origins, origins, use_traffic=True)
+        
+        assert result["status"] == "OK"
+        assert fake.calls > 2
+        matrix = result["distance_matrix"]
+        assert all(matrix[i][j] > 0 for i in range(12) for j in range(12) if i != j)
+    
+    def test_qps_limit_spaces_requests(self, disabled_cache):
+        """Test that the token bucket bounds request rate across workers."""
+        origins = [(-6.2 + i * 0.01, 106.8) for i in range(20)]
+        
+        with FakeRoutesAPI(latency=0.0) as fake:
+            service = self.make_service(fake, disabled_cache, qps=20.0, workers=1)
+            start = time.monotonic()
+            service.compute_route_matrix(origins, origins, use_traffic=True)
+            elapsed = time.monotonic() - start
+        
+        # First request uses the burst token, the rest are spaced at 1/20s
+        assert elapsed >= (fake.calls - 1) / 20.0 * 0.8
+    
+    def test_failing_batch_falls_back_alone(self, disabled_cache):
+        """Test that one failing batch does not fail the whole matrix."""
+        origins = [(-6.2 + i * 0.01, 106.8) for i in range(12)]
+        
+        with FakeRoutesAPI(latency=0.01, failing_destination_lat=origins[11][0]) as fake:
+            service = self.make_service(fake, disabled_cache)
+            result = service.compute_route_matrix(origins, origins, use_traffic=True)
+        
+        assert result["status"] == "FALLBACK"
+        # Tiles without the failing destination keep real API values
+        assert result["distance_matrix"][0][1] >= 1000
+        # Failing tile uses Euclidean fallback
+        assert result["distance_matrix"][0][11] == service._calculate_euclidean_distance(
+            origins[0], origins[11]
+        )
+        assert result["distance_matrix"][11][11] == 0
+
+
+class TestTiledBatching:
+    """Test 2D tiling of matrices larger than the element limit."""
+    
+    @pytest.fixture
+    def routes_service(self):
+        """Create RoutesAPIService with a mocked single-request path."""
+        cache = Mock(spec=CacheService)
+        service = RoutesAPIService(api_key="test-key", cache_service=cache)
+        
+        def fake_single(origins, destinations, use_traffic, departure_time, cells=None, **kwargs):
+            # Encode the coordinates so the merge position can be verified
+            return {
+                "distance_matrix": [[int(o[0] * 1000) * 10000 + int(d[0] * 1000) for d in destinations] for o in origins],
+                "duration_matrix": [[1 for _ in destinations] for _ in origins],
+                "status": "OK"
+            }
+        
+        service._compute_single_request = Mock(side_effect=fake_single)
+        return service
+    
+    @pytest.mark.parametrize("n_locations,use_traffic,limit", [
+        (201, True, 100),    # CVRPRequest maximum (200 recipients + depot), Pro mode
+        (201, False, 625),   # Same in Essentials mode
+        (1001, False, 625),  # City-wide planning
+    ])
+    def test_large_matrix_tiles_fit_limit(self, routes_service, n_locations, use_traffic, limit):
+        """Test that matrices beyond the origin-only strategy are tiled and merged."""
+        locations = [(i / 1000.0, 106.8) for i in range(n_locations)]
+        
+        result = routes_service.compute_route_matrix(locations, locations, use_traffic=use_traffic)
+        
+        calls = routes_service._compute_single_request.call_args_list
+        assert all(len(c.args[0]) * len(c.args[1]) <= limit for c in calls)
+        assert sum(len(c.args[0]) * len(c.args[1]) for c in calls) == n_locations ** 2
+        
+        matrix = result["distance_matrix"]
+        assert len(matrix) == n_locations
+        assert all(len(row) == n_locations for row in matrix)
+        for i, j in [(0, 0), (7, n_locations - 1), (n_locations - 1, 3), (150, 99)]:
+            assert matrix[i][j] == i * 10000 + j
+    
+    def test_symmetric_mode_skips_lower_tiles(self, routes_service):
+        """Test that tiles entirely below the diagonal are not dispatched."""
+        locations = [(i / 1000.0, 106.8) for i in range(201)]
+        
+        with patch('app.services.routes_api_service.settings') as mock_settings:
+            mock_settings.ROUTES_API_SYMMETRY_SAMPLE_SIZE = 0
+            mock_settings.ROUTES_API_SYMMETRY_TOLERANCE = 0.15
+            result = routes_service.compute_route_matrix(locations, locations, symmetric=True)
+        
+        calls = routes_service._compute_single_request.call_args_list
+        assert len(calls) < 70
+        assert result["symmetry"]["mirrored"] is True
+        assert result["distance_matrix"][150][99] == 99 * 10000 + 150
+    
+    def test_tiles_keep_payload_small(self, routes_service):
+        """Test that tiles are near-square instead of thin destination slices."""
+        locations = [(i / 1000.0, 106.8) for i in range(201)]
+        
+        routes_service.compute_route_matrix(locations, locations, use_traffic=False)
+        
+        calls = routes_service._compute_single_request.call_args_list
+        assert len(calls) <= 72
+        assert max(len(c.args[0]) + len(c.args[1]) for c in calls) <= 60
+
+
 class TestRoutesAPIServiceIntegration:
     """Integration tests with real cache (optional - requires Redis)."""
     
@@ -349,3 +1146,38 @@ class TestRoutesAPIServiceIntegration:
 if __name__ == "__main__":
     """Run tests directly."""
     pytest.main([__file__, "-v", "-s"])
+    
+    def test_connections_are_reused(self, disabled_cache):
+        """Test that sequential requests share one keep-alive connection."""
+        with FakeRoutesAPI(latency=0) as fake:
+            service = self.make_service(fake, disabled_cache)
+            for i in range(3):
+                service.compute_route_matrix([(-6.2 + i * 0.01, 106.8)], [(-6.3, 106.9)])
+            service.session.close()
+        
+        assert fake.calls == 3
+        assert fake.connections == 1
+    
+    async def test_async_matrix_does_not_block_event_loop(self, disabled_cache):
+        """Test that awaiting the async variant leaves the event loop free."""
+        import asyncio
+        
+        origins = [(-6.2 + i * 0.01, 106.8) for i in range(3)]
+        
+        with FakeRoutesAPI(latency=0.2) as fake:
+            service = self.make_service(fake, disabled_cache)
+            ticks = 0
+            
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+            
+            task = asyncio.create_task(ticker())
+            result = await service.compute_route_matrix_async(origins, origins)
+            task.cancel()
+            service.session.close()
+        
+        assert result["status"] == "OK"
+        assert ticks >= 5
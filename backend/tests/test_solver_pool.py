@@ -0,0 +1,93 @@
+"""
+Unit tests for the solver process pool.
+"""
+import asyncio
+import os
+import threading
+import time
+import pytest
+from app.services.solver_pool import SolverBusyError, SolverPool
+
+
+def blocking_call(started: threading.Event, release: threading.Event) -> str:
+    """Block a thread worker until released."""
+    started.set()
+    release.wait(5)
+    return "done"
+
+
+class TestSolverPoolAdmission:
+    """Test admission control with thread workers."""
+    
+    @pytest.fixture
+    def pool(self):
+        """Create a pool with one worker and one queue slot."""
+        pool = SolverPool(max_workers=1, max_queued=1, use_processes=False)
+        yield pool
+        pool.stop()
+    
+    def test_rejects_when_saturated(self, pool):
+        """Test calls beyond workers + queue are rejected, then admitted again."""
+        started, release = threading.Event(), threading.Event()
+        
+        async def scenario():
+            running = asyncio.ensure_future(pool.run(blocking_call, started, release))
+            queued = asyncio.ensure_future(pool.run(blocking_call, threading.Event(), release))
+            await asyncio.sleep(0)
+            assert pool.snapshot()["in_flight"] == 2
+            
+            with pytest.raises(SolverBusyError):
+                await pool.run(blocking_call, threading.Event(), release)
+            
+            release.set()
+            assert await asyncio.gather(running, queued) == ["done", "done"]
+            assert await pool.run(str, 1) == "1"
+        
+        asyncio.run(scenario())
+        
+        assert pool.snapshot() == {
+            "workers": 1, "mode": "threads", "max_queued": 1, "in_flight": 0, "rejected": 1
+        }
+    
+    def test_slot_held_until_solve_finishes(self, pool):
+        """Test a cancelled request keeps its slot while the solve still runs."""
+        pool.max_queued = 0
+        started, release = threading.Event(), threading.Event()
+        
+        async def scenario():
+            task = asyncio.ensure_future(pool.run(blocking_call, started, release))
+            await asyncio.sleep(0)
+            task.cancel()
+            
+            with pytest.raises(SolverBusyError):
+                await pool.run(str, 1)
+            release.set()
+        
+        asyncio.run(scenario())
+        for _ in range(100):
+            if pool.snapshot()["in_flight"] == 0:
+                break
+            time.sleep(0.01)
+        
+        assert pool.snapshot()["in_flight"] == 0
+    
+    def test_errors_propagate(self, pool):
+        """Test exceptions raised by the call reach the caller and free the slot."""
+        with pytest.raises(ValueError):
+            asyncio.run(pool.run(int, "not a number"))
+        
+        assert pool.snapshot()["in_flight"] == 0
+
+
+class TestSolverPoolProcesses:
+    """Test the process-backed pool."""
+    
+    def test_runs_in_separate_process(self):
+        """Test calls run outside the event loop's process."""
+        pool = SolverPool(max_workers=1, max_queued=0, use_processes=True)
+        try:
+            pid = asyncio.run(pool.run(os.getpid))
+        finally:
+            pool.stop()
+        
+        assert pid != os.getpid()
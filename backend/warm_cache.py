@@ -0,0 +1,76 @@
+"""
+Warm the distance cache for unassigned recipients.
+
+Fills Layer 1 with depot and intra-city distances before a distribution
+day. Progress is saved in Redis, so re-running the same command resumes
+where the previous run stopped.
+
+Usage:
+    python warm_cache.py                          # all unassigned recipients
+    python warm_cache.py --city 3171 --city 3172  # selected cities
+    python warm_cache.py --province 31 --budget 20000 --now
+    python warm_cache.py --wait                   # sleep until the off-peak window
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+
+from app.config import settings
+from app.services.cache_warmup_service import CacheWarmupService
+from app.services.precompute_service import is_off_peak
+
+
+def print_progress(progress: dict):
+    """Print a warm-up progress report."""
+    print(f"\n=== Cache warm-up: {progress['job']} ===")
+    print(f"Status:          {progress['status']}")
+    print(f"Recipients:      {progress['recipients']} in {progress['cities']} cities")
+    print(f"Tiles:           {progress['tiles_done']}/{progress['tiles_total']}")
+    print(f"Elements spent:  {progress['elements_spent']} (budget {progress['budget_elements']})")
+    print(f"Total spent:     {progress['total_elements_spent']} across runs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--province", type=int, action="append", help="Province ID (repeatable)")
+    parser.add_argument("--city", type=int, action="append", help="City ID (repeatable)")
+    parser.add_argument(
+        "--budget", type=int, default=None,
+        help=f"Max billable elements for this run (default {settings.CACHE_WARMUP_BUDGET_ELEMENTS})"
+    )
+    parser.add_argument("--now", action="store_true", help="Ignore the off-peak window")
+    parser.add_argument("--wait", action="store_true", help="Sleep until the off-peak window opens")
+    parser.add_argument("--reset", action="store_true", help="Discard saved progress first")
+    parser.add_argument("--status", action="store_true", help="Only print saved progress")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    service = CacheWarmupService()
+    
+    if args.status:
+        print_progress(service.get_progress(args.province, args.city))
+        return
+    
+    if args.reset:
+        service.reset(args.province, args.city)
+    
+    if args.wait and not args.now:
+        while not is_off_peak(
+            datetime.now(), settings.PRECOMPUTE_OFFPEAK_START_HOUR, settings.PRECOMPUTE_OFFPEAK_END_HOUR
+        ):
+            print(f"Outside off-peak window ({settings.PRECOMPUTE_OFFPEAK_START_HOUR}:00-"
+                  f"{settings.PRECOMPUTE_OFFPEAK_END_HOUR}:00), waiting...")
+            time.sleep(settings.PRECOMPUTE_POLL_SECONDS)
+    
+    progress = service.run(
+        province_ids=args.province,
+        city_ids=args.city,
+        budget_elements=args.budget,
+        ignore_offpeak=args.now
+    )
+    print_progress(progress)
+
+
+if __name__ == "__main__":
+    main()
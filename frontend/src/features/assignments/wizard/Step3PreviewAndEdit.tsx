@@ -54,12 +54,15 @@ export default function Step3PreviewAndEdit({ state, actions }: Step3Props) {
         // Rekomendasi Mode: Run CVRP
         setOptimizationProgress('Menjalankan algoritma CVRP...');
 
-        const cvrpResponse = await optimizationService.runCVRP(
+        const cvrpResponse = await optimizationService.runCVRPJob(
           state.selectedRecipientIds,
           state.selectedCourierIds.length,
           state.capacityPerCourier || 20,
           getDepotLocation(),
-          state.useTraffic
+          state.useTraffic,
+          (progress) => setOptimizationProgress(
+            `Solusi ke-${progress.solutions} ditemukan (${progress.elapsed_seconds.toFixed(0)} detik)...`
+          )
         );
 
         const assignments = optimizationService.convertCVRPToAssignments(
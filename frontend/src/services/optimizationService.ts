@@ -7,6 +7,8 @@ interface TSPRequest {
   depot_location?: { lat: number; lng: number };
   use_traffic?: boolean;
   timeout_seconds?: number;
+  initial_sequence?: string[];
+  previous_result_id?: string;
 }
 
 interface TSPResponse {
@@ -14,6 +16,8 @@ interface TSPResponse {
   total_distance_meters: number;
   total_duration_seconds: number;
   num_stops: number;
+  result_id?: string | null;
+  warm_start?: boolean;
 }
 
 interface CVRPRequest {
@@ -23,6 +27,8 @@ interface CVRPRequest {
   depot_location?: { lat: number; lng: number };
   use_traffic?: boolean;
   timeout_seconds?: number;
+  initial_routes?: string[][];
+  previous_result_id?: string;
 }
 
 interface RouteInfo {
@@ -47,6 +53,16 @@ interface CVRPResponse {
   avg_load_per_route: number;
   max_load: number;
   min_load: number;
+  result_id?: string | null;
+  warm_start?: boolean;
+}
+
+/**
+ * Previous solution to start a re-optimization from
+ */
+export interface WarmStart {
+  routes?: string[][];
+  previousResultId?: string;
 }
 
 /**
@@ -55,7 +71,8 @@ interface CVRPResponse {
 export const runTSP = async (
   recipientIds: string[],
   depotLocation?: { lat: number; lng: number },
-  useTraffic: boolean = false
+  useTraffic: boolean = false,
+  warmStart?: WarmStart
 ): Promise<TSPResponse> => {
   const request: TSPRequest = {
     recipient_ids: recipientIds,
@@ -67,6 +84,12 @@ export const runTSP = async (
     request.depot_location = depotLocation;
   }
 
+  if (warmStart?.routes?.length) {
+    request.initial_sequence = warmStart.routes[0];
+  } else if (warmStart?.previousResultId) {
+    request.previous_result_id = warmStart.previousResultId;
+  }
+
   const response = await api.post<TSPResponse>('/optimize/tsp', request);
   return response.data;
 };
@@ -127,7 +150,8 @@ export const runCVRP = async (
   numCouriers: number,
   capacityPerCourier: number,
   depotLocation?: { lat: number; lng: number },
-  useTraffic: boolean = false
+  useTraffic: boolean = false,
+  warmStart?: WarmStart
 ): Promise<CVRPResponse> => {
   const request: CVRPRequest = {
     recipient_ids: recipientIds,
@@ -141,10 +165,124 @@ export const runCVRP = async (
     request.depot_location = depotLocation;
   }
 
+  if (warmStart?.routes?.length) {
+    request.initial_routes = warmStart.routes;
+  } else if (warmStart?.previousResultId) {
+    request.previous_result_id = warmStart.previousResultId;
+  }
+
   const response = await api.post<CVRPResponse>('/optimize/cvrp', request);
   return response.data;
 };
 
+export interface OptimizationJobProgress {
+  objective: number;
+  solutions: number;
+  elapsed_seconds: number;
+  routes: string[][];
+}
+
+interface OptimizationJob<TResult> {
+  job_id: string;
+  problem: 'tsp' | 'cvrp';
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled';
+  progress: OptimizationJobProgress | null;
+  result: TResult | null;
+  error: string | null;
+}
+
+/**
+ * Follow an optimization job's Server-Sent Events until it finishes.
+ * Uses fetch (EventSource cannot send the Authorization header).
+ */
+const followOptimizationJob = async <TResult>(
+  jobId: string,
+  onProgress?: (progress: OptimizationJobProgress) => void,
+  signal?: AbortSignal
+): Promise<TResult> => {
+  const response = await fetch(`${api.defaults.baseURL}/optimize/jobs/${jobId}/events`, {
+    headers: { Authorization: `Bearer ${localStorage.getItem('token') || ''}` },
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Optimization job stream failed (${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) {
+      throw new Error('Optimization job stream ended unexpectedly');
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      const event = frame.match(/^event: (.*)$/m)?.[1];
+      const data = frame.match(/^data: (.*)$/m)?.[1];
+      if (!event || !data) {
+        continue; // keep-alive comment
+      }
+
+      const job = JSON.parse(data) as OptimizationJob<TResult>;
+      if (event === 'progress') {
+        if (job.progress) {
+          onProgress?.(job.progress);
+        }
+      } else if (event === 'completed' && job.result) {
+        return job.result;
+      } else {
+        throw new Error(job.error || 'Optimasi dibatalkan');
+      }
+    }
+  }
+};
+
+/**
+ * Run CVRP as a background job, reporting the best solution found so far
+ */
+export const runCVRPJob = async (
+  recipientIds: string[],
+  numCouriers: number,
+  capacityPerCourier: number,
+  depotLocation?: { lat: number; lng: number },
+  useTraffic: boolean = false,
+  onProgress?: (progress: OptimizationJobProgress) => void,
+  signal?: AbortSignal
+): Promise<CVRPResponse> => {
+  const cvrp: CVRPRequest = {
+    recipient_ids: recipientIds,
+    num_couriers: numCouriers,
+    capacity_per_courier: capacityPerCourier,
+    use_traffic: useTraffic,
+    timeout_seconds: 60,
+  };
+
+  if (depotLocation) {
+    cvrp.depot_location = depotLocation;
+  }
+
+  const response = await api.post<OptimizationJob<CVRPResponse>>('/optimize/jobs', {
+    problem: 'cvrp',
+    cvrp,
+  });
+  return followOptimizationJob<CVRPResponse>(response.data.job_id, onProgress, signal);
+};
+
+/**
+ * Cancel a running optimization job
+ */
+export const cancelOptimizationJob = async (jobId: string): Promise<void> => {
+  await api.post(`/optimize/jobs/${jobId}/cancel`);
+};
+
 /**
  * Convert CVRP response to PreviewAssignments
  */
@@ -235,6 +373,8 @@ const optimizationService = {
   runTSP,
   runTSPForGroups,
   runCVRP,
+  runCVRPJob,
+  cancelOptimizationJob,
   convertCVRPToAssignments,
   calculateRouteLegDistances,
   formatDistance,